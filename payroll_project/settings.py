@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'salary.db_routers.PrimaryAfterWriteMiddleware',
 ]
 
 ROOT_URLCONF = 'payroll_project.urls'
@@ -83,6 +84,19 @@ DATABASES = {
     }
 }
 
+# Réplique en lecture seule des rapports et exports (voir salary.db_routers).
+# En local : copier db.sqlite3 et indiquer la copie dans PAYROLL_SQLITE_REPLICA.
+if os.environ.get('PAYROLL_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['PAYROLL_SQLITE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['salary.db_routers.ReplicaRouter']
+# Retard de réplication toléré (secondes) et intervalle entre deux mesures
+PAYROLL_REPLICA_MAX_LAG = 30
+PAYROLL_REPLICA_CHECK_INTERVAL = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -147,3 +161,38 @@ LOGOUT_REDIRECT_URL = '/auth/login/'
 # Configuration des fichiers média
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Cache des exports générés (fichiers conservés par version des employés)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'exports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'exports'),
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+PAYROLL_EXPORT_CACHE = 'exports'
+PAYROLL_EXPORT_CACHE_TIMEOUT = 7 * 24 * 3600
+
+# Nombre de threads du pool borné utilisé par les vues asynchrones pour le solveur
+PAYROLL_SOLVER_WORKERS = 4
+
+# Fichier de virements des salaires : compte de l'entreprise à débiter et, au besoin,
+# disposition propre à la banque (voir salary.bank_transfer.DEFAULT_LAYOUT)
+BANK_TRANSFER_DEBIT_ACCOUNT = ''
+# BANK_TRANSFER_LAYOUT = {'csv_delimiter': ','}
+
+# Journal de paie : code journal et comptes propres à l'entreprise
+# (complètent salary.journal.DEFAULT_LEDGER_ACCOUNTS)
+PAYROLL_JOURNAL_CODE = 'PAIE'
+PAYROLL_LEDGER_ACCOUNTS = {}
+
+# Instantanés en colonnes des paies clôturées (fichiers .npy, voir salary.snapshots)
+PAYROLL_SNAPSHOT_ROOT = os.path.join(BASE_DIR, 'snapshots')
+
+# Journal d'audit (voir salary.audit) : taille des lots écrits et délai maximal
+# (secondes) avant l'écriture des événements en file
+PAYROLL_AUDIT_BATCH_SIZE = 500
+PAYROLL_AUDIT_FLUSH_INTERVAL = 10
@@ -38,6 +38,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'salary.db_routers.PrimaryAfterWriteMiddleware',
 ]
 
 ROOT_URLCONF = 'payroll_project.urls'
@@ -73,6 +74,21 @@ DATABASES = {
     }
 }
 
+# Réplique en lecture seule pour les rapports et exports (voir salary.db_routers) :
+# sans DB_REPLICA_HOST, toutes les lectures restent sur la base principale
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=config('DB_REPLICA_HOST'),
+        PORT=config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        USER=config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        PASSWORD=config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        TEST={'MIRROR': 'default'},
+    )
+DATABASE_ROUTERS = ['salary.db_routers.ReplicaRouter']
+PAYROLL_REPLICA_MAX_LAG = config('PAYROLL_REPLICA_MAX_LAG', default=30, cast=int)
+PAYROLL_REPLICA_CHECK_INTERVAL = config('PAYROLL_REPLICA_CHECK_INTERVAL', default=5, cast=int)
+
 # Modèle d'utilisateur personnalisé
 AUTH_USER_MODEL = 'salary.User'
 
@@ -143,6 +159,27 @@ CORS_ALLOWED_ORIGINS = [
     "https://www.votre-domaine.com",
 ]
 
+# Cache des exports générés (fichiers conservés par version des employés)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'exports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('EXPORT_CACHE_DIR', default=os.path.join(BASE_DIR, 'cache', 'exports')),
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+PAYROLL_EXPORT_CACHE = 'exports'
+PAYROLL_EXPORT_CACHE_TIMEOUT = 7 * 24 * 3600
+
+# Nombre de threads du pool borné utilisé par les vues asynchrones pour le solveur
+PAYROLL_SOLVER_WORKERS = config('PAYROLL_SOLVER_WORKERS', default=4, cast=int)
+
+# Journal d'audit : taille des lots et délai maximal avant écriture (salary.audit)
+PAYROLL_AUDIT_BATCH_SIZE = config('PAYROLL_AUDIT_BATCH_SIZE', default=500, cast=int)
+PAYROLL_AUDIT_FLUSH_INTERVAL = config('PAYROLL_AUDIT_FLUSH_INTERVAL', default=10, cast=int)
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -5,8 +5,18 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django import forms
 from django.shortcuts import redirect
-from .models import User, Employee, Company
+from django.contrib.admin import helpers
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from .models import User, Employee, Company, PayrollPeriod, SalaryHistory, AuditEvent
 from .auth_views import send_user_credentials
+from . import audit
+from .exports import EXPORT_FORMATS
+from .recompute import recompute_employees
+from .search import search_employees
+from .services import to_stored_decimal
 
 class CustomUserCreationForm(forms.ModelForm):
     """Formulaire de création d'utilisateur personnalisé"""
@@ -136,34 +146,91 @@ class UserAdmin(admin.ModelAdmin):
         """Optimiser les requêtes"""
         return super().get_queryset(request).select_related()
 
+class AmountBandFilter(admin.SimpleListFilter):
+    """Filtre par tranche de montant (GNF) : field_name et bands (bornes croissantes) à définir"""
+    field_name = None
+    bands = ()
+    
+    def lookups(self, request, model_admin):
+        bounds = (None,) + tuple(self.bands) + (None,)
+        choices = []
+        for lower, upper in zip(bounds, bounds[1:]):
+            if lower is None:
+                label = f"Moins de {upper:,.0f}"
+            elif upper is None:
+                label = f"{lower:,.0f} et plus"
+            else:
+                label = f"{lower:,.0f} à {upper:,.0f}"
+            choices.append((f"{lower or ''}-{upper or ''}", label.replace(',', ' ')))
+        return choices
+    
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        lower, _, upper = self.value().partition('-')
+        if lower.isdigit():
+            queryset = queryset.filter(**{f"{self.field_name}__gte": int(lower)})
+        if upper.isdigit():
+            queryset = queryset.filter(**{f"{self.field_name}__lt": int(upper)})
+        return queryset
+
+class SalaireNetBandFilter(AmountBandFilter):
+    title = "tranche de salaire net"
+    parameter_name = 'tranche_net'
+    field_name = 'salaire_net'
+    bands = (500_000, 1_000_000, 2_000_000, 5_000_000, 10_000_000)
+
+class CoutEmployeurBandFilter(AmountBandFilter):
+    title = "tranche de coût employeur"
+    parameter_name = 'tranche_cout'
+    field_name = 'cout_employeur'
+    bands = (1_000_000, 2_000_000, 5_000_000, 10_000_000, 20_000_000)
+
+class ReassignEmployeesForm(forms.Form):
+    """Utilisateur auquel réaffecter les employés sélectionnés"""
+    user = forms.ModelChoiceField(queryset=User.objects.order_by('email'), label="Nouvel utilisateur")
+
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     """Administration des employés"""
     
-    list_display = ('nom_complet', 'salaire_net', 'salaire_brut', 'get_total_cout_employeur', 'date_creation')
-    list_filter = ('date_creation',)
+    list_display = ('nom_complet', 'salaire_net', 'salaire_brut', 'cout_employeur', 'date_creation')
+    list_filter = (SalaireNetBandFilter, CoutEmployeurBandFilter, 'date_creation')
     search_fields = ('nom_complet',)
     ordering = ('-date_creation',)
-    readonly_fields = ('date_creation',)
+    readonly_fields = ('date_creation', 'cout_employeur')
+    # « Tout sélectionner » transmet le queryset filtré : les actions ne chargent jamais tous les employés
+    actions = ('recompute_selected', 'export_selected_csv', 'export_selected_jsonl', 'reassign_selected')
+    # Totaux affichés sous la liste (calculés en base sur la liste filtrée) : (libellé, colonne)
+    changelist_totals = (
+        ("Salaire net", 'salaire_net'),
+        ("Salaire brut", 'salaire_brut'),
+        ("Charges patronales", 'total_cnss_patronal'),
+        ("Coût employeur", 'cout_employeur'),
+    )
     
     fieldsets = (
         ('Informations de base', {
             'fields': ('nom_complet', 'salaire_net', 'date_creation')
         }),
+        ('Coordonnées bancaires', {
+            'fields': ('code_banque', 'code_guichet', 'numero_compte', 'cle_rib')
+        }),
         ('Calculs automatiques', {
             'fields': (
                 'salaire_base', 'salaire_brut', 'salaire_imposable',
                 'cnss_employe', 'rts', 'total_charges_employee',
                 'cnss_employeur', 'versement_forfaitaire', 'taxe_apprentissage',
-                'total_cnss_patronal', 'ecart_imposable'
+                'total_cnss_patronal', 'cout_employeur', 'ecart_imposable'
             ),
             'classes': ('collapse',)
         }),
         ('Primes détaillées', {
             'fields': (
-                'prime_cherte_vie', 'prime_craie', 'indemnite_logement',
-                'indemnite_transport', 'indemnite_repas', 'autre_gratification',
-                'primes_taxables_25'
+                'prime_cherte_vie', 'indemnite_logement', 'indemnite_transport',
+                'indemnite_repas', 'prime_responsabilite', 'primes_taxables',
+                'prime_retraite', 'prime_interim', 'prime_anciennete', 'primes_exonerees',
+                'avantage_nature'
             ),
             'classes': ('collapse',)
         }),
@@ -172,6 +239,125 @@ class EmployeeAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimiser les requêtes"""
         return super().get_queryset(request)
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Recherche indexée sur le nom (voir salary.search) plutôt qu'un LIKE '%...%'"""
+        return search_employees(queryset, search_term), False
+    
+    def changelist_view(self, request, extra_context=None):
+        """Ajoute les totaux de la liste filtrée (une requête d'agrégation)"""
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            totals = changelist.queryset.order_by().aggregate(
+                employes=Count('pk'), **{name: Sum(name) for _, name in self.changelist_totals}
+            )
+            response.context_data['changelist_totals'] = [
+                (label, to_stored_decimal(totals[name])) for label, name in self.changelist_totals
+            ]
+            response.context_data['changelist_count'] = totals['employes']
+        return response
+    
+    def recompute_selected(self, request, queryset):
+        """Recalcule la sélection avec les règles actuelles (par lots, colonnes modifiées seulement)"""
+        stats = recompute_employees(queryset, force=True)
+        self.message_user(
+            request,
+            f"✅ {stats['recomputed']} employé(s) recalculé(s), {stats['updated']} modifié(s).",
+            messages.SUCCESS,
+        )
+    recompute_selected.short_description = "Recalculer les employés sélectionnés"
+    
+    def _export_selected(self, request, queryset, export_format):
+        stream, content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream(queryset.order_by('id')), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="employes_selection.{extension}"'
+        audit.record(audit.EXPORT, request.user, details={'fichier': f"employes_selection.{extension}"})
+        return response
+    
+    def export_selected_csv(self, request, queryset):
+        """Export CSV de la sélection, diffusé en continu"""
+        return self._export_selected(request, queryset, 'csv')
+    export_selected_csv.short_description = "Exporter la sélection (CSV)"
+    
+    def export_selected_jsonl(self, request, queryset):
+        """Export JSON Lines de la sélection, diffusé en continu"""
+        return self._export_selected(request, queryset, 'jsonl')
+    export_selected_jsonl.short_description = "Exporter la sélection (JSON Lines)"
+    
+    def reassign_selected(self, request, queryset):
+        """Réaffecte la sélection à un autre utilisateur (page de confirmation, puis un seul UPDATE)"""
+        if 'apply' in request.POST:
+            form = ReassignEmployeesForm(request.POST)
+            if form.is_valid():
+                target = form.cleaned_data['user']
+                with transaction.atomic():
+                    # Propriétaires actuels lus sous verrou : l'audit reflète exactement ce que l'UPDATE remplace
+                    locked = Employee.objects.select_for_update().filter(pk__in=queryset.values('pk'))
+                    previous = dict(locked.order_by('id').values_list('id', 'user_id'))
+                    count = Employee.objects.filter(pk__in=list(previous)).update(user=target)
+                    audit.record_many(
+                        audit.MODIFICATION, request.user, list(previous),
+                        lambda employee_id: {'user': target.pk, 'ancien_user': previous[employee_id]},
+                    )
+                self.message_user(request, f"✅ {count} employé(s) réaffecté(s) à {target.email}.", messages.SUCCESS)
+                return None
+        else:
+            form = ReassignEmployeesForm()
+        
+        return TemplateResponse(request, "admin/salary/employee/reassign_selected.html", {
+            **self.admin_site.each_context(request),
+            'title': "Réaffecter les employés sélectionnés",
+            'opts': self.model._meta,
+            'form': form,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+    reassign_selected.short_description = "Réaffecter à un autre utilisateur"
+
+@admin.register(SalaryHistory)
+class SalaryHistoryAdmin(admin.ModelAdmin):
+    """Administration de l'historique des salaires"""
+    
+    list_display = ('employee', 'effective_from', 'salaire_net', 'salaire_brut', 'get_total_cout_employeur', 'date_creation')
+    list_filter = ('effective_from',)
+    search_fields = ('employee__nom_complet',)
+    date_hierarchy = 'effective_from'
+    list_select_related = ('employee',)
+    raw_id_fields = ('employee',)
+    readonly_fields = ('date_creation',)
+
+@admin.register(PayrollPeriod)
+class PayrollPeriodAdmin(admin.ModelAdmin):
+    """Administration des périodes de paie (les lignes sont créées par la préparation de la paie)"""
+    
+    list_display = ('__str__', 'user', 'statut', 'date_creation', 'date_cloture')
+    list_filter = ('statut', 'annee')
+    search_fields = ('user__email',)
+    list_select_related = ('user',)
+    readonly_fields = ('date_creation', 'date_cloture')
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    """Consultation du journal d'audit (en ajout seul : ni création, ni modification, ni suppression)"""
+    
+    list_display = ('date', 'action', 'user', 'employee_id', 'rules_version')
+    list_filter = ('action',)
+    search_fields = ('user__email',)
+    date_hierarchy = 'date'
+    list_select_related = ('user',)
+    readonly_fields = ('date', 'action', 'user', 'employee', 'rules_version', 'details')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
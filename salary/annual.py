@@ -0,0 +1,155 @@
+"""
+Cumuls annuels par employé (certificats de salaire, déclarations annuelles).
+
+Les cumuls (AnnualSummary) sont tenus à jour à la clôture de chaque période :
+les montants de la période sont ajoutés en base aux lignes existantes et les
+nouveaux employés sont insérés, sans relire les mois précédents. Les rapports
+annuels lisent donc une ligne par employé au lieu d'agréger douze mois de
+lignes de paie. rebuild_annual_summaries recalcule une année entière à partir
+des périodes clôturées (reprise d'historique, correction).
+
+La mise à jour utilise UPDATE ... FROM (SQLite 3.33+, PostgreSQL).
+"""
+import csv
+import io
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from .exports import STREAM_BATCH_SIZE
+from .models import AnnualSummary, PayrollLine, PayrollPeriod
+from .services import to_stored_decimal
+
+ANNUAL_CHUNK_SIZE = 2000
+
+# Montants cumulés (mêmes noms dans PayrollLine et AnnualSummary)
+ANNUAL_FIELDS = (
+    'salaire_brut', 'salaire_imposable', 'cnss_employe', 'cnss_employeur', 'rts',
+    'versement_forfaitaire', 'taxe_apprentissage', 'total_cnss_patronal',
+    'salaire_net', 'salaire_net_a_payer',
+)
+
+# Colonnes de l'export annuel : (clé, en-tête)
+ANNUAL_EXPORT_COLUMNS = (
+    ('employee_id', "ID"),
+    ('nom_complet', "Nom Complet"),
+    ('mois', "Mois payés"),
+    ('salaire_brut', "Salaire Brut"),
+    ('salaire_imposable', "Salaire Imposable"),
+    ('cnss_employe', "CNSS Employé"),
+    ('cnss_employeur', "CNSS Employeur"),
+    ('rts', "RTS"),
+    ('versement_forfaitaire', "Versement Forfaitaire"),
+    ('taxe_apprentissage', "Taxe Apprentissage"),
+    ('total_cnss_patronal', "Total CNSS Patronal"),
+    ('salaire_net', "Salaire Net"),
+    ('salaire_net_a_payer', "Salaire Net à Payer"),
+)
+
+
+def _quoted(model, names):
+    quote = connection.ops.quote_name
+    return [quote(model._meta.get_field(name).column) for name in names]
+
+
+def _update_existing(period):
+    """Ajoute les montants de la période aux cumuls existants (UPDATE ... FROM : une jointure, pas une requête par employé)"""
+    table = connection.ops.quote_name(AnnualSummary._meta.db_table)
+    assignments = ', '.join(
+        f"{column} = {table}.{column} + line.{source}"
+        for column, source in zip(_quoted(AnnualSummary, ANNUAL_FIELDS), _quoted(PayrollLine, ANNUAL_FIELDS))
+    )
+    sql = (
+        f"UPDATE {table} SET mois = {table}.mois + 1, nom_complet = line.nom_complet, {assignments} "
+        f"FROM {connection.ops.quote_name(PayrollLine._meta.db_table)} line "
+        f"WHERE line.period_id = %s AND {table}.employee_id = line.employee_id "
+        f"AND {table}.user_id = %s AND {table}.annee = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [period.pk, period.user_id, period.annee])
+        return cursor.rowcount
+
+
+def _insert_new_employees(period):
+    """Insère les cumuls des employés de la période qui n'en ont pas encore pour l'année"""
+    quote = connection.ops.quote_name
+    summary_table = quote(AnnualSummary._meta.db_table)
+    columns = ', '.join(_quoted(AnnualSummary, ANNUAL_FIELDS))
+    sources = ', '.join(f"line.{column}" for column in _quoted(PayrollLine, ANNUAL_FIELDS))
+    sql = (
+        f"INSERT INTO {summary_table} (user_id, annee, employee_id, nom_complet, mois, {columns}) "
+        f"SELECT %s, %s, line.employee_id, line.nom_complet, 1, {sources} "
+        f"FROM {quote(PayrollLine._meta.db_table)} line WHERE line.period_id = %s AND NOT EXISTS ("
+        f"SELECT 1 FROM {summary_table} summary WHERE summary.user_id = %s AND summary.annee = %s "
+        f"AND summary.employee_id = line.employee_id)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [period.user_id, period.annee, period.pk, period.user_id, period.annee])
+        return cursor.rowcount
+
+
+def add_period_to_summaries(period):
+    """
+    Ajoute les montants d'une période aux cumuls de son année : une mise à jour en base
+    des employés déjà présents puis une insertion des nouveaux. À n'appeler qu'une fois
+    par période (à sa clôture). Renvoie (cumuls mis à jour, cumuls créés).
+    """
+    with transaction.atomic():
+        updated = _update_existing(period)
+        created = _insert_new_employees(period)
+    return updated, created
+
+
+def rebuild_annual_summaries(user, annee):
+    """Recalcule les cumuls d'une année à partir de ses périodes clôturées ; renvoie le nombre de cumuls"""
+    quote = connection.ops.quote_name
+    columns = ', '.join(_quoted(AnnualSummary, ANNUAL_FIELDS))
+    sums = ', '.join(f"SUM(line.{column})" for column in _quoted(PayrollLine, ANNUAL_FIELDS))
+    # Nom de la dernière période clôturée où l'employé apparaît
+    latest_name = (
+        f"(SELECT latest.nom_complet FROM {quote(PayrollLine._meta.db_table)} latest "
+        f"INNER JOIN {quote(PayrollPeriod._meta.db_table)} latest_period ON latest_period.id = latest.period_id "
+        f"WHERE latest.employee_id = line.employee_id AND latest_period.user_id = %s AND latest_period.annee = %s "
+        f"AND latest_period.statut = %s ORDER BY latest_period.mois DESC LIMIT 1)"
+    )
+    sql = (
+        f"INSERT INTO {quote(AnnualSummary._meta.db_table)} (user_id, annee, employee_id, nom_complet, mois, {columns}) "
+        f"SELECT %s, %s, line.employee_id, {latest_name}, COUNT(*), {sums} "
+        f"FROM {quote(PayrollLine._meta.db_table)} line "
+        f"INNER JOIN {quote(PayrollPeriod._meta.db_table)} payroll_period ON payroll_period.id = line.period_id "
+        f"WHERE payroll_period.user_id = %s AND payroll_period.annee = %s AND payroll_period.statut = %s "
+        f"GROUP BY line.employee_id"
+    )
+    closed = PayrollPeriod.STATUT_CLOTUREE
+    with transaction.atomic():
+        AnnualSummary.objects.filter(user=user, annee=annee).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user.pk, annee, user.pk, annee, closed, user.pk, annee, closed])
+            return cursor.rowcount
+
+
+def annual_totals(user, annee):
+    """Totaux de l'entreprise pour l'année (une ligne lue par employé)"""
+    totals = AnnualSummary.objects.filter(user=user, annee=annee).aggregate(
+        employes=Count('id'),
+        **{name: Sum(name) for name in ANNUAL_FIELDS},
+    )
+    for name in ANNUAL_FIELDS:
+        totals[name] = to_stored_decimal(totals[name])
+    return totals
+
+
+def stream_annual_csv(queryset, chunk_size=ANNUAL_CHUNK_SIZE, batch_size=STREAM_BATCH_SIZE):
+    """Génère l'export CSV des cumuls annuels par blocs de lignes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in ANNUAL_EXPORT_COLUMNS])
+    keys = [key for key, _ in ANNUAL_EXPORT_COLUMNS]
+    rows = queryset.order_by('employee_id').values_list(*keys).iterator(chunk_size=chunk_size)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,408 @@
+"""
+Vues asynchrones (API JSON) destinées à un déploiement ASGI.
+
+Les accès à la base passent par l'ORM asynchrone de Django et le solveur,
+purement CPU, est exécuté dans un pool de threads borné afin de ne jamais
+bloquer la boucle d'événements.
+"""
+import asyncio
+import json
+import math
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+import numpy as np
+
+from . import audit
+from .engine import sweep
+from .engine.allocation import allocate_budget
+from .engine.vectorized import EXEMPT_PRIMES_COEFFICIENTS, exempt_primes_rate
+from .db_routers import use_replica
+from .forms import EmployeeEditForm, NetToGrossForm
+from .history import workforce_as_of, workforce_totals_as_of
+from .models import Employee, PayrollPeriod
+from .search import search_employees
+from .services import calculate_payroll, get_selected_exempt_primes, update_employee
+from .snapshots import AMOUNT_COLUMNS, GROUP_COLUMNS, load_snapshot
+
+# Pool borné partagé par toutes les requêtes du worker ASGI
+solver_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PAYROLL_SOLVER_WORKERS', 4),
+    thread_name_prefix='payroll-solver',
+)
+
+EMPLOYEE_LIST_FIELDS = (
+    'id', 'nom_complet', 'salaire_net', 'salaire_brut',
+    'total_cnss_patronal', 'salaire_net_a_payer', 'date_creation',
+)
+EMPLOYEE_LIST_MAX_LIMIT = 100
+SALARY_HISTORY_FIELDS = (
+    'employee_id', 'employee__nom_complet', 'effective_from', 'salaire_net', 'salaire_base', 'salaire_brut',
+    'cnss_employe', 'rts', 'total_cnss_patronal', 'salaire_net_a_payer',
+)
+
+
+async def run_in_solver(func, *args, **kwargs):
+    """Exécute une fonction de calcul dans le pool borné du solveur"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(solver_executor, partial(func, *args, **kwargs))
+
+
+def _parse_primes(value):
+    """Configuration de primes exonérées transmise sous la forme 'retraite,interim'"""
+    primes = [prime.strip() for prime in value.split(',') if prime.strip()]
+    unknown = set(primes) - set(EXEMPT_PRIMES_COEFFICIENTS)
+    if unknown:
+        raise ValueError(f"Primes exonérées inconnues : {', '.join(sorted(unknown))}")
+    return primes
+
+
+def _parse_int(value, default, minimum=0, maximum=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    value = max(minimum, value)
+    if maximum is not None:
+        value = min(maximum, value)
+    return value
+
+
+def _parse_finite(value, label):
+    """Nombre fini (ValueError pour nan et inf)"""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{label} doit être un nombre fini")
+    return value
+
+
+@require_POST
+@login_required
+async def calculate_api_view(request):
+    """Calcule la paie à partir d'un salaire net sans enregistrer l'employé"""
+    form = NetToGrossForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+    payroll = await run_in_solver(
+        calculate_payroll,
+        form.cleaned_data['net_salary'],
+        get_selected_exempt_primes(form.cleaned_data),
+        form.cleaned_data.get('avantage_nature', 0) or 0,
+    )
+    await audit.arecord(audit.CALCUL, await request.auser(), details={
+        'salaire_net': form.cleaned_data['net_salary'],
+        'primes_selectionnees': get_selected_exempt_primes(form.cleaned_data),
+        'avantage_nature': form.cleaned_data.get('avantage_nature', 0) or 0,
+    })
+    # Le détail RTS n'est construit que s'il est demandé (?details=1)
+    result = dict(payroll['result'])
+    rts_details = result.pop('rts_details')
+    if request.GET.get('details'):
+        result['rts_details'] = list(rts_details)
+
+    return JsonResponse({
+        'result': result,
+        'primes_auto': payroll['primes_auto'],
+        'exempt_primes_amounts': payroll['exempt_primes_amounts'],
+        'salaire_net_a_payer': form.cleaned_data.get('salaire_net_a_payer', 0),
+    })
+
+
+@require_GET
+@login_required
+async def employee_list_api_view(request):
+    """Liste paginée des employés de l'utilisateur connecté (?q= : recherche sur le nom)"""
+    user = await request.auser()
+    offset = _parse_int(request.GET.get('offset'), 0)
+    limit = _parse_int(request.GET.get('limit'), 10, minimum=1, maximum=EMPLOYEE_LIST_MAX_LIMIT)
+
+    employees = Employee.objects.filter(user=user)
+    if request.GET.get('q'):
+        # Peut interroger le catalogue de la base (présence de l'index) : exécuté en mode synchrone
+        employees = await sync_to_async(search_employees)(employees, request.GET['q'])
+    total = await employees.acount()
+    rows = [
+        row async for row in employees.values(*EMPLOYEE_LIST_FIELDS)[offset:offset + limit].aiterator()
+    ]
+    for row in rows:
+        row['total_cout_employeur'] = row['salaire_brut'] + row.pop('total_cnss_patronal')
+
+    return JsonResponse({
+        'q': request.GET.get('q', ''),
+        'count': total,
+        'offset': offset,
+        'limit': limit,
+        'results': rows,
+    })
+
+
+@require_http_methods(["PATCH", "POST"])
+@login_required
+async def employee_update_api_view(request, employee_id):
+    """
+    Modification partielle d'un employé (JSON, ex. {"avance_salaire": 50000} ou
+    {"primes": ["retraite"], "effective_from": "2026-03-01"}) : seules les colonnes
+    qui en dépendent sont recalculées.
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+        if not isinstance(payload, dict):
+            raise ValueError("Le corps de la requête doit être un objet JSON")
+        unknown = set(payload) - set(EmployeeEditForm.base_fields)
+        if unknown:
+            raise ValueError(f"Champs non modifiables : {', '.join(sorted(unknown))}")
+    except ValueError as error:
+        return JsonResponse({'errors': {'__all__': [str(error)]}}, status=400)
+
+    form = EmployeeEditForm(payload, partial=True)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+    user = await request.auser()
+    try:
+        # Transaction et verrou de ligne : exécutés en mode synchrone
+        employee, changed = await sync_to_async(update_employee)(
+            user, employee_id, form.get_changes(), form.cleaned_data.get('effective_from'),
+        )
+    except Employee.DoesNotExist:
+        return JsonResponse({'errors': {'__all__': ["Employé introuvable"]}}, status=404)
+    except ValueError as error:
+        return JsonResponse({'errors': {'__all__': [str(error)]}}, status=400)
+
+    data = {name: getattr(employee, name) for name in EMPLOYEE_LIST_FIELDS}
+    data['total_cout_employeur'] = employee.get_total_cout_employeur()
+    return JsonResponse({'changed': changed, 'employee': data})
+
+
+@require_GET
+@login_required
+@use_replica
+async def salary_history_api_view(request):
+    """
+    Rémunérations en vigueur à une date (?date=AAAA-MM-JJ, aujourd'hui par défaut) :
+    totaux et lignes paginées de tous les employés, ou d'un seul avec ?employee=<id>.
+    """
+    try:
+        as_of = date.fromisoformat(request.GET['date']) if request.GET.get('date') else timezone.localdate()
+    except ValueError:
+        return JsonResponse({'errors': {'date': ["Date invalide (format attendu : AAAA-MM-JJ)"]}}, status=400)
+    offset = _parse_int(request.GET.get('offset'), 0)
+    limit = _parse_int(request.GET.get('limit'), 10, minimum=1, maximum=EMPLOYEE_LIST_MAX_LIMIT)
+
+    employees = Employee.objects.filter(user=await request.auser())
+    if request.GET.get('employee'):
+        employees = employees.filter(pk=_parse_int(request.GET['employee'], 0))
+    history = workforce_as_of(as_of, employees)
+    totals = await sync_to_async(workforce_totals_as_of)(as_of, employees)
+    rows = [
+        row async for row in history.order_by('employee_id').values(*SALARY_HISTORY_FIELDS)[offset:offset + limit].aiterator()
+    ]
+    for row in rows:
+        row['nom_complet'] = row.pop('employee__nom_complet')
+        row['total_cout_employeur'] = row['salaire_brut'] + row['total_cnss_patronal']
+
+    return JsonResponse({
+        'date': as_of,
+        'totals': totals,
+        'offset': offset,
+        'limit': limit,
+        'results': rows,
+    })
+
+
+@require_GET
+@login_required
+@use_replica
+async def snapshot_stats_api_view(request, period_id):
+    """
+    Statistiques d'une paie clôturée lues dans son instantané en colonnes (sans requête
+    sur les lignes de paie) : ?column=<montant> (salaire_net par défaut), ?bins=<classes>,
+    ?group_by=tranche_rts|primes et ?totals=<colonne>,<colonne> pour les totaux par groupe.
+    """
+    try:
+        period = await PayrollPeriod.objects.aget(pk=period_id, user=await request.auser())
+    except PayrollPeriod.DoesNotExist:
+        return JsonResponse({'errors': {'period': ["Période introuvable"]}}, status=404)
+    snapshot = await sync_to_async(load_snapshot)(period)
+    if snapshot is None:
+        return JsonResponse({'errors': {'period': ["Aucun instantané pour cette période"]}}, status=404)
+
+    column = request.GET.get('column', 'salaire_net')
+    group_by = request.GET.get('group_by', 'tranche_rts')
+    totals = [name for name in request.GET.get('totals', 'cout_employeur').split(',') if name]
+    errors = {}
+    if column not in AMOUNT_COLUMNS:
+        errors['column'] = [f"Colonne inconnue (choix : {', '.join(AMOUNT_COLUMNS)})"]
+    if group_by not in GROUP_COLUMNS:
+        errors['group_by'] = [f"Regroupement inconnu (choix : {', '.join(GROUP_COLUMNS)})"]
+    if set(totals) - set(AMOUNT_COLUMNS):
+        errors['totals'] = [f"Colonne inconnue (choix : {', '.join(AMOUNT_COLUMNS)})"]
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    return JsonResponse({
+        'period': str(period),
+        'employes': len(snapshot),
+        'column': column,
+        'histogram': snapshot.histogram(column, bins=_parse_int(request.GET.get('bins'), 20, minimum=1, maximum=200)),
+        'percentiles': snapshot.percentiles(column),
+        'groups': snapshot.group_totals(group_by, totals),
+    })
+
+
+@require_GET
+@login_required
+@use_replica
+async def export_status_api_view(request):
+    """Indique ce que contiendrait l'export Excel de l'utilisateur connecté"""
+    user = await request.auser()
+    status = await Employee.objects.filter(user=user).aaggregate(
+        count=Count('id'),
+        last_created=Max('date_creation'),
+    )
+    status['version'] = user.employees_version
+    status['last_modified'] = user.employees_modified_at
+    return JsonResponse(status)
+
+
+def _run_sweep(start, stop, step, configurations, avantage_nature):
+    nets = sweep.sweep_nets(start, stop, step)
+    return {
+        'net': sweep.compact({'net': nets})['net'],
+        'series': [
+            dict(primes=primes, **sweep.compact(sweep.salary_sweep(nets, primes, avantage_nature)))
+            for primes in configurations
+        ],
+    }
+
+
+@require_GET
+@login_required
+async def simulation_api_view(request):
+    """
+    Courbes de coût employeur, RTS, CNSS et taux effectif sur une plage de nets.
+    Paramètres : start, stop, step, avantage_nature et primes (répétable, une
+    configuration par valeur, ex. primes=&primes=retraite,interim).
+    """
+    try:
+        start = float(request.GET.get('start', sweep.SWEEP_START))
+        stop = float(request.GET.get('stop', sweep.SWEEP_STOP))
+        step = float(request.GET.get('step', sweep.SWEEP_STEP))
+        avantage_nature = float(request.GET.get('avantage_nature', 0))
+        if not math.isfinite(avantage_nature):
+            raise ValueError("L'avantage en nature doit être un nombre fini")
+        configurations = [_parse_primes(value) for value in request.GET.getlist('primes')] or [[]]
+        data = await run_in_solver(_run_sweep, start, stop, step, configurations, avantage_nature)
+    except ValueError as error:
+        return JsonResponse({'errors': {'__all__': [str(error)]}}, status=400)
+    return JsonResponse(data)
+
+
+ALLOCATION_MAX_EMPLOYEES = 10000
+ALLOCATION_EMPLOYEE_FIELDS = ('id', 'nom_complet', 'salaire_net', 'primes_exonerees', 'avantage_nature')
+
+
+async def _allocation_entries(user, payload):
+    """
+    Employés à rémunérer : entrées du corps de la requête ({'id'} d'un employé enregistré
+    ou {'nom_complet', 'primes', 'avantage_nature'}) avec leur 'weight'. Sans liste, tous les
+    employés de l'utilisateur, pondérés par leur net actuel.
+    """
+    employees = Employee.objects.filter(user=user)
+    if 'employees' in payload:
+        employees = employees.filter(id__in=[item['id'] for item in payload['employees'] if 'id' in item])
+    stored = {row['id']: row async for row in employees.values(*ALLOCATION_EMPLOYEE_FIELDS).aiterator()}
+
+    def from_stored(row, weight):
+        net = float(row['salaire_net'])
+        return {
+            'id': row['id'],
+            'nom_complet': row['nom_complet'],
+            'weight': net if weight is None else _parse_finite(weight, "Le poids"),
+            'exempt_rate': float(row['primes_exonerees']) / net if net else 0.0,
+            'avantage_nature': float(row['avantage_nature']),
+        }
+
+    if 'employees' not in payload:
+        return [from_stored(row, None) for row in stored.values()]
+
+    entries = []
+    for item in payload['employees']:
+        if 'id' in item:
+            if item['id'] not in stored:
+                raise ValueError(f"Employé introuvable : {item['id']}")
+            entries.append(from_stored(stored[item['id']], item.get('weight')))
+        else:
+            entries.append({
+                'id': None,
+                'nom_complet': item.get('nom_complet', ''),
+                'weight': _parse_finite(item['weight'], "Le poids"),
+                'exempt_rate': exempt_primes_rate(_parse_primes(','.join(item.get('primes', [])))),
+                'avantage_nature': _parse_finite(item.get('avantage_nature') or 0, "L'avantage en nature"),
+            })
+    return entries
+
+
+def _run_allocation(entries, budget):
+    started = time.perf_counter()
+    allocation = allocate_budget(
+        [entry['weight'] for entry in entries],
+        budget,
+        exempt_rate=np.array([entry['exempt_rate'] for entry in entries]),
+        avantage_nature=np.array([entry['avantage_nature'] for entry in entries]),
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    columns = allocation.columns
+    return {
+        'budget': allocation.budget,
+        'total_cout_employeur': round(allocation.total_cost, 2),
+        'ecart': round(allocation.ecart, 2),
+        'echelle': allocation.scale,
+        'evaluations': allocation.evaluations,
+        'duree_ms': round(elapsed_ms, 2),
+        'employees': [
+            {
+                'id': entry['id'],
+                'nom_complet': entry['nom_complet'],
+                'weight': entry['weight'],
+                'salaire_net': round(float(columns['net'][i]), 2),
+                'salaire_base': round(float(columns['basic'][i]), 2),
+                'salaire_brut': round(float(columns['gross'][i]), 2),
+                'total_cout_employeur': round(float(columns['total_cout_employeur'][i]), 2),
+            }
+            for i, entry in enumerate(entries)
+        ],
+    }
+
+
+@require_POST
+@login_required
+async def allocation_api_view(request):
+    """
+    Répartit une enveloppe de coût employeur (JSON : {"budget": ..., "employees": [...]})
+    entre les employés au prorata de leur poids. Rien n'est enregistré.
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+        budget = _parse_finite(payload['budget'], "Le budget")
+        entries = await _allocation_entries(await request.auser(), payload)
+        if not entries:
+            raise ValueError("Aucun employé à rémunérer")
+        if len(entries) > ALLOCATION_MAX_EMPLOYEES:
+            raise ValueError(f"Trop d'employés : {len(entries)} (maximum {ALLOCATION_MAX_EMPLOYEES})")
+        data = await run_in_solver(_run_allocation, entries, budget)
+    except KeyError as error:
+        return JsonResponse({'errors': {'__all__': [f"Champ obligatoire manquant : {error}"]}}, status=400)
+    except (ValueError, TypeError) as error:
+        return JsonResponse({'errors': {'__all__': [str(error)]}}, status=400)
+    return JsonResponse(data)
@@ -0,0 +1,147 @@
+"""
+Journal d'audit : qui a calculé, créé, modifié, exporté ou supprimé quels employés.
+
+Les événements ne sont pas insérés un par un pendant la requête : record() les
+ajoute à une file en mémoire du processus, vidée par lots (bulk_create) quand
+elle atteint settings.PAYROLL_AUDIT_BATCH_SIZE événements, à la fin d'une
+requête si le dernier envoi date de plus de PAYROLL_AUDIT_FLUSH_INTERVAL
+secondes, et à l'arrêt du processus. Un événement enregistré dans une
+transaction n'entre dans la file qu'à sa validation : une modification annulée
+ne laisse pas de trace.
+
+Les événements encore en file sont perdus si le processus est tué brutalement
+(au plus un lot ou quelques secondes d'activité).
+"""
+import atexit
+import logging
+import threading
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, transaction
+from django.utils import timezone
+
+from .engine import RULES_VERSION
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+CALCUL = AuditEvent.ACTION_CALCUL
+CREATION = AuditEvent.ACTION_CREATION
+MODIFICATION = AuditEvent.ACTION_MODIFICATION
+EXPORT = AuditEvent.ACTION_EXPORT
+SUPPRESSION = AuditEvent.ACTION_SUPPRESSION
+
+_buffer = []
+_lock = threading.Lock()
+_state = {'flushed_at': time.monotonic()}
+
+
+def audit_batch_size():
+    return getattr(settings, 'PAYROLL_AUDIT_BATCH_SIZE', 500)
+
+
+def audit_flush_interval():
+    return getattr(settings, 'PAYROLL_AUDIT_FLUSH_INTERVAL', 10)
+
+
+def _pk(value):
+    return getattr(value, 'pk', value)
+
+
+def field_values(instance, names):
+    """Valeurs des champs à consigner dans details (l'empreinte interne est omise)"""
+    return {name: getattr(instance, name) for name in names if name != 'input_fingerprint'}
+
+
+def _enqueue(events):
+    with _lock:
+        _buffer.extend(events)
+        full = len(_buffer) >= audit_batch_size()
+    if full:
+        flush()
+
+
+def record(action, user=None, employee=None, details=None, rules_version=RULES_VERSION):
+    """
+    Ajoute un événement au journal (écrit au prochain envoi). user et employee :
+    instance ou identifiant. details : données JSON (données saisies, champs modifiés...).
+    """
+    record_many(action, user, [employee], details=details, rules_version=rules_version)
+
+
+def record_many(action, user, employees, details=None, rules_version=RULES_VERSION):
+    """
+    Un événement par employé (instances ou identifiants). details : données communes
+    à tous, ou fonction employé -> données propres à chacun.
+    """
+    now = timezone.now()
+    user_id = _pk(user)
+    events = [
+        AuditEvent(
+            date=now, action=action, user_id=user_id, employee_id=_pk(employee), rules_version=rules_version,
+            details=(details(employee) if callable(details) else details) or {},
+        )
+        for employee in employees
+    ]
+    if events:
+        transaction.on_commit(partial(_enqueue, events))
+
+
+async def arecord(action, user=None, employee=None, details=None, rules_version=RULES_VERSION):
+    """Version asynchrone de record (l'envoi éventuel du lot accède à la base)"""
+    await sync_to_async(record)(action, user, employee, details, rules_version)
+
+
+def flush():
+    """Écrit les événements en file (bulk_create par lots) ; renvoie leur nombre"""
+    with _lock:
+        events = _buffer[:]
+        _buffer.clear()
+        _state['flushed_at'] = time.monotonic()
+    if not events:
+        return 0
+    try:
+        AuditEvent.objects.using(DEFAULT_DB_ALIAS).bulk_create(events, batch_size=audit_batch_size())
+    except DatabaseError:
+        logger.exception("Écriture du journal d'audit impossible : %d événement(s) perdu(s)", len(events))
+        return 0
+    return len(events)
+
+
+def flush_if_due(**kwargs):
+    """Vide la file si le dernier envoi date de plus de PAYROLL_AUDIT_FLUSH_INTERVAL secondes"""
+    if _buffer and time.monotonic() - _state['flushed_at'] >= audit_flush_interval():
+        flush()
+
+
+def pending():
+    """Nombre d'événements en attente d'écriture"""
+    return len(_buffer)
+
+
+def events(user=None, employee=None, start=None, end=None, action=None):
+    """
+    Événements filtrés par utilisateur, employé, période [start, end[ et action,
+    les plus récents d'abord (index (user, date), (employee, date) et (date)).
+    """
+    queryset = AuditEvent.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user_id=_pk(user))
+    if employee is not None:
+        queryset = queryset.filter(employee_id=_pk(employee))
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lt=end)
+    if action is not None:
+        queryset = queryset.filter(action=action)
+    return queryset.order_by('-date')
+
+
+# Envoi après la réponse (fin de requête) et à l'arrêt du processus
+request_finished.connect(flush_if_due, dispatch_uid='salary_audit_flush')
+atexit.register(flush)
@@ -0,0 +1,194 @@
+"""
+Fichier de virements groupés du salaire net à payer, à déposer sur le portail
+de la banque : CSV ou format fixe (enregistrements de longueur constante).
+
+La disposition des enregistrements (en-tête, détail, fin de fichier) est
+configurable par settings.BANK_TRANSFER_LAYOUT. Les virements sont lus en une
+seule requête parcourue en flux et le fichier est produit au fil de l'eau ;
+les totaux de contrôle (nombre de virements, montant total) sont calculés
+pendant le parcours et écrits dans l'enregistrement de fin.
+"""
+import csv
+import io
+import unicodedata
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Sum
+
+from .exports import EXPORT_CHUNK_SIZE, STREAM_BATCH_SIZE
+from .models import Company, Employee, PayrollLine
+
+
+class BankField(NamedTuple):
+    """Zone d'un enregistrement : clé de la valeur, en-tête CSV, largeur en format fixe"""
+    key: str
+    header: str
+    width: int
+    align: str = 'left'  # 'right' : valeur cadrée à droite (montants, compteurs)
+    fill: str = ' '
+    truncate: bool = False  # Tronquer au lieu de refuser une valeur trop longue (noms, libellés)
+
+
+DEFAULT_LAYOUT = {
+    'header': (
+        BankField('type', "Type", 1),
+        BankField('date_execution', "Date d'exécution", 8),
+        BankField('reference', "Référence", 16, truncate=True),
+        BankField('donneur_ordre', "Donneur d'ordre", 35, truncate=True),
+        BankField('compte_donneur_ordre', "Compte à débiter", 32),
+    ),
+    'detail': (
+        BankField('type', "Type", 1),
+        BankField('sequence', "N°", 6, align='right', fill='0'),
+        BankField('code_banque', "Code banque", 5),
+        BankField('code_guichet', "Code guichet", 5),
+        BankField('numero_compte', "Numéro de compte", 20),
+        BankField('cle_rib', "Clé RIB", 2),
+        BankField('beneficiaire', "Bénéficiaire", 35, truncate=True),
+        BankField('montant', "Montant (GNF)", 15, align='right', fill='0'),
+        BankField('libelle', "Libellé", 30, truncate=True),
+    ),
+    'trailer': (
+        BankField('type', "Type", 1),
+        BankField('nombre', "Nombre de virements", 6, align='right', fill='0'),
+        BankField('total', "Montant total (GNF)", 18, align='right', fill='0'),
+    ),
+    'csv_delimiter': ';',
+}
+
+FORMAT_CSV = 'csv'
+FORMAT_FIXED = 'fixed'
+TRANSFER_FORMATS = {
+    FORMAT_CSV: ('text/csv; charset=utf-8', 'csv'),
+    FORMAT_FIXED: ('text/plain; charset=ascii', 'txt'),
+}
+
+# Colonnes lues pour chaque virement : (clé, champ de l'employé)
+PAYMENT_FIELDS = (
+    ('employee_id', 'id'),
+    ('beneficiaire', 'nom_complet'),
+    ('code_banque', 'code_banque'),
+    ('code_guichet', 'code_guichet'),
+    ('numero_compte', 'numero_compte'),
+    ('cle_rib', 'cle_rib'),
+    ('montant', 'salaire_net_a_payer'),
+)
+
+
+def get_layout():
+    """Disposition configurée (settings.BANK_TRANSFER_LAYOUT, zones données en tuples ou dictionnaires)"""
+    layout = dict(DEFAULT_LAYOUT, **getattr(settings, 'BANK_TRANSFER_LAYOUT', {}))
+    for record in ('header', 'detail', 'trailer'):
+        layout[record] = tuple(
+            BankField(**field) if isinstance(field, dict) else BankField(*field) for field in layout[record]
+        )
+    return layout
+
+
+def payments_queryset(employees):
+    """Employés payés par virement : coordonnées bancaires renseignées et net à payer positif"""
+    return employees.filter(salaire_net_a_payer__gt=0).exclude(numero_compte='')
+
+
+def missing_accounts(employees):
+    """Employés à payer dont le numéro de compte n'est pas renseigné"""
+    return employees.filter(salaire_net_a_payer__gt=0, numero_compte='')
+
+
+def period_payments_queryset(period):
+    """
+    Virements d'une période de paie : net à payer figé, coordonnées bancaires actuelles.
+    Les lignes sans compte (voir period_missing_accounts) n'y figurent pas.
+    """
+    # Jointure interne : une ligne dont l'employé a été supprimé depuis n'a pas de compte
+    return period.lines.filter(salaire_net_a_payer__gt=0, employee__numero_compte__gt='')
+
+
+def period_missing_accounts(period):
+    """
+    Lignes à payer d'une période exclues de period_payments_queryset : employé supprimé
+    depuis la préparation de la paie ou numéro de compte non renseigné
+    """
+    # Sous-requête et non jointure : la clé étrangère sans contrainte peut désigner un employé disparu
+    with_account = Employee.objects.filter(pk=OuterRef('employee_id'), numero_compte__gt='')
+    return period.lines.filter(salaire_net_a_payer__gt=0).exclude(Exists(with_account))
+
+
+def transfer_totals(queryset):
+    """Nombre de virements et montant total, calculés en base (aperçu avant génération)"""
+    return queryset.aggregate(nombre=Count('id'), total=Sum('salaire_net_a_payer'))
+
+
+def _ascii(value):
+    return unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii').upper()
+
+
+def _fixed(record, values):
+    parts = []
+    for field in record:
+        value = _ascii(str(values.get(field.key, '')))
+        if len(value) > field.width:
+            if not field.truncate:
+                raise ValueError(f"Valeur trop longue pour '{field.key}' ({field.width} caractères) : {value}")
+            value = value[:field.width]
+        parts.append(value.rjust(field.width, field.fill) if field.align == 'right' else value.ljust(field.width, field.fill))
+    return ''.join(parts) + '\r\n'
+
+
+def _iter_payments(queryset, chunk_size):
+    names = [name for _, name in PAYMENT_FIELDS]
+    if queryset.model is PayrollLine:
+        # Lignes de paie : nom et montant figés, coordonnées bancaires lues sur l'employé (jointure)
+        names = ['employee_id'] + [
+            name if name in ('nom_complet', 'salaire_net_a_payer') else f"employee__{name}" for name in names[1:]
+        ]
+    keys = [key for key, _ in PAYMENT_FIELDS]
+    for values in queryset.order_by(names[0]).values_list(*names).iterator(chunk_size=chunk_size):
+        yield dict(zip(keys, values))
+
+
+def stream_transfer_file(queryset, transfer_format=FORMAT_CSV, date_execution=None, reference='', libelle='',
+                         donneur_ordre=None, compte_donneur_ordre=None,
+                         chunk_size=EXPORT_CHUNK_SIZE, batch_size=STREAM_BATCH_SIZE):
+    """
+    Génère le fichier de virements par blocs. queryset : payments_queryset(...) ou
+    period_payments_queryset(period). Les montants sont arrondis au franc.
+    Le donneur d'ordre est par défaut l'entreprise, débitée sur settings.BANK_TRANSFER_DEBIT_ACCOUNT.
+    ValueError (en cours de génération) si une valeur ne tient pas dans sa zone.
+    """
+    layout = get_layout()
+    if donneur_ordre is None:
+        donneur_ordre = Company.get_company().name
+    if compte_donneur_ordre is None:
+        compte_donneur_ordre = getattr(settings, 'BANK_TRANSFER_DEBIT_ACCOUNT', '')
+    buffer = io.StringIO()
+    header = {
+        'type': 'H',
+        'date_execution': date_execution.strftime('%Y%m%d') if date_execution else '',
+        'reference': reference,
+        'donneur_ordre': donneur_ordre,
+        'compte_donneur_ordre': compte_donneur_ordre,
+    }
+    if transfer_format == FORMAT_FIXED:
+        write = lambda record, values: buffer.write(_fixed(layout[record], values))
+        write('header', header)
+    else:
+        writer = csv.writer(buffer, delimiter=layout['csv_delimiter'])
+        write = lambda record, values: writer.writerow([values.get(field.key, '') for field in layout[record]])
+        writer.writerow([field.header for field in layout['detail']])
+
+    count = 0
+    total = 0
+    for payment in _iter_payments(queryset, chunk_size):
+        count += 1
+        amount = int(round(payment['montant']))
+        total += amount
+        write('detail', dict(payment, type='D', sequence=count, montant=amount, libelle=libelle))
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    write('trailer', {'type': 'T', 'nombre': count, 'total': total})
+    yield buffer.getvalue()
@@ -0,0 +1,112 @@
+"""
+Déclaration mensuelle des cotisations CNSS : une ligne par employé (salaire
+brut, cotisations employé et employeur) et les totaux de l'entreprise.
+
+Les totaux et les effectifs au plancher / au plafond sont calculés par la base
+(Sum, Count filtrés) ; les lignes sont lues en une requête parcourue en flux et
+le fichier est produit au fil de l'eau. La source est une période de paie
+(montants figés du mois déclaré) ou, à défaut, les montants actuels des employés.
+"""
+import csv
+import io
+
+from django.db.models import Case, CharField, Count, F, Q, Sum, Value, When
+
+from .engine import calculate_cnss_employee, calculate_cnss_employer
+from .exports import EXPORT_CHUNK_SIZE, STREAM_BATCH_SIZE
+from .models import PayrollLine
+from .services import to_stored_decimal
+
+# Plancher et plafond des cotisations, tels qu'appliqués par le moteur de calcul
+CNSS_EMPLOYEE_LIMITS = (calculate_cnss_employee(0), calculate_cnss_employee(float('inf')))
+CNSS_EMPLOYER_LIMITS = (calculate_cnss_employer(0), calculate_cnss_employer(float('inf')))
+
+LIMIT_FLOOR = 'plancher'
+LIMIT_CEILING = 'plafond'
+
+# Colonnes du fichier : (clé, en-tête)
+DECLARATION_COLUMNS = (
+    ('employee_id', "ID"),
+    ('nom_complet', "Nom Complet"),
+    ('salaire_brut', "Salaire Brut"),
+    ('cnss_employe', "CNSS Employé"),
+    ('cnss_employeur', "CNSS Employeur"),
+    ('total_cnss', "Total Cotisations"),
+    ('limite_employe', "Limite CNSS Employé"),
+    ('limite_employeur', "Limite CNSS Employeur"),
+)
+
+# Montants totalisés par declaration_totals
+DECLARATION_TOTAL_FIELDS = ('salaire_brut', 'cnss_employe', 'cnss_employeur', 'total_cnss')
+
+
+def _limit(field, limits):
+    floor, ceiling = limits
+    return Case(
+        When(**{f"{field}__lte": floor}, then=Value(LIMIT_FLOOR)),
+        When(**{f"{field}__gte": ceiling}, then=Value(LIMIT_CEILING)),
+        default=Value(''),
+        output_field=CharField(),
+    )
+
+
+def _id_field(queryset):
+    return 'employee_id' if queryset.model is PayrollLine else 'id'
+
+
+def declaration_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Lignes de la déclaration (tuples dans l'ordre de DECLARATION_COLUMNS), triées par
+    employé. queryset : lignes d'une période (period.lines) ou employés. Les limites
+    (plancher / plafond atteint) sont calculées par la base.
+    """
+    id_field = _id_field(queryset)
+    rows = queryset.annotate(
+        limite_employe=_limit('cnss_employe', CNSS_EMPLOYEE_LIMITS),
+        limite_employeur=_limit('cnss_employeur', CNSS_EMPLOYER_LIMITS),
+    ).order_by(id_field).values_list(
+        id_field, 'nom_complet', 'salaire_brut', 'cnss_employe', 'cnss_employeur', 'limite_employe', 'limite_employeur',
+    )
+    for employee_id, nom_complet, brut, employe, employeur, *limits in rows.iterator(chunk_size=chunk_size):
+        # Total additionné sur les Decimal lus (SQLite ne renvoie pas une addition arrondie au centime)
+        yield (employee_id, nom_complet, brut, employe, employeur, employe + employeur, *limits)
+
+
+def declaration_totals(queryset):
+    """Totaux de la déclaration et effectifs au plancher / au plafond, calculés en base"""
+    employee_floor, employee_ceiling = CNSS_EMPLOYEE_LIMITS
+    employer_floor, employer_ceiling = CNSS_EMPLOYER_LIMITS
+    # Les expressions qui lisent les colonnes viennent avant les agrégats du même nom
+    totals = queryset.aggregate(
+        total_cnss=Sum(F('cnss_employe') + F('cnss_employeur')),
+        employes_plancher=Count('pk', filter=Q(cnss_employe__lte=employee_floor) | Q(cnss_employeur__lte=employer_floor)),
+        employes_plafond=Count('pk', filter=Q(cnss_employe__gte=employee_ceiling) | Q(cnss_employeur__gte=employer_ceiling)),
+        employes=Count('pk'),
+        salaire_brut=Sum('salaire_brut'),
+        cnss_employe=Sum('cnss_employe'),
+        cnss_employeur=Sum('cnss_employeur'),
+    )
+    for name in DECLARATION_TOTAL_FIELDS:
+        totals[name] = to_stored_decimal(totals[name])
+    return totals
+
+
+def stream_declaration_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE, batch_size=STREAM_BATCH_SIZE):
+    """Génère la déclaration au format CSV par blocs : lignes par employé puis ligne de totaux"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in DECLARATION_COLUMNS])
+    for count, row in enumerate(declaration_rows(queryset, chunk_size=chunk_size), 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    totals = declaration_totals(queryset)
+    writer.writerow([
+        "TOTAL", f"{totals['employes']} employé(s)",
+        *[totals[name] for name in DECLARATION_TOTAL_FIELDS],
+        f"{totals['employes_plancher']} au plancher", f"{totals['employes_plafond']} au plafond",
+    ])
+    yield buffer.getvalue()
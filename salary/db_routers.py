@@ -0,0 +1,210 @@
+"""
+Routage des lectures de rapports vers une réplique en lecture seule.
+
+Les vues de rapports et d'exports (décorateur use_replica) lisent sur l'alias
+'replica' ; tout le reste, et toutes les écritures, restent sur 'default'.
+Les lectures reviennent sur 'default' quand :
+- l'alias 'replica' n'est pas configuré ou ne répond pas ;
+- son retard de réplication dépasse settings.PAYROLL_REPLICA_MAX_LAG secondes
+  (mesuré au plus toutes les PAYROLL_REPLICA_CHECK_INTERVAL secondes) ;
+- la session a écrit en base depuis moins que ce retard (lecture après
+  écriture : l'utilisateur doit voir ce qu'il vient d'enregistrer, voir
+  PrimaryAfterWriteMiddleware) ;
+- une transaction est ouverte sur 'default'.
+
+En local, la réplique peut être une copie du fichier SQLite (voir settings.py).
+"""
+import functools
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+
+# Clé de session : instant (time.time()) de la dernière écriture de la session
+LAST_WRITE_SESSION_KEY = '_payroll_last_write'
+
+# Écritures qui ne concernent pas les données lues par les rapports (pas de lecture sur 'default' ensuite)
+UNPINNED_MODELS = {'salary.AuditEvent'}
+
+# Vrai pendant l'exécution d'une vue qui accepte de lire sur la réplique
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+# Écritures de la requête en cours : liste partagée, renseignée par le routeur
+_request_writes = ContextVar('request_writes', default=None)
+
+# Dernière mesure de disponibilité de la réplique : (instant monotone, disponible)
+_replica_state = {'checked_at': None, 'available': False}
+
+
+def replica_max_lag():
+    return getattr(settings, 'PAYROLL_REPLICA_MAX_LAG', 30)
+
+
+def replica_lag(alias=REPLICA_ALIAS):
+    """
+    Retard de réplication en secondes. PostgreSQL : âge de la dernière transaction
+    rejouée (0 sur un serveur qui n'est pas en réplication). Autres bases : 0.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def replica_available():
+    """La réplique est configurée, répond et n'est pas en retard (mesure mise en cache)"""
+    if REPLICA_ALIAS not in settings.DATABASES:
+        return False
+    now = time.monotonic()
+    checked_at = _replica_state['checked_at']
+    if checked_at is None or now - checked_at >= getattr(settings, 'PAYROLL_REPLICA_CHECK_INTERVAL', 5):
+        try:
+            lag = replica_lag()
+            available = lag <= replica_max_lag()
+            if not available:
+                logger.warning("Réplique en retard de %.1f s : lectures sur la base principale", lag)
+        except DatabaseError:
+            logger.warning("Réplique injoignable : lectures sur la base principale", exc_info=True)
+            available = False
+        _replica_state.update(checked_at=now, available=available)
+    return _replica_state['available']
+
+
+class ReplicaRouter:
+    """Envoie les lectures des vues use_replica vers la réplique, tout le reste vers 'default'"""
+
+    def db_for_read(self, model, **hints):
+        if (
+            _reading_from_replica.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+            and replica_available()
+        ):
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None and model._meta.app_label == 'salary' and model._meta.label not in UNPINNED_MODELS:
+            writes.append(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données des deux côtés
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplique reçoit le schéma par réplication (ou copie du fichier SQLite)
+        return db != REPLICA_ALIAS
+
+
+class PrimaryAfterWriteMiddleware:
+    """
+    Note dans la session l'instant des écritures de l'application : les vues use_replica
+    de cette session lisent ensuite sur 'default' pendant PAYROLL_REPLICA_MAX_LAG secondes.
+    À placer après SessionMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        writes = []
+        token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        self._note_writes(request, writes)
+        return response
+
+    async def __acall__(self, request):
+        # Les écritures faites dans les threads de sync_to_async complètent la même liste
+        writes = []
+        token = _request_writes.set(writes)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        self._note_writes(request, writes)
+        return response
+
+    @staticmethod
+    def _note_writes(request, writes):
+        if writes and hasattr(request, 'session'):
+            request.session[LAST_WRITE_SESSION_KEY] = time.time()
+
+
+def _recently_written(last_write):
+    return last_write is not None and time.time() - last_write < replica_max_lag()
+
+
+def _replica_stream(chunks):
+    # Le contenu d'une réponse en flux est lu après le retour de la vue
+    iterator = iter(chunks)
+    while True:
+        token = _reading_from_replica.set(True)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _reading_from_replica.reset(token)
+        yield chunk
+
+
+def _wrap_response(response):
+    if isinstance(response, StreamingHttpResponse) and not response.is_async:
+        response.streaming_content = _replica_stream(response.streaming_content)
+    return response
+
+
+def use_replica(view):
+    """
+    Vue en lecture seule (rapport, export) : ses lectures, y compris celles d'une
+    réponse en flux, peuvent être servies par la réplique. Sans effet juste après
+    une écriture de la session (lecture après écriture).
+    """
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if _recently_written(await request.session.aget(LAST_WRITE_SESSION_KEY)):
+                return await view(request, *args, **kwargs)
+            token = _reading_from_replica.set(True)
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                _reading_from_replica.reset(token)
+            return _wrap_response(response)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if _recently_written(request.session.get(LAST_WRITE_SESSION_KEY)):
+                return view(request, *args, **kwargs)
+            token = _reading_from_replica.set(True)
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                _reading_from_replica.reset(token)
+            return _wrap_response(response)
+    return wrapper
@@ -0,0 +1,37 @@
+"""
+Moteur de calcul de la paie (CNSS, RTS, charges patronales, net ↔ brut).
+
+Ce paquet n'importe pas Django : il peut être utilisé depuis des scripts
+ou en ligne de commande (python -m salary.engine) sans configurer le projet.
+"""
+from .core import (
+    RTS_BRACKETS,
+    PayrollInput,
+    PayrollResult,
+    RtsBracketLine,
+    RtsDetails,
+    build_payroll_input,
+    evaluate,
+    results_to_columns,
+    solve_employer_cost,
+    solve_gross,
+    solve_net,
+    solve_net_a_payer,
+    solve_net_batch,
+    calculate_rts_brackets,
+    calculate_avantages_et_deductions_automatiques,
+    calculate_basic_from_net,
+    calculate_cnss_employee,
+    calculate_cnss_employer,
+    calculate_ecart_imposable,
+    calculate_exempt_primes_amounts,
+    calculate_net_from_basic,
+    calculate_payroll,
+    calculate_primes_automatiques,
+    calculate_rts,
+    calculate_rts_detailed,
+    calculate_rts_tranches,
+    calculate_taxe_apprentissage,
+    calculate_versement_forfaitaire,
+)
+from .rates import DEFAULT_RATES, EXEMPT_PRIMES, RULES_VERSION, RateSchedule
@@ -0,0 +1,50 @@
+"""
+Calcul de la paie en ligne de commande, sans démarrer Django.
+
+Exemples :
+    python -m salary.engine < employes.jsonl > paie.jsonl
+    python -m salary.engine --input-format csv --output-format jsonl < employes.csv
+    python -m salary.engine --direction gross-to-net < bases.jsonl
+    python -m salary.engine --direction cost-to-net < budgets.jsonl
+"""
+import argparse
+import sys
+
+from .pipeline import CALCULATIONS, READERS, WRITERS, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m salary.engine',
+        description="Calcule la paie (net ↔ brut) ligne par ligne depuis l'entrée standard.",
+    )
+    parser.add_argument('--input-format', '-i', choices=sorted(READERS), default='jsonl')
+    parser.add_argument('--output-format', '-o', choices=sorted(WRITERS),
+                        help="Format de sortie (par défaut : celui de l'entrée)")
+    parser.add_argument('--direction', '-d', choices=sorted(CALCULATIONS), default='net-to-gross')
+    parser.add_argument('--strict', action='store_true',
+                        help="Arrêter au premier enregistrement invalide au lieu de l'ignorer")
+    args = parser.parse_args(argv)
+
+    errors = 0
+
+    def report(line_number, error):
+        nonlocal errors
+        errors += 1
+        print(f"ligne {line_number} ignorée : {error}", file=sys.stderr)
+
+    try:
+        run(args.input_format, args.output_format, args.direction,
+            on_error=None if args.strict else report)
+    except BrokenPipeError:
+        # Sortie fermée par le consommateur (ex. | head) : arrêt silencieux
+        sys.stderr.close()
+        return 0
+    except ValueError as error:
+        print(f"erreur : {error}", file=sys.stderr)
+        return 2
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Répartition d'une enveloppe de coût employeur entre plusieurs employés.
+
+Chaque employé reçoit un net proportionnel à son poids : net = échelle × poids.
+Le coût total employeur est croissant en fonction de l'échelle ; une seule
+recherche de racine sur l'échelle suffit, chaque évaluation recalculant tous
+les employés d'un coup avec le moteur vectorisé.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from . import vectorized as V
+from .rates import DEFAULT_RATES
+
+
+class Allocation(NamedTuple):
+    """Résultat de la répartition : échelle retenue et colonnes du moteur vectorisé par employé"""
+    scale: float
+    budget: float
+    total_cost: float
+    columns: dict
+    evaluations: int
+
+    @property
+    def ecart(self):
+        """Part du budget non distribuée (≥ 0)"""
+        return self.budget - self.total_cost
+
+
+def payroll_for_nets(nets, exempt_rate=0.0, avantage_nature=0.0, rates=DEFAULT_RATES):
+    """Paie de chaque employé à partir de son net (mêmes règles que core.calculate_payroll)"""
+    nets = np.asarray(nets, dtype=float)
+    primes_auto = V.primes_automatiques(nets)
+    return V.solve_net(
+        nets,
+        rates=rates,
+        primes_taxables=sum(primes_auto.values()),
+        primes_exonerees=nets * exempt_rate,
+        avantage_nature=avantage_nature,
+    )
+
+
+def allocate_budget(weights, budget, exempt_rate=0.0, avantage_nature=0.0, rates=DEFAULT_RATES,
+                    tolerance=1.0, max_iter=100):
+    """
+    Trouve l'échelle telle que la somme des coûts employeur (brut + charges patronales)
+    des nets échelle × poids atteigne le budget.
+
+    exempt_rate (voir vectorized.exempt_primes_rate) et avantage_nature sont des scalaires
+    ou des tableaux alignés sur les poids. ValueError si le budget ou un poids n'est pas
+    un nombre fini (nan, inf). Le coût n'est pas continu (paliers des primes
+    automatiques) : si le budget tombe dans un saut, l'échelle retenue est la plus grande
+    qui ne le dépasse pas (à la tolérance près) et l'écart restant est indiqué par Allocation.ecart.
+    """
+    weights = np.asarray(weights, dtype=float)
+    budget = float(budget)
+    if not np.isfinite(budget):
+        raise ValueError(f"Budget invalide : {budget}")
+    if weights.size == 0 or not np.isfinite(weights).all() or (weights < 0).any() or not weights.any():
+        raise ValueError("Les poids doivent être des nombres finis positifs et au moins un poids non nul")
+
+    evaluations = 0
+
+    def total(scale):
+        nonlocal evaluations
+        evaluations += 1
+        columns = payroll_for_nets(scale * weights, exempt_rate, avantage_nature, rates)
+        return float(columns['total_cout_employeur'].sum()), columns
+
+    low, (f_low, columns_low) = 0.0, total(0.0)
+    if f_low > budget:
+        raise ValueError(
+            f"Budget ({budget:,.0f} GNF) inférieur au coût minimal des {weights.size} employés ({f_low:,.0f} GNF)"
+        )
+
+    # Premier encadrement : le coût est proche de 1,4 × le net total
+    high = max(budget / weights.sum(), 1.0)
+    f_high, columns_high = total(high)
+    while f_high < budget:
+        low, f_low, columns_low = high, f_high, columns_high
+        high *= 2
+        f_high, columns_high = total(high)
+
+    # Fausse position (variante Illinois) encadrée : le coût est linéaire par morceaux en l'échelle
+    side = 0
+    for _ in range(max_iter):
+        if f_high - budget <= tolerance:
+            low, f_low, columns_low = high, f_high, columns_high
+            break
+        if budget - f_low <= tolerance or high - low <= 1e-12 * high:
+            break
+        scale = (low * (f_high - budget) + high * (budget - f_low)) / (f_high - f_low)
+        if not low < scale < high:
+            scale = (low + high) / 2
+        f_scale, columns_scale = total(scale)
+        if f_scale <= budget:
+            low, f_low, columns_low = scale, f_scale, columns_scale
+            if side == -1:
+                f_high = budget + (f_high - budget) / 2
+            side = -1
+        else:
+            high, f_high, columns_high = scale, f_scale, columns_scale
+            if side == 1:
+                f_low = budget - (budget - f_low) / 2
+            side = 1
+
+    return Allocation(low, budget, float(columns_low['total_cout_employeur'].sum()), columns_low, evaluations)
@@ -0,0 +1,638 @@
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+# Règles de calcul : une seule définition, dans rates.py (RTS_BRACKETS ré-exporté pour les imports existants)
+from .rates import (
+    AVANTAGES_TIERS, DEFAULT_RATES, EXEMPT_PRIMES_COEFFICIENTS, EXEMPT_PRIMES_RATE, PRIMES_TIERS, RTS_BRACKETS,
+)
+
+
+# =============================
+# 0️⃣ STRUCTURES DE DONNÉES (entrées et résultats du moteur)
+# =============================
+
+class PayrollInput(NamedTuple):
+    """Éléments du salaire autres que le salaire de base (montants mensuels en GNF)"""
+    advantages: float = 0.0
+    ded: float = 0.0
+    primes_taxables: float = 0.0
+    primes_exonerees: float = 0.0
+    avantage_nature: float = 0.0
+    prime_responsabilite: float = 0.0
+
+    @classmethod
+    def from_values(cls, advantages=0, ded=0, primes_taxables=0, primes_exonerees=0, avantage_nature=0, prime_responsabilite=0):
+        """Construit l'entrée à partir de valeurs quelconques (Decimal, chaînes, None → 0)"""
+        return cls(
+            float(advantages) if advantages else 0.0,
+            float(ded) if ded else 0.0,
+            float(primes_taxables) if primes_taxables else 0.0,
+            float(primes_exonerees) if primes_exonerees else 0.0,
+            float(avantage_nature) if avantage_nature else 0.0,
+            float(prime_responsabilite) if prime_responsabilite else 0.0,
+        )
+
+
+class RtsBracketLine(NamedTuple):
+    """Part de la RTS due sur une tranche du barème"""
+    rate: float
+    lower: float
+    upper: Optional[float]  # None pour la dernière tranche
+    base: float  # Montant du salaire imposable compris dans la tranche
+    amount: float
+
+
+class PayrollResult(NamedTuple):
+    """Résultat complet (non arrondi) du calcul de la paie d'un employé"""
+    basic: float
+    gross: float
+    net: float
+    cnss_employee: float
+    cnss_employer: float
+    versement_forfaitaire: float
+    taxe_apprentissage: float
+    total_cnss_patronal: float
+    total_charges_employee: float
+    ecart_imposable: float
+    imposable: float
+    rts: float
+    primes_taxables: float  # Primes taxables effectives (incluant la prime de responsabilité)
+    primes_exonerees: float
+    avantage_nature: float
+    prime_responsabilite: float
+    advantages: float
+    deductions: float
+
+    @property
+    def total_cout_employeur(self):
+        return self.gross + self.total_cnss_patronal
+
+    @property
+    def rts_details(self):
+        """Détail textuel du calcul RTS, construit à la lecture"""
+        return RtsDetails(self.imposable)
+
+    @property
+    def rts_brackets(self):
+        return calculate_rts_brackets(self.imposable)
+
+    def to_dict(self):
+        """Dictionnaire arrondi utilisé par les templates et les vues"""
+        return {
+            "basic": round(self.basic, 2),
+            "gross": round(self.gross, 2),
+            "net": round(self.net, 2),
+            "cnss": round(self.cnss_employee, 2),
+            "rts": round(self.rts, 2),
+            "ecart_imposable": round(self.ecart_imposable, 2),
+            "advantages": round(self.advantages, 2),
+            "primes_taxables": round(self.primes_taxables, 2),
+            "primes_exonerees": round(self.primes_exonerees, 2),
+            "avantage_nature": round(self.avantage_nature, 2),
+            "prime_responsabilite": round(self.prime_responsabilite, 2),
+            "deductions": round(self.deductions, 2),
+            "cnss_employer": round(self.cnss_employer, 2),
+            "versement_forfaitaire": round(self.versement_forfaitaire, 2),
+            "taxe_apprentissage": round(self.taxe_apprentissage, 2),
+            "total_cnss_patronal": round(self.total_cnss_patronal, 2),
+            "total_charges_employee": round(self.total_charges_employee, 2),
+            "imposable": round(self.imposable, 2),
+            "rts_details": self.rts_details,
+        }
+
+
+def results_to_columns(results):
+    """
+    Convertit une liste de PayrollResult (tableau de structures) en dictionnaire
+    de listes par champ (structure de tableaux) pour les traitements en lot.
+    """
+    columns = list(zip(*results)) or [()] * len(PayrollResult._fields)
+    return {field: list(values) for field, values in zip(PayrollResult._fields, columns)}
+
+
+# =============================
+# 1️⃣ FONCTIONS DE BASE (CNSS + RTS)
+# =============================
+
+def calculate_exempt_primes_amounts(net_salary, selected_primes):
+    """
+    Calcule automatiquement les montants des primes exonérées
+    basé sur le salaire net et les primes sélectionnées.
+    
+    Args:
+        net_salary: Salaire net souhaité
+        selected_primes: Liste des primes sélectionnées ['retraite', 'interim', 'anciennete']
+    
+    Returns:
+        dict: Montants calculés pour chaque prime
+    """
+    amounts = {f"prime_{prime}": 0 for prime in EXEMPT_PRIMES_COEFFICIENTS}
+    
+    if not selected_primes:
+        return amounts
+    
+    # Convertir net_salary en Decimal si ce n'est pas déjà le cas
+    net_salary = Decimal(str(net_salary))
+    
+    # Montant de base : EXEMPT_PRIMES_RATE (5%) du salaire net, réparti entre les primes sélectionnées
+    base_amount = net_salary * Decimal(str(EXEMPT_PRIMES_RATE))
+    amount_per_prime = base_amount / Decimal(str(len(selected_primes)))
+    
+    # Coefficient propre à chaque type de prime (retraite plus élevée, intérim plus faible)
+    for prime in selected_primes:
+        if prime in EXEMPT_PRIMES_COEFFICIENTS:
+            coefficient = Decimal(str(EXEMPT_PRIMES_COEFFICIENTS[prime]))
+            amounts[f"prime_{prime}"] = float(amount_per_prime * coefficient)
+    
+    return amounts
+
+def _cnss(gross, cnss_rates):
+    rate, plancher, plafond = cnss_rates
+    montant = gross * rate
+
+    if montant < plancher:
+        return plancher
+    elif montant > plafond:
+        return plafond
+    return montant
+
+
+def calculate_cnss_employee(gross):
+    """
+    Calcule la CNSS employé :
+    - 5% du salaire brut
+    - Avec un minimum (plancher) et un maximum (plafond)
+    (taux, plancher et plafond : DEFAULT_RATES.cnss_employee)
+    """
+    return _cnss(gross, DEFAULT_RATES.cnss_employee)
+
+
+def calculate_cnss_employer(gross):
+    """
+    Calcule la CNSS employeur :
+    - 18% du salaire brut
+    - Avec un minimum (plancher) et un maximum (plafond)
+    (taux, plancher et plafond : DEFAULT_RATES.cnss_employer)
+    """
+    return _cnss(gross, DEFAULT_RATES.cnss_employer)
+
+
+def calculate_versement_forfaitaire(gross):
+    """
+    Calcule le versement forfaitaire :
+    - 6% du salaire brut (DEFAULT_RATES.versement_forfaitaire)
+    """
+    return gross * DEFAULT_RATES.versement_forfaitaire
+
+
+def calculate_taxe_apprentissage(gross):
+    """
+    Calcule la taxe d'apprentissage :
+    - 2% du salaire brut (DEFAULT_RATES.taxe_apprentissage)
+    """
+    return gross * DEFAULT_RATES.taxe_apprentissage
+
+
+def calculate_rts(imposable):
+    """
+    Calcule la RTS en fonction du revenu imposable.
+    Barème progressif (DEFAULT_RATES.rts_brackets) :
+    - 0% jusqu 1.000.000
+    - 5% entre 1.000.001 et 3.000.000
+    - 8% entre 3.000.001 et 5.000.000
+    - 10% entre 5.000.001 et 10.000.000
+    - 15% entre 10.000.001 et 20.000.000
+    - 20% au-delà de 20.000.000
+    """
+    rts = 0
+    for lower, upper, rate in DEFAULT_RATES.rts_brackets:
+        if imposable <= lower:
+            break
+        top = imposable if upper is None or imposable < upper else upper
+        rts += (top - lower) * rate
+    return rts
+
+
+def calculate_rts_tranches(imposable):
+    """
+    Retourne le montant de RTS de chacune des tranches du barème
+    (mêmes valeurs arrondies que le détail affiché par calculate_rts_detailed).
+    """
+    imposable = float(imposable)
+    amounts = []
+    for lower, upper, rate in DEFAULT_RATES.rts_brackets:
+        if imposable <= lower:
+            amounts.append(0)
+            continue
+        top = imposable if upper is None else min(imposable, upper)
+        amounts.append(round((top - lower) * rate))
+    return amounts
+
+
+def calculate_rts_brackets(imposable):
+    """Retourne les tranches du barème qui s'appliquent au salaire imposable (RtsBracketLine)"""
+    imposable = float(imposable)
+    lines = []
+    for lower, upper, rate in DEFAULT_RATES.rts_brackets:
+        if imposable <= lower:
+            break
+        top = imposable if upper is None else min(imposable, upper)
+        lines.append(RtsBracketLine(rate, lower, upper, top - lower, (top - lower) * rate))
+    return tuple(lines)
+
+
+def _percent(rate):
+    return f"{Decimal(str(rate)) * 100:.0f}%"
+
+
+def calculate_rts_detailed(imposable):
+    """
+    Calcule la RTS avec le détail du calcul étape par étape.
+    Affiche seulement les tranches qui s'appliquent au salaire imposable.
+    Retourne (total_rts, details)
+    """
+    details = []
+    total_rts = Decimal('0')
+    imposable = Decimal(str(imposable))
+    (_, seuil, taux_seuil), *tranches = DEFAULT_RATES.rts_brackets
+    
+    # Première tranche (0%) : toujours affichée
+    details.append(f"{_percent(taux_seuil)} jusqu'à {seuil:,.0f} GNF = 0 GNF")
+    
+    # Si le salaire ne dépasse pas la première tranche
+    if imposable <= seuil:
+        details.append(f"Votre salaire imposable : {imposable:,.0f} GNF")
+        details.append(f"RTS = 0 GNF (sous le seuil d'imposition)")
+        return 0, details
+    
+    # Tranches suivantes, jusqu'à celle qui contient le salaire imposable
+    for lower, upper, rate in tranches:
+        if imposable <= lower:
+            break
+        top = imposable if upper is None or imposable <= upper else Decimal(str(upper))
+        montant = (top - Decimal(str(lower))) * Decimal(str(rate))
+        total_rts += montant
+        details.append(f"{_percent(rate)} de {lower + 1:,.0f} à {top:,.0f} GNF = {montant:,.0f} GNF")
+    
+    # Ajouter le total
+    details.append(f"<strong>TOTAL RTS = {total_rts:,.0f} GNF</strong>")
+    
+    return total_rts, details
+
+
+class RtsDetails:
+    """
+    Détail du calcul RTS évalué paresseusement.
+    Les lignes (Decimal + chaînes formatées) ne sont construites qu'à la première lecture,
+    par exemple lorsque le template les affiche.
+    """
+    __slots__ = ('imposable', '_lines')
+
+    def __init__(self, imposable):
+        self.imposable = imposable
+        self._lines = None
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            _, self._lines = calculate_rts_detailed(self.imposable)
+        return self._lines
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, index):
+        return self.lines[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        state = 'évalué' if self._lines is not None else 'non évalué'
+        return f"<RtsDetails imposable={self.imposable:,.0f} ({state})>"
+
+
+# =============================
+# 2️⃣ ÉCART IMPOSABLE (Primes > 25%)
+# =============================
+
+def calculate_ecart_imposable(gross, primes_taxables):
+    """
+    Vérifie si les primes taxables dépassent 25% du salaire brut (DEFAULT_RATES.ecart_imposable).
+    Si oui, le surplus est ajouté au revenu imposable.
+    """
+    gross = float(gross)
+    primes_taxables = float(primes_taxables) if primes_taxables else 0.0
+
+    vingt_cinq_pourcent_brut = gross * DEFAULT_RATES.ecart_imposable
+    difference = primes_taxables - vingt_cinq_pourcent_brut
+
+    return max(0, difference)  # Si négatif, on prend 0
+
+
+# =============================
+# 3️⃣ CALCUL DU NET À PARTIR DU SALAIRE DE BASE
+# =============================
+
+def evaluate(basic, payroll_input=PayrollInput()):
+    """
+    Descend du BASIC vers le NET avec tous les calculs :
+    1. Calcule le salaire brut
+    2. Calcule toutes les charges (CNSS, RTS, etc.)
+    3. Calcule les charges patronales
+    Renvoie un PayrollResult (le détail RTS n'est construit qu'à la lecture)
+    """
+    advantages, ded, primes_taxables, primes_exonerees, avantage_nature, prime_responsabilite = payroll_input
+
+    # 1. Primes taxables effectives (incluant la prime de responsabilité)
+    primes_taxables_effectives = primes_taxables + prime_responsabilite
+
+    # 2. Calcul du brut (incluant avantage en nature)
+    gross = basic + advantages + primes_taxables_effectives + primes_exonerees + avantage_nature
+
+    # 3. Calcul CNSS employé
+    cnss_employee = calculate_cnss_employee(gross)
+
+    # 4. Calcul écart imposable sur le brut et les primes taxables effectives
+    ecart_imposable = calculate_ecart_imposable(gross, primes_taxables_effectives)
+
+    # 5. Nouvelle base imposable (SI):
+    imposable = basic + primes_exonerees + avantage_nature + ecart_imposable - cnss_employee
+
+    # 6. Calcul RTS
+    rts = calculate_rts(imposable)
+
+    # 7. Calcul Net (les primes exonérées et l'avantage en nature sont inclus dans le brut)
+    net = gross - cnss_employee - rts - ded
+
+    # 8. Calculs côté employeur
+    cnss_employer = calculate_cnss_employer(gross)
+    versement_forfaitaire = calculate_versement_forfaitaire(gross)
+    taxe_apprentissage = calculate_taxe_apprentissage(gross)
+    
+    # 9. Totaux
+    total_cnss_patronal = versement_forfaitaire + taxe_apprentissage + cnss_employer
+    total_charges_employee = cnss_employee + rts
+
+    return PayrollResult(
+        basic, gross, net,
+        cnss_employee, cnss_employer, versement_forfaitaire, taxe_apprentissage,
+        total_cnss_patronal, total_charges_employee,
+        ecart_imposable, imposable, rts,
+        primes_taxables_effectives, primes_exonerees, avantage_nature, prime_responsabilite,
+        advantages, ded,
+    )
+
+
+def calculate_net_from_basic(basic, advantages=0, ded=0, primes_taxables=0, primes_exonerees=0, avantage_nature=0, prime_responsabilite=0):
+    """
+    Version dictionnaire de evaluate(), conservée pour les appels existants.
+    Renvoie un dictionnaire complet avec tous les détails (non arrondis)
+    """
+    payroll_input = PayrollInput.from_values(advantages, ded, primes_taxables, primes_exonerees, avantage_nature, prime_responsabilite)
+    result = evaluate(float(basic), payroll_input)
+    return dict(result._asdict(), rts_details=result.rts_details)
+
+
+# =============================
+# 4️⃣ PRIMES ET AVANTAGES AUTOMATIQUES
+# =============================
+
+def calculate_primes_automatiques(net_salary):
+    """
+    Calcule les primes (logement, transport, etc.)
+    en pourcentage du salaire net, selon le palier du net (PRIMES_TIERS).
+    """
+    net_salary = float(net_salary)
+
+    for limit, cherte_vie, logement, transport, repas in PRIMES_TIERS:
+        if limit is None or net_salary <= limit:
+            break
+
+    return {
+        'prime_cherte_vie': round(net_salary * cherte_vie, 2),
+        'indemnite_logement': round(net_salary * logement, 2),
+        'indemnite_transport': round(net_salary * transport, 2),
+        'indemnite_repas': round(net_salary * repas, 2),
+    }
+
+
+def calculate_avantages_et_deductions_automatiques(net_salary):
+    """
+    Calcule les avantages généraux et les déductions
+    en pourcentage du salaire net, selon le palier du net (AVANTAGES_TIERS).
+    """
+    net_salary = float(net_salary)
+
+    for limit, advantages, ded in AVANTAGES_TIERS:
+        if limit is None or net_salary <= limit:
+            break
+
+    return {
+        'advantages': round(net_salary * advantages, 2),
+        'ded': round(net_salary * ded, 2),
+    }
+
+
+# =============================
+# 5️⃣ REMONTER DU NET VERS LE BASIC
+# =============================
+
+def _net_from_basic(basic, fixed_gross, primes_taxables_effectives, imposable_extras, ded):
+    """
+    Évaluation numérique minimale du net pour le solveur : quelques opérations en float,
+    sans construire le résultat ni le détail RTS.
+    """
+    gross = basic + fixed_gross
+    cnss_employee = calculate_cnss_employee(gross)
+    ecart_imposable = max(0, primes_taxables_effectives - gross * DEFAULT_RATES.ecart_imposable)
+    imposable = basic + imposable_extras + ecart_imposable - cnss_employee
+    return gross - cnss_employee - calculate_rts(imposable) - ded
+
+
+def _solve_increasing(f, target, low=0.0, high=100_000_000.0, tolerance=1.0, max_iter=50):
+    """
+    Trouve x ≥ low tel que f(x) ≈ target pour une fonction f croissante et linéaire par morceaux
+    (c'est le cas du net, du brut et du coût employeur en fonction du salaire de base).
+
+    Pas de Newton avec la pente du morceau courant : dès que le bon morceau est atteint,
+    le pas tombe exactement sur la solution. L'intervalle [low, high] est conservé comme
+    garde-fou (fausse position, puis dichotomie). Quelques évaluations suffisent.
+    """
+    f_low = f(low)
+    if f_low >= target - tolerance:
+        return low
+    f_high = f(high)
+    while f_high < target and high < 1e13:
+        low, f_low = high, f_high
+        high *= 10
+        f_high = f(high)
+    if f_high < target:
+        return high
+
+    x = low + (target - f_low) * (high - low) / (f_high - f_low)
+    for _ in range(max_iter):
+        fx = f(x)
+        if abs(fx - target) <= tolerance:
+            return x
+        if fx < target:
+            low, f_low = x, fx
+        else:
+            high, f_high = x, fx
+
+        slope = f(x + 1.0) - fx  # Pente locale par GNF de salaire de base
+        x_next = x + (target - fx) / slope if slope > 0 else low
+        if not low < x_next < high:
+            x_next = low + (target - f_low) * (high - low) / (f_high - f_low)
+            if not low < x_next < high:
+                x_next = (low + high) / 2
+        x = x_next
+    return x
+
+
+def _employer_cost_from_basic(basic, fixed_gross):
+    """Évaluation minimale du coût total employeur (brut + charges patronales)"""
+    gross = basic + fixed_gross
+    return (
+        gross
+        + calculate_cnss_employer(gross)
+        + calculate_versement_forfaitaire(gross)
+        + calculate_taxe_apprentissage(gross)
+    )
+
+
+def _fixed_terms(payroll_input):
+    """Termes de l'évaluation qui ne dépendent pas du salaire de base"""
+    advantages, ded, primes_taxables, primes_exonerees, avantage_nature, prime_responsabilite = payroll_input
+    primes_taxables_effectives = primes_taxables + prime_responsabilite
+    fixed_gross = advantages + primes_taxables_effectives + primes_exonerees + avantage_nature
+    imposable_extras = primes_exonerees + avantage_nature
+    return fixed_gross, primes_taxables_effectives, imposable_extras, ded
+
+
+def solve_net(target_net, payroll_input=PayrollInput(), tolerance=1):
+    """
+    Retrouve le salaire de base qui permet d'obtenir un net donné. Renvoie un PayrollResult.
+    Si le net demandé est inférieur au net obtenu sans salaire de base, le base retenu est 0.
+    """
+    fixed_gross, primes_taxables_effectives, imposable_extras, ded = _fixed_terms(payroll_input)
+    basic = _solve_increasing(
+        lambda basic: _net_from_basic(basic, fixed_gross, primes_taxables_effectives, imposable_extras, ded),
+        float(target_net),
+        tolerance=float(tolerance),
+    )
+    return evaluate(basic, payroll_input)
+
+
+def solve_net_a_payer(target_net_a_payer, payroll_input=PayrollInput(), avance_salaire=0, saisie_opposition=0, tolerance=1):
+    """
+    Retrouve le salaire de base qui donne un net à payer donné après l'avance sur salaire
+    et la saisie / opposition. Renvoie un PayrollResult (net avant déductions).
+    """
+    target_net = float(target_net_a_payer) + float(avance_salaire or 0) + float(saisie_opposition or 0)
+    return solve_net(target_net, payroll_input, tolerance)
+
+
+def solve_gross(target_gross, payroll_input=PayrollInput()):
+    """Retrouve le salaire de base qui donne un salaire brut donné (relation linéaire directe)"""
+    fixed_gross = _fixed_terms(payroll_input)[0]
+    basic = float(target_gross) - fixed_gross
+    if basic < 0:
+        raise ValueError(
+            f"Brut demandé ({float(target_gross):,.0f} GNF) inférieur aux primes et avantages ({fixed_gross:,.0f} GNF)"
+        )
+    return evaluate(basic, payroll_input)
+
+
+def solve_employer_cost(budget, payroll_input=PayrollInput(), tolerance=1):
+    """
+    Retrouve la paie la plus élevée dont le coût total employeur (brut + charges patronales)
+    reste dans le budget donné. Renvoie un PayrollResult dont le net est le net maximal possible.
+    """
+    budget = float(budget)
+    tolerance = float(tolerance)
+    fixed_gross = _fixed_terms(payroll_input)[0]
+    minimum = _employer_cost_from_basic(0.0, fixed_gross)
+    if budget < minimum:
+        raise ValueError(
+            f"Budget ({budget:,.0f} GNF) inférieur au coût minimal ({minimum:,.0f} GNF) pour ces primes et avantages"
+        )
+    # Viser légèrement sous le budget pour ne jamais le dépasser
+    basic = _solve_increasing(
+        lambda basic: _employer_cost_from_basic(basic, fixed_gross),
+        budget - tolerance / 2,
+        tolerance=tolerance / 2,
+    )
+    return evaluate(basic, payroll_input)
+
+
+def solve_net_batch(targets, payroll_inputs, tolerance=1):
+    """Résout une série de nets (un PayrollInput par cible) ; voir results_to_columns"""
+    return [solve_net(target, payroll_input, tolerance) for target, payroll_input in zip(targets, payroll_inputs)]
+
+
+def calculate_basic_from_net(target_net, advantages=0, ded=0, primes_taxables=0, primes_exonerees=0, avantage_nature=0, prime_responsabilite=0, tolerance=1):
+    """
+    Version dictionnaire (arrondie) de solve_net(), utilisée par les vues et templates.
+    """
+    payroll_input = PayrollInput.from_values(advantages, ded, primes_taxables, primes_exonerees, avantage_nature, prime_responsabilite)
+    return solve_net(target_net, payroll_input, tolerance).to_dict()
+
+
+# =============================
+# 6️⃣ PAIE COMPLÈTE À PARTIR DU NET SOUHAITÉ
+# =============================
+
+def build_payroll_input(net_salary, selected_primes=None, avantage_nature=0):
+    """
+    Détermine les primes d'un employé à partir de son salaire net souhaité :
+    primes taxables automatiques et primes exonérées sélectionnées.
+    Retourne (PayrollInput, primes_auto, exempt_primes_amounts).
+    """
+    # Calculer automatiquement les primes taxables
+    primes_auto = calculate_primes_automatiques(net_salary)
+
+    # Calculer le total des primes taxables (sans prime de responsabilité qui est traitée comme exonérée)
+    primes_taxables = float(
+        primes_auto['prime_cherte_vie'] +
+        primes_auto['indemnite_logement'] +
+        primes_auto['indemnite_transport'] +
+        primes_auto['indemnite_repas']
+    )
+
+    # Calculer les primes exonérées si sélectionnées
+    primes_exonerees = 0
+    exempt_primes_amounts = {}
+    if selected_primes:
+        exempt_primes_amounts = calculate_exempt_primes_amounts(net_salary, selected_primes)
+        primes_exonerees = sum(exempt_primes_amounts.values())
+
+    payroll_input = PayrollInput.from_values(
+        0,  # Pas d'avantages généraux
+        0,  # Pas de déductions générales
+        primes_taxables,
+        primes_exonerees,
+        avantage_nature,
+        0  # Prime de responsabilité traitée comme exonérée (pas dans primes taxables)
+    )
+    return payroll_input, primes_auto, exempt_primes_amounts
+
+
+def calculate_payroll(net_salary, selected_primes=None, avantage_nature=0):
+    """
+    Calcule la paie complète d'un employé à partir de son salaire net souhaité :
+    primes taxables automatiques, primes exonérées sélectionnées puis
+    recherche du salaire de base.
+    """
+    payroll_input, primes_auto, exempt_primes_amounts = build_payroll_input(net_salary, selected_primes, avantage_nature)
+
+    return {
+        'result': solve_net(net_salary, payroll_input).to_dict(),
+        'primes_auto': primes_auto,
+        'exempt_primes_amounts': exempt_primes_amounts,
+        'primes_taxables': payroll_input.primes_taxables,
+        'primes_exonerees': payroll_input.primes_exonerees,
+    }
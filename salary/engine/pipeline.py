@@ -0,0 +1,193 @@
+"""
+Chaîne de traitement en flux pour le moteur de paie :
+lecture (CSV / JSON Lines) → calcul ligne par ligne → écriture.
+
+Chaque étape est un générateur : une seule ligne est en mémoire à la fois,
+ce qui permet de traiter des millions de lignes dans un pipeline shell.
+"""
+import csv
+import json
+import math
+import sys
+
+from .core import PayrollInput, calculate_payroll, evaluate, solve_employer_cost
+from .rates import EXEMPT_PRIMES
+
+# Colonnes d'identification recopiées telles quelles dans la sortie
+PASSTHROUGH_FIELDS = ('id', 'nom_complet')
+
+OUTPUT_FIELDS = (
+    'basic', 'gross', 'imposable', 'cnss', 'rts', 'net',
+    'primes_taxables', 'primes_exonerees', 'avantage_nature', 'ecart_imposable',
+    'cnss_employer', 'versement_forfaitaire', 'taxe_apprentissage',
+    'total_cnss_patronal', 'total_charges_employee', 'salaire_net_a_payer',
+)
+
+
+class RecordError(ValueError):
+    """Ligne d'entrée invalide"""
+
+
+# =============================
+# LECTURE
+# =============================
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            # Lignes invalides signalées par compute() et les imports
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield RecordError(f"JSON invalide : {error}")
+                continue
+            yield record if isinstance(record, dict) else RecordError("ligne JSON non objet")
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+# =============================
+# CALCUL
+# =============================
+
+def _amount(record, *keys, required=False):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ''):
+            try:
+                amount = float(value)
+            except (TypeError, ValueError):
+                raise RecordError(f"valeur numérique invalide pour '{key}' : {value!r}")
+            # nan, inf ou dépassement (1e400) : refusés comme toute valeur invalide
+            if not math.isfinite(amount):
+                raise RecordError(f"valeur numérique invalide pour '{key}' : {value!r}")
+            return amount
+    if required:
+        raise RecordError(f"champ obligatoire manquant : {' ou '.join(keys)}")
+    return 0.0
+
+
+def _selected_primes(record):
+    primes = record.get('primes') or []
+    if isinstance(primes, str):
+        primes = [prime.strip() for prime in primes.replace(';', ',').split(',') if prime.strip()]
+    elif not isinstance(primes, (list, tuple)) or not all(isinstance(prime, str) for prime in primes):
+        raise RecordError(f"primes invalides : {primes!r}")
+    unknown = set(primes) - set(EXEMPT_PRIMES)
+    if unknown:
+        raise RecordError(f"primes exonérées inconnues : {', '.join(sorted(unknown))}")
+    return primes
+
+
+def _output(record, values, deductions):
+    row = {key: record[key] for key in PASSTHROUGH_FIELDS if key in record}
+    for key in OUTPUT_FIELDS[:-1]:
+        row[key] = round(values[key], 2)
+    row['salaire_net_a_payer'] = round(values['net'] - deductions, 2)
+    return row
+
+
+def net_to_gross(record):
+    """Calcule la paie d'une ligne à partir du salaire net souhaité (mêmes règles que l'application)"""
+    net_salary = _amount(record, 'net_salary', 'salaire_net', required=True)
+    payroll = calculate_payroll(net_salary, _selected_primes(record), _amount(record, 'avantage_nature'))
+    deductions = _amount(record, 'avance_salaire') + _amount(record, 'saisie_opposition')
+    return _output(record, payroll['result'], deductions)
+
+
+def net_a_payer_to_gross(record):
+    """Calcule la paie d'une ligne à partir du net à payer souhaité (après avance et saisie)"""
+    deductions = _amount(record, 'avance_salaire') + _amount(record, 'saisie_opposition')
+    net_salary = _amount(record, 'salaire_net_a_payer', 'net_a_payer', required=True) + deductions
+    payroll = calculate_payroll(net_salary, _selected_primes(record), _amount(record, 'avantage_nature'))
+    return _output(record, payroll['result'], deductions)
+
+
+def _payroll_input(record):
+    return PayrollInput(
+        primes_taxables=_amount(record, 'primes_taxables'),
+        primes_exonerees=_amount(record, 'primes_exonerees'),
+        avantage_nature=_amount(record, 'avantage_nature'),
+    )
+
+
+def gross_to_net(record):
+    """Calcule la paie d'une ligne à partir du salaire de base et des primes fournies"""
+    result = evaluate(_amount(record, 'basic', 'salaire_base', required=True), _payroll_input(record)).to_dict()
+    deductions = _amount(record, 'avance_salaire') + _amount(record, 'saisie_opposition')
+    return _output(record, result, deductions)
+
+
+def cost_to_net(record):
+    """Calcule la paie la plus élevée tenant dans le coût employeur fourni (primes fournies)"""
+    budget = _amount(record, 'total_cout_employeur', 'budget', required=True)
+    try:
+        result = solve_employer_cost(budget, _payroll_input(record)).to_dict()
+    except ValueError as error:
+        raise RecordError(str(error))
+    deductions = _amount(record, 'avance_salaire') + _amount(record, 'saisie_opposition')
+    return _output(record, result, deductions)
+
+
+CALCULATIONS = {
+    'net-to-gross': net_to_gross,
+    'net-a-payer-to-gross': net_a_payer_to_gross,
+    'gross-to-net': gross_to_net,
+    'cost-to-net': cost_to_net,
+}
+
+
+def compute(records, calculation, on_error=None):
+    """
+    Applique le calcul à chaque ligne. Les lignes invalides sont signalées à on_error(numéro, erreur)
+    puis ignorées ; sans on_error, l'erreur est propagée.
+    """
+    for line_number, record in enumerate(records, 1):
+        try:
+            if isinstance(record, RecordError):
+                raise record
+            yield calculation(record)
+        except RecordError as error:
+            if on_error is None:
+                raise
+            on_error(line_number, error)
+
+
+# =============================
+# ÉCRITURE
+# =============================
+
+def write_csv(rows, stream):
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(stream, fieldnames=list(row), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def write_jsonl(rows, stream):
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    write = stream.write
+    for row in rows:
+        write(dumps(row))
+        write('\n')
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl}
+
+
+def run(input_format='jsonl', output_format=None, direction='net-to-gross',
+        stdin=None, stdout=None, on_error=None):
+    """Lit stdin, calcule chaque ligne et écrit le résultat sur stdout"""
+    stdin = stdin if stdin is not None else sys.stdin
+    stdout = stdout if stdout is not None else sys.stdout
+    records = READERS[input_format](stdin)
+    rows = compute(records, CALCULATIONS[direction], on_error=on_error)
+    WRITERS[output_format or input_format](rows, stdout)
@@ -0,0 +1,138 @@
+"""
+Barème des cotisations et impôts (CNSS, versement forfaitaire, taxe
+d'apprentissage, tranches RTS) et paliers des primes sous forme de données.
+
+C'est la seule définition des règles : core.py (calcul unitaire, colonnes
+enregistrées des employés) et vectorized.py (simulations, analyses d'impact)
+lisent ces constantes. Un barème candidat se simule sans modifier le code.
+"""
+import hashlib
+import json
+from typing import NamedTuple
+
+# Tranches du barème RTS : (borne inférieure, borne supérieure, taux)
+RTS_BRACKETS = (
+    (0, 1_000_000, 0.0),
+    (1_000_000, 3_000_000, 0.05),
+    (3_000_000, 5_000_000, 0.08),
+    (5_000_000, 10_000_000, 0.10),
+    (10_000_000, 20_000_000, 0.15),
+    (20_000_000, None, 0.20),
+)
+
+
+class RateSchedule(NamedTuple):
+    """Barème complet ; DEFAULT_RATES est le barème appliqué par core.py et vectorized.py"""
+    cnss_employee: tuple = (0.05, 27000, 125000)  # (taux, plancher, plafond)
+    cnss_employer: tuple = (0.18, 97200, 450000)
+    versement_forfaitaire: float = 0.06
+    taxe_apprentissage: float = 0.02
+    ecart_imposable: float = 0.25  # Part du brut au-delà de laquelle les primes taxables deviennent imposables
+    rts_brackets: tuple = RTS_BRACKETS  # (borne inférieure, borne supérieure ou None, taux)
+
+    @classmethod
+    def from_dict(cls, data, base=None):
+        """
+        Construit un barème à partir d'un dictionnaire (JSON) ; les clés absentes
+        reprennent le barème de base. Les CNSS s'écrivent {"rate", "floor", "ceiling"}.
+        """
+        base = base or DEFAULT_RATES
+        if not isinstance(data, dict):
+            raise ValueError("Le barème doit être un objet JSON")
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Paramètres de barème inconnus : {', '.join(sorted(unknown))}")
+
+        values = base._asdict()
+        for key in ('cnss_employee', 'cnss_employer'):
+            if key in data:
+                current = dict(zip(('rate', 'floor', 'ceiling'), values[key]))
+                current.update(data[key])
+                values[key] = (float(current['rate']), float(current['floor']), float(current['ceiling']))
+        for key in ('versement_forfaitaire', 'taxe_apprentissage', 'ecart_imposable'):
+            if key in data:
+                values[key] = float(data[key])
+        if 'rts_brackets' in data:
+            values['rts_brackets'] = tuple(
+                (float(lower), None if upper is None else float(upper), float(rate))
+                for lower, upper, rate in data['rts_brackets']
+            )
+        schedule = cls(**values)
+        schedule.validate()
+        return schedule
+
+    def to_dict(self):
+        data = self._asdict()
+        for key in ('cnss_employee', 'cnss_employer'):
+            data[key] = dict(zip(('rate', 'floor', 'ceiling'), map(float, data[key])))
+        data['rts_brackets'] = [
+            [float(lower), None if upper is None else float(upper), float(rate)]
+            for lower, upper, rate in self.rts_brackets
+        ]
+        return data
+
+    def validate(self):
+        for name in ('cnss_employee', 'cnss_employer'):
+            rate, floor, ceiling = getattr(self, name)
+            if rate < 0 or floor < 0 or ceiling < floor:
+                raise ValueError(f"{name} : taux et plancher positifs, plafond ≥ plancher")
+        brackets = self.rts_brackets
+        if not brackets or brackets[0][0] != 0 or brackets[-1][1] is not None:
+            raise ValueError("Les tranches RTS doivent commencer à 0 et la dernière être sans borne supérieure")
+        for (_, upper, _), (lower, next_upper, _) in zip(brackets, brackets[1:]):
+            if upper != lower or (next_upper is not None and next_upper <= lower):
+                raise ValueError("Les tranches RTS doivent être contiguës et croissantes")
+
+    @property
+    def version(self):
+        """Empreinte courte du barème (identique pour deux barèmes de mêmes valeurs)"""
+        payload = json.dumps(self.to_dict(), sort_keys=True).encode()
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+
+DEFAULT_RATES = RateSchedule()
+
+# Paliers de calculate_primes_automatiques :
+# (net maximal du palier, taux cherté de vie, logement, transport, repas)
+PRIMES_TIERS = (
+    (200000, 0.03, 0.05, 0.03, 0.02),
+    (500000, 0.04, 0.06, 0.04, 0.03),
+    (1000000, 0.05, 0.08, 0.05, 0.04),
+    (None, 0.06, 0.10, 0.06, 0.05),
+)
+
+# Paliers de calculate_avantages_et_deductions_automatiques : (net maximal du palier, taux avantages, déductions).
+# Non utilisés par calculate_payroll (ni donc par les colonnes enregistrées) : hors de rules_version.
+AVANTAGES_TIERS = (
+    (200000, 0.08, 0.02),
+    (500000, 0.10, 0.02),
+    (1000000, 0.12, 0.02),
+    (None, 0.15, 0.02),
+)
+
+# Primes exonérées proposées et coefficients de calculate_exempt_primes_amounts
+# (5% du net répartis entre les primes cochées)
+EXEMPT_PRIMES = ('retraite', 'interim', 'anciennete', 'responsabilite')
+EXEMPT_PRIMES_RATE = 0.05
+EXEMPT_PRIMES_COEFFICIENTS = {'retraite': 1.2, 'interim': 0.8, 'anciennete': 1.0, 'responsabilite': 1.0}
+
+# Révision des formules du moteur : à incrémenter lorsqu'un calcul change sans que le barème change
+ENGINE_REVISION = 1
+
+
+def rules_version(rates=DEFAULT_RATES):
+    """
+    Version des règles de calcul (barème, primes automatiques, révision du moteur),
+    enregistrée dans l'empreinte des employés : toute constante lue par core.py est
+    hachée ici, un changement de règle rend donc toutes les empreintes périmées.
+    """
+    payload = json.dumps({
+        'rates': rates.to_dict(),
+        'primes_tiers': PRIMES_TIERS,
+        'exempt_primes': [EXEMPT_PRIMES_RATE, EXEMPT_PRIMES_COEFFICIENTS],
+        'engine': ENGINE_REVISION,
+    }, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+RULES_VERSION = rules_version()
@@ -0,0 +1,118 @@
+"""
+Simulateur de grille salariale : coût employeur, RTS, CNSS et taux effectif
+calculés en une passe vectorisée sur toute une plage de salaires nets.
+"""
+import math
+
+import numpy as np
+
+from . import vectorized as V
+from .rates import DEFAULT_RATES
+
+SWEEP_START = 500_000
+SWEEP_STOP = 50_000_000
+SWEEP_STEP = 10_000
+SWEEP_MAX_POINTS = 100_000
+
+# Colonnes renvoyées pour chaque configuration de primes
+SWEEP_COLUMNS = (
+    'basic', 'gross', 'imposable', 'cnss_employee', 'rts', 'net',
+    'cnss_employer', 'total_cnss_patronal', 'total_cout_employeur',
+)
+
+
+def sweep_nets(start=SWEEP_START, stop=SWEEP_STOP, step=SWEEP_STEP):
+    """Nets simulés, bornes incluses"""
+    if not all(map(math.isfinite, (start, stop, step))):
+        raise ValueError("Les bornes et le pas de la plage doivent être des nombres finis")
+    if step <= 0 or stop < start:
+        raise ValueError("La plage doit vérifier début ≤ fin et un pas strictement positif")
+    # Contrôle en flottants : pour des bornes extrêmes, le nombre de points peut être infini
+    count = (stop - start) / step
+    if not count < SWEEP_MAX_POINTS:
+        raise ValueError(f"Plage trop grande : plus de {SWEEP_MAX_POINTS:,} points")
+    count = int((stop - start) // step) + 1
+    return start + step * np.arange(count, dtype=float)
+
+
+def _state_changes(states, nets, kind, labels):
+    """Premier point de chaque changement d'état (tranche, plancher / plafond, palier...)"""
+    indices = np.flatnonzero(states[1:] != states[:-1]) + 1
+    return [
+        {
+            'index': int(i),
+            'net': float(nets[i]),
+            'kind': kind,
+            'label': labels(int(states[i - 1]), int(states[i])),
+        }
+        for i in indices
+    ]
+
+
+def _cnss_state(gross, rates):
+    rate, floor, ceiling = rates
+    raw = gross * rate
+    return np.where(raw < floor, 0, np.where(raw > ceiling, 2, 1))
+
+
+def _cnss_label(name):
+    states = ('plancher', 'proportionnelle', 'plafond')
+    return lambda before, after: f"CNSS {name} : {states[before]} → {states[after]}"
+
+
+def _rts_label(brackets):
+    return lambda before, after: f"RTS : tranche {brackets[before][2]:.0%} → {brackets[after][2]:.0%}"
+
+
+def _primes_label(before, after):
+    return f"Primes automatiques : palier {before + 1} → {after + 1}"
+
+
+def _ecart_label(before, after):
+    return "Écart imposable : primes > 25% du brut" if after else "Écart imposable : fin du dépassement"
+
+
+def find_breakpoints(nets, columns, rates=DEFAULT_RATES):
+    """Points de la simulation où une règle change de régime, triés par net"""
+    tier_limits = [limit for limit, *_ in V.PRIMES_TIERS[:-1]]
+    rts_index = V.rts_bracket_index(columns['imposable'], rates.rts_brackets)
+    breakpoints = (
+        _state_changes(rts_index, nets, 'rts', _rts_label(rates.rts_brackets))
+        + _state_changes(_cnss_state(columns['gross'], rates.cnss_employee), nets, 'cnss_employe', _cnss_label("employé"))
+        + _state_changes(_cnss_state(columns['gross'], rates.cnss_employer), nets, 'cnss_employeur', _cnss_label("employeur"))
+        + _state_changes(np.searchsorted(tier_limits, nets, side='left'), nets, 'primes', _primes_label)
+        + _state_changes((columns['ecart_imposable'] > 0).astype(int), nets, 'ecart_imposable', _ecart_label)
+    )
+    return sorted(breakpoints, key=lambda point: (point['index'], point['kind']))
+
+
+def salary_sweep(nets, selected_primes=None, avantage_nature=0, rates=DEFAULT_RATES):
+    """
+    Simule la paie de chaque net pour une configuration de primes.
+    Renvoie les colonnes de SWEEP_COLUMNS, le taux effectif de prélèvement salarial
+    ((CNSS + RTS) / brut), le coin fiscal ((coût - net) / coût) et les points de rupture.
+    """
+    nets = np.asarray(nets, dtype=float)
+    columns = V.calculate_payroll(nets, selected_primes, avantage_nature, rates)
+    gross = columns['gross']
+    cost = columns['total_cout_employeur']
+    series = {key: columns[key] for key in SWEEP_COLUMNS}
+    series['taux_effectif'] = np.divide(
+        columns['total_charges_employee'], gross, out=np.zeros_like(gross), where=gross > 0
+    )
+    series['coin_fiscal'] = np.divide(cost - columns['net'], cost, out=np.zeros_like(cost), where=cost > 0)
+    series['breakpoints'] = find_breakpoints(nets, columns, rates)
+    return series
+
+
+def compact(series):
+    """Version JSON compacte : montants arrondis au GNF, taux à 4 décimales"""
+    data = {}
+    for key, values in series.items():
+        if key == 'breakpoints':
+            data[key] = values
+        elif key in ('taux_effectif', 'coin_fiscal'):
+            data[key] = np.round(values, 4).tolist()
+        else:
+            data[key] = np.rint(values).astype(np.int64).tolist()
+    return data
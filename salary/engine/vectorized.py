@@ -0,0 +1,212 @@
+"""
+Version vectorisée (numpy) du moteur de paie : les règles de core.py
+appliquées à des tableaux de salaires en une seule passe.
+
+Réservée aux traitements de masse (simulations, analyses d'impact,
+répartition d'enveloppes) ; les vues et l'API unitaire utilisent core.py.
+Les résultats sont des dictionnaires de tableaux dont les clés sont les
+champs de PayrollResult (voir results_to_columns).
+"""
+import numpy as np
+
+from .core import PayrollResult
+from .rates import DEFAULT_RATES, EXEMPT_PRIMES_COEFFICIENTS, EXEMPT_PRIMES_RATE, PRIMES_TIERS
+
+PRIMES_AUTO_KEYS = ('prime_cherte_vie', 'indemnite_logement', 'indemnite_transport', 'indemnite_repas')
+
+def _array(values):
+    return np.asarray(values, dtype=float)
+
+
+def _rts_arrays(brackets):
+    lowers = np.array([lower for lower, _, _ in brackets], dtype=float)
+    uppers = np.array([np.inf if upper is None else upper for _, upper, _ in brackets], dtype=float)
+    rates = np.array([rate for _, _, rate in brackets], dtype=float)
+    return lowers, uppers, rates
+
+
+def cnss(gross, cnss_rates=DEFAULT_RATES.cnss_employee):
+    """CNSS (employé ou employeur selon le triplet taux, plancher, plafond)"""
+    rate, floor, ceiling = cnss_rates
+    return np.clip(gross * rate, floor, ceiling)
+
+
+def rts(imposable, brackets=DEFAULT_RATES.rts_brackets):
+    lowers, uppers, rates = _rts_arrays(brackets)
+    imposable = _array(imposable)[..., None]
+    return (np.clip(imposable - lowers, 0, uppers - lowers) * rates).sum(axis=-1)
+
+
+def rts_bracket_index(imposable, brackets=DEFAULT_RATES.rts_brackets):
+    """Indice de la tranche RTS dans laquelle tombe chaque salaire imposable"""
+    uppers = _rts_arrays(brackets)[1]
+    return np.searchsorted(uppers[:-1], imposable, side='left')
+
+
+# =============================
+# ÉVALUATION DU BASIC VERS LE NET
+# =============================
+
+def _net_and_slope(basic, fixed_gross, primes_taxables_effectives, imposable_extras, ded, rates):
+    """Net et pente à droite du net par rapport au salaire de base (fonction linéaire par morceaux)"""
+    gross = basic + fixed_gross
+    rate, floor, ceiling = rates.cnss_employee
+    raw_cnss = gross * rate
+    cnss_employee = np.clip(raw_cnss, floor, ceiling)
+    d_cnss = np.where((raw_cnss >= floor) & (raw_cnss < ceiling), rate, 0.0)
+
+    raw_ecart = primes_taxables_effectives - gross * rates.ecart_imposable
+    ecart_imposable = np.maximum(raw_ecart, 0.0)
+    d_ecart = np.where(raw_ecart > 0, -rates.ecart_imposable, 0.0)
+
+    imposable = basic + imposable_extras + ecart_imposable - cnss_employee
+    d_imposable = 1.0 + d_ecart - d_cnss
+    _, uppers, rts_rates = _rts_arrays(rates.rts_brackets)
+    marginal_rate = rts_rates[np.searchsorted(uppers[:-1], imposable, side='right')]
+
+    net = gross - cnss_employee - rts(imposable, rates.rts_brackets) - ded
+    return net, 1.0 - d_cnss - marginal_rate * d_imposable
+
+
+def evaluate(basic, advantages=0, ded=0, primes_taxables=0, primes_exonerees=0, avantage_nature=0, prime_responsabilite=0,
+             rates=DEFAULT_RATES):
+    """Équivalent de core.evaluate() pour des tableaux : renvoie les colonnes de PayrollResult"""
+    basic = _array(basic)
+    primes_taxables_effectives = _array(primes_taxables) + prime_responsabilite
+    gross = basic + advantages + primes_taxables_effectives + primes_exonerees + avantage_nature
+
+    cnss_employee = cnss(gross, rates.cnss_employee)
+    ecart_imposable = np.maximum(primes_taxables_effectives - gross * rates.ecart_imposable, 0.0)
+    imposable = basic + primes_exonerees + avantage_nature + ecart_imposable - cnss_employee
+    rts_amount = rts(imposable, rates.rts_brackets)
+    net = gross - cnss_employee - rts_amount - ded
+
+    cnss_employer = cnss(gross, rates.cnss_employer)
+    versement_forfaitaire = gross * rates.versement_forfaitaire
+    taxe_apprentissage = gross * rates.taxe_apprentissage
+    total_cnss_patronal = versement_forfaitaire + taxe_apprentissage + cnss_employer
+
+    values = (
+        basic, gross, net,
+        cnss_employee, cnss_employer, versement_forfaitaire, taxe_apprentissage,
+        total_cnss_patronal, cnss_employee + rts_amount,
+        ecart_imposable, imposable, rts_amount,
+        primes_taxables_effectives, primes_exonerees, avantage_nature, prime_responsabilite,
+        advantages, ded,
+    )
+    shape = basic.shape
+    columns = {field: np.broadcast_to(_array(value), shape) for field, value in zip(PayrollResult._fields, values)}
+    columns['total_cout_employeur'] = gross + total_cnss_patronal
+    return columns
+
+
+# =============================
+# REMONTER DU NET VERS LE BASIC
+# =============================
+
+def solve_basic(target_net, advantages=0, ded=0, primes_taxables=0, primes_exonerees=0, avantage_nature=0, prime_responsabilite=0,
+                rates=DEFAULT_RATES, tolerance=1.0, max_iter=60):
+    """
+    Salaire de base donnant chaque net demandé (même convention que core.solve_net :
+    0 si le net est atteint sans salaire de base). Pas de Newton sur la pente exacte
+    du morceau courant, encadrés par un intervalle par élément ; tous les éléments
+    avancent ensemble à chaque itération.
+    """
+    target = _array(target_net)
+    primes_taxables_effectives = _array(primes_taxables) + prime_responsabilite
+    fixed_gross = advantages + primes_taxables_effectives + primes_exonerees + avantage_nature
+    imposable_extras = _array(primes_exonerees) + avantage_nature
+    args = (fixed_gross, primes_taxables_effectives, imposable_extras, ded, rates)
+
+    low = np.zeros_like(target)
+    f_low = _net_and_slope(low, *args)[0]
+    done = f_low >= target - tolerance
+
+    high = np.full_like(target, 100_000_000.0)
+    f_high = _net_and_slope(high, *args)[0]
+    while True:
+        short = ~done & (f_high < target)
+        if not short.any() or high.max() >= 1e13:
+            break
+        low = np.where(short, high, low)
+        f_low = np.where(short, f_high, f_low)
+        high = np.where(short, high * 10, high)
+        f_high = np.where(short, _net_and_slope(high, *args)[0], f_high)
+
+    span = np.where(f_high > f_low, f_high - f_low, 1.0)
+    basic = np.where(done, 0.0, low + (target - f_low) * (high - low) / span)
+    for _ in range(max_iter):
+        net, slope = _net_and_slope(basic, *args)
+        error = net - target
+        done |= np.abs(error) <= tolerance
+        if done.all():
+            break
+        low = np.where(~done & (error < 0), basic, low)
+        high = np.where(~done & (error > 0), basic, high)
+        step = basic - error / slope
+        step = np.where((step > low) & (step < high), step, (low + high) / 2)
+        basic = np.where(done, basic, step)
+    return basic
+
+
+def solve_net(target_net, rates=DEFAULT_RATES, **payroll_input):
+    """Équivalent de core.solve_net() pour des tableaux : colonnes de PayrollResult"""
+    return evaluate(solve_basic(target_net, rates=rates, **payroll_input), rates=rates, **payroll_input)
+
+
+# =============================
+# PAIE COMPLÈTE À PARTIR DU NET SOUHAITÉ
+# =============================
+
+def primes_automatiques(net_salary):
+    """Équivalent de calculate_primes_automatiques() : une colonne par prime"""
+    net_salary = _array(net_salary)
+    limits = [limit for limit, *_ in PRIMES_TIERS[:-1]]
+    tier = np.searchsorted(limits, net_salary, side='left')
+    return {
+        key: np.round(net_salary * np.array([rates[i + 1] for rates in PRIMES_TIERS])[tier], 2)
+        for i, key in enumerate(PRIMES_AUTO_KEYS)
+    }
+
+
+def exempt_primes_amounts(net_salary, selected_primes):
+    """Équivalent de calculate_exempt_primes_amounts() : une colonne par prime exonérée"""
+    net_salary = _array(net_salary)
+    amounts = {f"prime_{prime}": np.zeros_like(net_salary) for prime in EXEMPT_PRIMES_COEFFICIENTS}
+    if selected_primes:
+        amount_per_prime = net_salary * EXEMPT_PRIMES_RATE / len(selected_primes)
+        for prime in selected_primes:
+            amounts[f"prime_{prime}"] = amount_per_prime * EXEMPT_PRIMES_COEFFICIENTS[prime]
+    return amounts
+
+
+def exempt_primes_rate(selected_primes):
+    """Part du net versée en primes exonérées pour une sélection de primes (somme des montants / net)"""
+    if not selected_primes:
+        return 0.0
+    return EXEMPT_PRIMES_RATE * sum(EXEMPT_PRIMES_COEFFICIENTS[prime] for prime in selected_primes) / len(selected_primes)
+
+
+def build_payroll_input(net_salary, selected_primes=None, avantage_nature=0):
+    """Équivalent de core.build_payroll_input() : (entrées du solveur, primes auto, primes exonérées)"""
+    primes_auto = primes_automatiques(net_salary)
+    exempt_amounts = exempt_primes_amounts(net_salary, selected_primes)
+    payroll_input = {
+        'primes_taxables': sum(primes_auto.values()),
+        'primes_exonerees': sum(exempt_amounts.values()),
+        'avantage_nature': _array(avantage_nature),
+    }
+    return payroll_input, primes_auto, exempt_amounts
+
+
+def calculate_payroll(net_salary, selected_primes=None, avantage_nature=0, rates=DEFAULT_RATES):
+    """
+    Équivalent de core.calculate_payroll() pour un tableau de nets :
+    colonnes de PayrollResult complétées par le détail des primes.
+    """
+    net_salary = _array(net_salary)
+    payroll_input, primes_auto, exempt_amounts = build_payroll_input(net_salary, selected_primes, avantage_nature)
+    columns = solve_net(net_salary, rates=rates, **payroll_input)
+    columns.update(primes_auto)
+    columns.update(exempt_amounts)
+    return columns
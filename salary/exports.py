@@ -0,0 +1,127 @@
+"""
+Colonnes et générateurs de lignes communs à tous les exports de la paie
+(Excel, CSV, JSON Lines).
+
+Les lignes sont produites à partir de values_list(...).iterator() : aucune
+instance de modèle n'est créée et la mémoire reste constante quel que soit
+le nombre d'employés exportés.
+"""
+import csv
+import io
+import json
+
+from .engine import calculate_rts_tranches
+
+RTS_TRANCHE_KEYS = tuple(f"rts_tranche_{i}" for i in range(1, 7))
+
+# Colonnes de l'export, dans l'ordre : (clé, en-tête). Les tranches RTS sont calculées.
+EXPORT_COLUMNS = (
+    # 1. Nom
+    ('nom_complet', "Nom Complet"),
+    # 2. Salaire de base
+    ('salaire_base', "Salaire Base"),
+    # 3. Toutes les primes (exonérées et non exonérées)
+    ('prime_cherte_vie', "Prime Cherté de Vie"),
+    ('indemnite_logement', "Indemnité Logement"),
+    ('indemnite_transport', "Indemnité Transport"),
+    ('indemnite_repas', "Indemnité Repas"),
+    ('prime_retraite', "Prime Retraite"),
+    ('prime_interim', "Prime Intérim"),
+    ('prime_anciennete', "Prime Ancienneté"),
+    ('prime_responsabilite', "Prime de responsabilité"),
+    ('avantage_nature', "Avantage en nature"),
+    # 4. Salaire brut
+    ('salaire_brut', "Salaire Brut"),
+    # 5. CNSS employé et employeur
+    ('cnss_employe', "CNSS Employé"),
+    ('cnss_employeur', "CNSS Employeur"),
+    # 6. Écart imposable
+    ('ecart_imposable', "Écart Imposable"),
+    # 7. Salaire imposable
+    ('salaire_imposable', "Salaire Imposable"),
+    # 8. Détails RTS
+    ('rts_tranche_1', "RTS Tranche 1 (0%)"),
+    ('rts_tranche_2', "RTS Tranche 2 (5%)"),
+    ('rts_tranche_3', "RTS Tranche 3 (8%)"),
+    ('rts_tranche_4', "RTS Tranche 4 (10%)"),
+    ('rts_tranche_5', "RTS Tranche 5 (15%)"),
+    ('rts_tranche_6', "RTS Tranche 6 (20%)"),
+    # 9. RTS total
+    ('rts', "RTS Total"),
+    # 10. Total cotisations employé et employeur
+    ('total_charges_employee', "Total Charges Employé"),
+    ('total_cnss_patronal', "Total CNSS Patronal"),
+    # 11. Versement forfaitaire et taxe d'apprentissage
+    ('versement_forfaitaire', "Versement Forfaitaire"),
+    ('taxe_apprentissage', "Taxe Apprentissage"),
+    # 12. Salaire net
+    ('salaire_net', "Salaire Net"),
+    # 13. Déductions
+    ('avance_salaire', "Avance sur Salaire"),
+    ('saisie_opposition', "Saisie et Opposition"),
+    # 14. Salaire net à payer (dernière colonne)
+    ('salaire_net_a_payer', "Salaire Net à Payer"),
+)
+
+# Identifiant de l'employé en première colonne des exports destinés aux traitements automatiques
+ID_COLUMN = ('id', "ID")
+
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BATCH_SIZE = 500
+
+
+def get_export_columns(include_id=False):
+    return ((ID_COLUMN,) if include_id else ()) + EXPORT_COLUMNS
+
+
+def iter_export_rows(queryset, include_id=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Génère les lignes de l'export (tuples dans l'ordre de get_export_columns).
+    Les montants sont des float, les tranches RTS sont recalculées depuis le salaire imposable.
+    """
+    keys = [key for key, _ in get_export_columns(include_id)]
+    first_tranche = keys.index(RTS_TRANCHE_KEYS[0])
+    db_fields = keys[:first_tranche] + keys[first_tranche + len(RTS_TRANCHE_KEYS):]
+    imposable_index = db_fields.index('salaire_imposable')
+    # Colonnes textuelles / identifiant laissées telles quelles
+    raw_fields = {'id', 'nom_complet'}
+    converters = [None if field in raw_fields else float for field in db_fields]
+
+    for values in queryset.values_list(*db_fields).iterator(chunk_size=chunk_size):
+        row = [value if convert is None else convert(value) for convert, value in zip(converters, values)]
+        tranches = calculate_rts_tranches(values[imposable_index])
+        yield tuple(row[:first_tranche]) + tuple(tranches) + tuple(row[first_tranche:])
+
+
+def stream_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE, batch_size=STREAM_BATCH_SIZE):
+    """Génère l'export CSV par blocs de lignes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in get_export_columns(include_id=True)])
+    for count, row in enumerate(iter_export_rows(queryset, include_id=True, chunk_size=chunk_size), 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_jsonl(queryset, chunk_size=EXPORT_CHUNK_SIZE, batch_size=STREAM_BATCH_SIZE):
+    """Génère l'export JSON Lines (un objet par employé) par blocs de lignes"""
+    keys = [key for key, _ in get_export_columns(include_id=True)]
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    batch = []
+    for row in iter_export_rows(queryset, include_id=True, chunk_size=chunk_size):
+        batch.append(dumps(dict(zip(keys, row))))
+        if len(batch) >= batch_size:
+            yield '\n'.join(batch) + '\n'
+            batch = []
+    if batch:
+        yield '\n'.join(batch) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8', 'csv'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson; charset=utf-8', 'jsonl'),
+}
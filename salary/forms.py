@@ -1,5 +1,13 @@
+import json
+
 from django import forms
 
+from .bank_transfer import period_missing_accounts
+from .engine.rates import DEFAULT_RATES, RateSchedule
+from .models import PayrollPeriod
+from .payroll_periods import parse_period
+from .services import BANK_FIELDS, check_effective_from
+
 class NetToGrossForm(forms.Form):
     # Nom complet de l'employé
     nom_complet = forms.CharField(
@@ -179,3 +187,337 @@ class NetToGrossForm(forms.Form):
         cleaned_data['primes_exonerees'] = primes_exonerees
         cleaned_data['salaire_net_a_payer'] = salaire_net_a_payer
         return cleaned_data
+
+
+class WhatIfForm(forms.Form):
+    """Barème candidat à comparer au barème actuel"""
+    rates = forms.CharField(
+        label="Barème candidat (JSON)",
+        widget=forms.Textarea(attrs={'class': 'form-control font-monospace', 'rows': 16}),
+        help_text="Seules les valeurs modifiées sont nécessaires ; les autres reprennent le barème actuel",
+    )
+    keep = forms.ChoiceField(
+        label="Élément maintenu",
+        choices=[
+            ('gross', "Salaire de base maintenu (le net varie)"),
+            ('net', "Net garanti (le salaire de base est recalculé)"),
+        ],
+        initial='gross',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['rates'].initial = json.dumps(DEFAULT_RATES.to_dict(), indent=2)
+
+    def clean_rates(self):
+        try:
+            return RateSchedule.from_dict(json.loads(self.cleaned_data['rates']))
+        except (ValueError, TypeError, KeyError) as error:
+            raise forms.ValidationError(f"Barème invalide : {error}")
+
+
+# Primes exonérées proposées dans le formulaire de modification (même ordre que EXEMPT_PRIMES)
+EXEMPT_PRIME_CHOICES = [
+    ('retraite', "Prime de retraite"),
+    ('interim', "Prime d'intérim"),
+    ('anciennete', "Prime d'ancienneté"),
+    ('responsabilite', "Prime de responsabilité"),
+]
+
+
+class EmployeeEditForm(forms.Form):
+    """
+    Modification d'un employé enregistré. Avec partial=True (API), seuls les champs
+    présents dans les données sont validés et modifiés.
+    """
+    nom_complet = forms.CharField(
+        label="Nom complet de l'employé",
+        max_length=200,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    salaire_net = forms.DecimalField(
+        label="Salaire net souhaité",
+        min_value=0,
+        decimal_places=2,
+        max_digits=12,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    primes = forms.MultipleChoiceField(
+        label="Primes exonérées",
+        choices=EXEMPT_PRIME_CHOICES,
+        required=False,
+        widget=forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'}),
+    )
+    avantage_nature = forms.DecimalField(
+        label="Avantage en nature",
+        min_value=0,
+        decimal_places=2,
+        max_digits=12,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    avance_salaire = forms.DecimalField(
+        label="Avance sur salaire",
+        min_value=0,
+        decimal_places=2,
+        max_digits=12,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    saisie_opposition = forms.DecimalField(
+        label="Saisie et opposition",
+        min_value=0,
+        decimal_places=2,
+        max_digits=12,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    effective_from = forms.DateField(
+        label="Date d'effet",
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        help_text="Date à partir de laquelle la nouvelle rémunération s'applique (aujourd'hui par défaut, pas de date future)",
+    )
+    code_banque = forms.CharField(
+        label="Code banque",
+        max_length=5,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    code_guichet = forms.CharField(
+        label="Code guichet",
+        max_length=5,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    numero_compte = forms.CharField(
+        label="Numéro de compte",
+        max_length=20,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    cle_rib = forms.CharField(
+        label="Clé RIB",
+        max_length=2,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+
+    def __init__(self, *args, partial=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        if partial:
+            for name in list(self.fields):
+                if name not in self.data:
+                    del self.fields[name]
+
+    def clean_effective_from(self):
+        try:
+            return check_effective_from(self.cleaned_data['effective_from'])
+        except ValueError as error:
+            raise forms.ValidationError(str(error))
+
+    @classmethod
+    def initial_from(cls, employee):
+        return {
+            'nom_complet': employee.nom_complet,
+            'salaire_net': employee.salaire_net,
+            'primes': employee.selected_primes,
+            'avantage_nature': employee.avantage_nature,
+            'avance_salaire': employee.avance_salaire,
+            'saisie_opposition': employee.saisie_opposition,
+            'code_banque': employee.code_banque,
+            'code_guichet': employee.code_guichet,
+            'numero_compte': employee.numero_compte,
+            'cle_rib': employee.cle_rib,
+        }
+
+    def get_changes(self):
+        """Modifications à passer à services.update_employee"""
+        changes = {}
+        for name, value in self.cleaned_data.items():
+            if name == 'effective_from':
+                continue
+            if name == 'primes':
+                changes['primes_selectionnees'] = value
+            elif name == 'nom_complet' or name in BANK_FIELDS:
+                changes[name] = value
+            else:
+                changes[name] = value or 0
+        return changes
+
+
+class PayrollPeriodForm(forms.Form):
+    """Période de paie à préparer"""
+    periode = forms.CharField(
+        label="Période (AAAA-MM)",
+        max_length=7,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'AAAA-MM', 'type': 'month'}),
+    )
+
+    def clean_periode(self):
+        try:
+            return parse_period(self.cleaned_data['periode'])
+        except ValueError as error:
+            raise forms.ValidationError(str(error))
+
+
+class ReconciliationForm(forms.Form):
+    """Deux paies à rapprocher : deux périodes enregistrées ou deux exports CSV / JSON Lines"""
+    avant = forms.ModelChoiceField(
+        label="Période de référence",
+        queryset=PayrollPeriod.objects.none(),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    apres = forms.ModelChoiceField(
+        label="Période à contrôler",
+        queryset=PayrollPeriod.objects.none(),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    fichier_avant = forms.FileField(
+        label="Export de référence",
+        required=False,
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control'}),
+    )
+    fichier_apres = forms.FileField(
+        label="Export à contrôler",
+        required=False,
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control'}),
+    )
+    seuil = forms.DecimalField(
+        label="Écart minimal signalé (GNF)",
+        min_value=0,
+        decimal_places=2,
+        max_digits=12,
+        initial=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    seuil_relatif = forms.DecimalField(
+        label="Écart relatif minimal (%)",
+        min_value=0,
+        decimal_places=2,
+        max_digits=5,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        periods = PayrollPeriod.objects.filter(user=user)
+        self.fields['avant'].queryset = periods
+        self.fields['apres'].queryset = periods
+
+    def clean(self):
+        cleaned_data = super().clean()
+        periods = cleaned_data.get('avant') and cleaned_data.get('apres')
+        files = cleaned_data.get('fichier_avant') and cleaned_data.get('fichier_apres')
+        if not periods and not files:
+            raise forms.ValidationError("Choisissez deux périodes ou deux exports à rapprocher")
+        return cleaned_data
+
+
+class BankTransferForm(forms.Form):
+    """Paramètres du fichier de virements du salaire net à payer"""
+    period = forms.ModelChoiceField(
+        label="Période de paie",
+        queryset=PayrollPeriod.objects.none(),
+        required=False,
+        empty_label="Montants actuels des employés",
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    transfer_format = forms.ChoiceField(
+        label="Format",
+        choices=(('csv', "CSV"), ('fixed', "Format fixe (enregistrements de longueur constante)")),
+        initial='csv',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    date_execution = forms.DateField(
+        label="Date d'exécution",
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    reference = forms.CharField(
+        label="Référence de la remise",
+        max_length=16,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    libelle = forms.CharField(
+        label="Libellé des virements",
+        max_length=30,
+        required=False,
+        initial="SALAIRE",
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    ignorer_sans_compte = forms.BooleanField(
+        label="Générer le fichier sans les lignes de la paie sans compte bancaire",
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
+    # Noms cités dans le message d'erreur
+    MISSING_NAMES_SHOWN = 5
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['period'].queryset = PayrollPeriod.objects.filter(user=user)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        period = cleaned_data.get('period')
+        if period is None or cleaned_data.get('ignorer_sans_compte'):
+            return cleaned_data
+        # Paie d'une période : une ligne sans compte est un salaire dû qui ne serait pas viré
+        missing = period_missing_accounts(period)
+        count = missing.count()
+        if count:
+            names = list(missing.order_by('nom_complet').values_list('nom_complet', flat=True)[:self.MISSING_NAMES_SHOWN])
+            raise forms.ValidationError(
+                f"{count} ligne(s) de la paie {period} sans compte bancaire (employé supprimé ou numéro "
+                f"de compte non renseigné) : {', '.join(names)}{'…' if count > len(names) else ''}. "
+                f"Renseignez les comptes ou cochez « {self.fields['ignorer_sans_compte'].label} »."
+            )
+        return cleaned_data
+
+
+class CnssDeclarationForm(forms.Form):
+    """Paie à déclarer à la CNSS"""
+    period = forms.ModelChoiceField(
+        label="Période de paie",
+        queryset=PayrollPeriod.objects.none(),
+        required=False,
+        empty_label="Montants actuels des employés",
+        widget=forms.Select(attrs={'class': 'form-select', 'onchange': 'this.form.submit()'}),
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['period'].queryset = PayrollPeriod.objects.filter(user=user)
+
+
+class JournalExportForm(forms.Form):
+    """Paie à exporter en écritures comptables"""
+    period = forms.ModelChoiceField(
+        label="Période de paie",
+        queryset=PayrollPeriod.objects.none(),
+        required=False,
+        empty_label="Montants actuels des employés",
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    detail = forms.ChoiceField(
+        label="Écritures",
+        choices=(('comptes', "Une ligne par compte"), ('employes', "Détail par employé")),
+        initial='comptes',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    piece = forms.CharField(
+        label="N° de pièce",
+        max_length=30,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['period'].queryset = PayrollPeriod.objects.filter(user=user)
@@ -0,0 +1,99 @@
+"""
+Historique des salaires : rémunérations datées par employé et lectures à date.
+
+Chaque changement de rémunération (création, modification, import, recalcul)
+ajoute une ligne SalaryHistory datée. La rémunération en vigueur à une date est
+la ligne de date d'effet la plus récente antérieure ou égale : pour un employé,
+une recherche sur l'index (employee, effective_from) ; pour tout l'effectif, une
+seule requête où une sous-requête corrélée sur ce même index retrouve la ligne
+en vigueur de chaque employé (pas une requête par employé).
+"""
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import Employee, SalaryHistory
+
+HISTORY_BATCH_SIZE = 2000
+
+# Colonnes copiées de l'employé dans l'historique
+HISTORY_FIELDS = (
+    'salaire_net', 'primes_selectionnees', 'avantage_nature', 'avance_salaire', 'saisie_opposition',
+    'salaire_base', 'salaire_brut', 'salaire_imposable', 'primes_taxables', 'primes_exonerees',
+    'cnss_employe', 'rts', 'cnss_employeur', 'versement_forfaitaire', 'taxe_apprentissage',
+    'total_cnss_patronal', 'salaire_net_a_payer',
+)
+
+# Montants totalisés par workforce_totals_as_of
+HISTORY_TOTAL_FIELDS = (
+    'salaire_net', 'salaire_base', 'salaire_brut', 'cnss_employe', 'rts',
+    'cnss_employeur', 'total_cnss_patronal', 'salaire_net_a_payer',
+)
+
+
+def _history_entry(employee, effective_from):
+    values = {name: getattr(employee, name) for name in HISTORY_FIELDS}
+    return SalaryHistory(employee_id=employee.pk, effective_from=effective_from, **values)
+
+
+def record_salary(employee, effective_from=None):
+    """
+    Enregistre la rémunération actuelle de l'employé à la date d'effet (aujourd'hui
+    par défaut). Une ligne existante à la même date est remplacée.
+    """
+    effective_from = effective_from or timezone.localdate()
+    record, _ = SalaryHistory.objects.update_or_create(
+        employee=employee,
+        effective_from=effective_from,
+        defaults=dict(
+            {name: getattr(employee, name) for name in HISTORY_FIELDS},
+            date_creation=timezone.now(),
+        ),
+    )
+    return record
+
+
+def record_salaries(employees, effective_from=None, batch_size=HISTORY_BATCH_SIZE):
+    """Version en masse de record_salary (INSERT ... ON CONFLICT DO UPDATE par lots)"""
+    effective_from = effective_from or timezone.localdate()
+    entries = [_history_entry(employee, effective_from) for employee in employees]
+    if entries:
+        SalaryHistory.objects.bulk_create(
+            entries,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['employee', 'effective_from'],
+            update_fields=list(HISTORY_FIELDS) + ['date_creation'],
+        )
+    return len(entries)
+
+
+def salary_as_of(employee, date):
+    """Rémunération d'un employé en vigueur à la date (None avant sa première date d'effet)"""
+    return (
+        SalaryHistory.objects.filter(employee=employee, effective_from__lte=date)
+        .order_by('-effective_from')
+        .first()
+    )
+
+
+def workforce_as_of(date, employees=None):
+    """
+    Rémunérations en vigueur à la date pour tout l'effectif (ou le queryset d'employés
+    donné), une ligne par employé ayant un historique à cette date, en une requête.
+    """
+    if employees is None:
+        employees = Employee.objects.all()
+    current = (
+        SalaryHistory.objects.filter(employee=OuterRef('pk'), effective_from__lte=date)
+        .order_by('-effective_from')
+        .values('pk')[:1]
+    )
+    return SalaryHistory.objects.filter(pk__in=employees.order_by().values(history_id=Subquery(current)))
+
+
+def workforce_totals_as_of(date, employees=None):
+    """Totaux des rémunérations en vigueur à la date, calculés en base"""
+    return workforce_as_of(date, employees).aggregate(
+        employes=Count('id'),
+        **{name: Sum(name) for name in HISTORY_TOTAL_FIELDS},
+    )
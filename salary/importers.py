@@ -0,0 +1,131 @@
+"""
+Import d'employés depuis un fichier (CSV ou JSON Lines, voir salary.engine.pipeline).
+
+Une ligne avec un 'id' existant met à jour l'employé : si ses données saisies
+n'ont pas changé (même empreinte), elle est ignorée ; sinon seules les colonnes
+qui diffèrent sont écrites. Une ligne sans 'id' crée un employé. Les rémunérations créées ou modifiées
+sont historisées à la date du jour.
+"""
+from . import audit
+from .engine import EXEMPT_PRIMES
+from .history import record_salaries
+from .models import Employee, bump_employees_version
+from .recompute import RECOMPUTE_CHUNK_SIZE, save_refreshed
+from .services import (
+    DERIVED_FIELDS, INPUT_FIELDS, compute_employee_fields, compute_input_fingerprint, normalize_primes,
+    refresh_employee, to_stored_decimal,
+)
+
+IMPORT_AMOUNT_FIELDS = ('salaire_net', 'avantage_nature', 'avance_salaire', 'saisie_opposition')
+
+
+def _record_inputs(record):
+    """Données saisies d'une ligne d'import (ValueError si la ligne est invalide)"""
+    inputs = {}
+    for name in IMPORT_AMOUNT_FIELDS:
+        value = record.get(name)
+        if name == 'salaire_net' and value in (None, ''):
+            value = record.get('net_salary')
+            if value in (None, ''):
+                raise ValueError("champ obligatoire manquant : salaire_net")
+        try:
+            inputs[name] = to_stored_decimal(value if value not in (None, '') else 0)
+        except (ArithmeticError, TypeError, ValueError):
+            raise ValueError(f"valeur numérique invalide pour '{name}' : {value!r}")
+
+    primes = record.get('primes', record.get('primes_selectionnees'))
+    if primes is None:
+        # Export JSON Lines : primes cochées déduites des montants
+        primes = [prime for prime in EXEMPT_PRIMES if float(record.get(f"prime_{prime}") or 0) > 0]
+    inputs['primes_selectionnees'] = normalize_primes(primes)
+    return inputs
+
+
+def _record_id(record):
+    value = record.get('id')
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"identifiant invalide : {value!r}")
+
+
+def import_employees(records, user, chunk_size=RECOMPUTE_CHUNK_SIZE, on_error=None):
+    """
+    Crée ou met à jour les employés de l'utilisateur à partir des lignes lues.
+    Les lignes invalides sont signalées à on_error(numéro, erreur) puis ignorées.
+    Renvoie {'created', 'updated', 'unchanged', 'errors'}.
+    """
+    stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+    chunk = []
+    for line_number, record in enumerate(records, 1):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("ligne non objet")
+            chunk.append((_record_id(record), record.get('nom_complet'), _record_inputs(record)))
+        except ValueError as error:
+            stats['errors'] += 1
+            if on_error is not None:
+                on_error(line_number, error)
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, user, stats)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, user, stats)
+    return stats
+
+
+def _import_chunk(chunk, user, stats):
+    ids = [employee_id for employee_id, _, _ in chunk if employee_id is not None]
+    # Comparaison des empreintes sans instancier les employés : seules les lignes modifiées sont chargées
+    stored = {
+        employee_id: (fingerprint, nom_complet)
+        for employee_id, fingerprint, nom_complet in Employee.objects.filter(user=user, id__in=ids)
+        .values_list('id', 'input_fingerprint', 'nom_complet')
+    }
+
+    modified = {}
+    new_employees = []
+    for employee_id, nom_complet, inputs in chunk:
+        if employee_id not in stored:
+            values = dict(inputs, **compute_employee_fields(**inputs))
+            new_employees.append(Employee(user=user, nom_complet=nom_complet or '', **values))
+            continue
+        fingerprint, stored_nom = stored[employee_id]
+        if fingerprint == compute_input_fingerprint(**inputs) and nom_complet in (None, stored_nom):
+            stats['unchanged'] += 1
+        else:
+            modified[employee_id] = (nom_complet, inputs)
+
+    changes = []
+    fields = ('id', 'user', 'nom_complet', 'input_fingerprint') + INPUT_FIELDS + DERIVED_FIELDS
+    for employee in Employee.objects.filter(id__in=list(modified)).only(*fields):
+        nom_complet, inputs = modified[employee.pk]
+        changed = [name for name, value in inputs.items() if getattr(employee, name) != value]
+        for name in changed:
+            setattr(employee, name, inputs[name])
+        if nom_complet is not None and nom_complet != employee.nom_complet:
+            employee.nom_complet = nom_complet
+            changed.append('nom_complet')
+        changed += refresh_employee(employee)
+        if changed:
+            stats['updated'] += 1
+            changes.append((employee, changed))
+        else:
+            stats['unchanged'] += 1
+
+    save_refreshed(changes)
+    for employee, changed in changes:
+        audit.record(audit.MODIFICATION, user, employee, audit.field_values(employee, changed))
+    if new_employees:
+        Employee.objects.bulk_create(new_employees)
+        record_salaries(new_employees)
+        audit.record_many(
+            audit.CREATION, user, new_employees,
+            lambda employee: audit.field_values(employee, INPUT_FIELDS),
+        )
+        stats['created'] += len(new_employees)
+        bump_employees_version([user.pk])
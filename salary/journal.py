@@ -0,0 +1,162 @@
+"""
+Écritures comptables de la paie (journal de paie à importer dans la comptabilité).
+
+Chaque composante de la paie (salaire de base, primes, CNSS, RTS, versement
+forfaitaire, taxe d'apprentissage, avances, net à payer) est imputée au compte
+configuré dans settings.PAYROLL_LEDGER_ACCOUNTS (plan SYSCOHADA par défaut).
+Le journal est équilibré : les écarts d'arrondi du solveur (quelques centimes)
+sont portés au compte 'ecart'.
+
+Écritures globales : une somme par colonne calculée par la base (aggregate),
+puis une ligne par compte. Écritures par employé : une requête parcourue en
+flux, écrite au fil de l'eau.
+"""
+import csv
+import io
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Sum
+
+from .exports import EXPORT_CHUNK_SIZE, STREAM_BATCH_SIZE
+from .models import PayrollLine
+from .services import to_stored_decimal
+
+DEBIT = 'debit'
+CREDIT = 'credit'
+
+# Écritures de la paie : (composante, libellé, sens, colonnes additionnées)
+JOURNAL_COMPONENTS = (
+    ('salaire_base', "Salaire de base", DEBIT, ('salaire_base',)),
+    ('primes', "Primes et indemnités", DEBIT, ('primes_taxables', 'primes_exonerees')),
+    ('avantage_nature', "Avantages en nature", DEBIT, ('avantage_nature',)),
+    ('cnss_employe', "CNSS part salariale", CREDIT, ('cnss_employe',)),
+    ('rts', "RTS retenue à la source", CREDIT, ('rts',)),
+    ('avance_salaire', "Avances sur salaire", CREDIT, ('avance_salaire',)),
+    ('saisie_opposition', "Saisies et oppositions", CREDIT, ('saisie_opposition',)),
+    ('salaire_net_a_payer', "Salaires nets à payer", CREDIT, ('salaire_net_a_payer',)),
+    ('charge_cnss_employeur', "CNSS part patronale", DEBIT, ('cnss_employeur',)),
+    ('cnss_employeur', "CNSS part patronale", CREDIT, ('cnss_employeur',)),
+    ('charge_versement_forfaitaire', "Versement forfaitaire", DEBIT, ('versement_forfaitaire',)),
+    ('versement_forfaitaire', "Versement forfaitaire", CREDIT, ('versement_forfaitaire',)),
+    ('charge_taxe_apprentissage', "Taxe d'apprentissage", DEBIT, ('taxe_apprentissage',)),
+    ('taxe_apprentissage', "Taxe d'apprentissage", CREDIT, ('taxe_apprentissage',)),
+)
+
+# Comptes par composante (plan SYSCOHADA), 'ecart' : écarts d'arrondi (compte d'attente)
+DEFAULT_LEDGER_ACCOUNTS = {
+    'salaire_base': '6611',
+    'primes': '6612',
+    'avantage_nature': '6617',
+    'cnss_employe': '4311',
+    'rts': '4472',
+    'avance_salaire': '4211',
+    'saisie_opposition': '4231',
+    'salaire_net_a_payer': '4221',
+    'charge_cnss_employeur': '6641',
+    'cnss_employeur': '4311',
+    'charge_versement_forfaitaire': '6413',
+    'versement_forfaitaire': '4421',
+    'charge_taxe_apprentissage': '6414',
+    'taxe_apprentissage': '4421',
+    'ecart': '4710',
+}
+
+JOURNAL_HEADERS = ("Journal", "Date", "Pièce", "Compte", "Libellé", "Débit", "Crédit", "Employé")
+
+# Colonnes lues par le journal (mêmes noms dans Employee et PayrollLine)
+JOURNAL_FIELDS = tuple(dict.fromkeys(field for *_, fields in JOURNAL_COMPONENTS for field in fields))
+
+ZERO = Decimal('0.00')
+
+
+def get_ledger_accounts():
+    """Comptes configurés (settings.PAYROLL_LEDGER_ACCOUNTS complète les comptes par défaut)"""
+    return dict(DEFAULT_LEDGER_ACCOUNTS, **getattr(settings, 'PAYROLL_LEDGER_ACCOUNTS', {}))
+
+
+def journal_entries(amounts, accounts=None):
+    """
+    Écritures équilibrées pour des montants {colonne: Decimal} (un employé ou les totaux) :
+    liste de (compte, libellé, débit, crédit), une ligne par compte et par sens, les
+    composantes nulles omises, l'écart éventuel entre débits et crédits porté au compte 'ecart'.
+    """
+    accounts = accounts or get_ledger_accounts()
+    lines = {}
+    debits = credits = ZERO
+    for component, label, side, fields in JOURNAL_COMPONENTS:
+        amount = sum((amounts[field] for field in fields), ZERO)
+        if not amount:
+            continue
+        key = (accounts[component], side)
+        if key in lines:
+            labels, total = lines[key]
+            lines[key] = (labels if label in labels else labels + [label], total + amount)
+        else:
+            lines[key] = ([label], amount)
+        if side == DEBIT:
+            debits += amount
+        else:
+            credits += amount
+
+    entries = [
+        (account, ' / '.join(labels), amount if side == DEBIT else ZERO, amount if side == CREDIT else ZERO)
+        for (account, side), (labels, amount) in lines.items()
+    ]
+    if debits != credits:
+        difference = debits - credits
+        entries.append((
+            accounts['ecart'], "Écart d'arrondi",
+            ZERO if difference > 0 else -difference, difference if difference > 0 else ZERO,
+        ))
+    return entries
+
+
+def journal_totals(queryset):
+    """Totaux des colonnes du journal, calculés en base (une requête)"""
+    totals = queryset.aggregate(**{f"total_{field}": Sum(field) for field in JOURNAL_FIELDS})
+    return {field: to_stored_decimal(totals[f"total_{field}"]) for field in JOURNAL_FIELDS}
+
+
+def _employee_amounts(queryset, chunk_size):
+    id_field = 'employee_id' if queryset.model is PayrollLine else 'id'
+    rows = queryset.order_by(id_field).values_list(id_field, 'nom_complet', *JOURNAL_FIELDS)
+    for employee_id, nom_complet, *values in rows.iterator(chunk_size=chunk_size):
+        yield employee_id, nom_complet, dict(zip(JOURNAL_FIELDS, values))
+
+
+def _amount(value):
+    return value if value else ''
+
+
+def stream_journal_csv(queryset, per_employee=False, date=None, piece='', journal=None,
+                       chunk_size=EXPORT_CHUNK_SIZE, batch_size=STREAM_BATCH_SIZE):
+    """
+    Génère le journal de paie au format CSV par blocs. queryset : lignes d'une période
+    (period.lines) ou employés. Par défaut une écriture par compte (totaux calculés en
+    base) ; avec per_employee, les écritures de chaque employé, chacune équilibrée.
+    Code journal par défaut : settings.PAYROLL_JOURNAL_CODE.
+    """
+    journal = journal or getattr(settings, 'PAYROLL_JOURNAL_CODE', 'PAIE')
+    accounts = get_ledger_accounts()
+    date = date.strftime('%d/%m/%Y') if date else ''
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerow(JOURNAL_HEADERS)
+
+    if not per_employee:
+        for account, label, debit, credit in journal_entries(journal_totals(queryset), accounts):
+            writer.writerow((journal, date, piece, account, label, _amount(debit), _amount(credit), ''))
+        yield buffer.getvalue()
+        return
+
+    for count, (employee_id, nom_complet, amounts) in enumerate(_employee_amounts(queryset, chunk_size), 1):
+        for account, label, debit, credit in journal_entries(amounts, accounts):
+            writer.writerow((
+                journal, date, piece, account, f"{label} - {nom_complet}", _amount(debit), _amount(credit), employee_id,
+            ))
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,109 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from salary.models import User
+
+ENDPOINTS = {
+    'calculate': ('post', 'api_calculate'),
+    'employees': ('get', 'api_employees'),
+    'export-status': ('get', 'api_export_status'),
+}
+
+CALCULATE_PAYLOAD = {
+    'nom_complet': 'Benchmark',
+    'net_salary': '4500000',
+    'avantage_nature': '0',
+    'avance_salaire': '0',
+    'saisie_opposition': '0',
+}
+
+
+# Mesure en processus, sans serveur ni réseau : les mêmes vues asynchrones appelées par le client de test
+# synchrone (un thread par requête, vue exécutée via async_to_sync) puis par le client asynchrone (une seule
+# boucle asyncio). Pour comparer des déploiements WSGI et ASGI, charger un vrai serveur avec un outil externe.
+class Command(BaseCommand):
+    help = "Compare en processus les API de paie appelées par threads (client synchrone) et par asyncio (client asynchrone)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Email de l'utilisateur utilisé pour les requêtes")
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='calculate')
+        parser.add_argument('--requests', type=int, default=200, help="Nombre total de requêtes")
+        parser.add_argument('--concurrency', type=int, default=50, help="Nombre de clients simultanés")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        method, url_name = ENDPOINTS[options['endpoint']]
+        url = reverse(url_name)
+        data = CALCULATE_PAYLOAD if method == 'post' else None
+
+        # Une seule session partagée par tous les clients simulés
+        client = Client()
+        client.force_login(user)
+        cookies = client.cookies
+
+        total = options['requests']
+        concurrency = options['concurrency']
+
+        # Les clients de test s'annoncent comme 'testserver'
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            thread_timings, thread_elapsed = self._run_threads(cookies, method, url, data, total, concurrency)
+            async_timings, async_elapsed = asyncio.run(self._run_async(cookies, method, url, data, total, concurrency))
+
+        self.stdout.write(f"Endpoint {url} — {total} requêtes, {concurrency} clients simultanés (en processus)")
+        self._report('Threads', thread_timings, thread_elapsed)
+        self._report('Asyncio', async_timings, async_elapsed)
+
+    def _run_threads(self, cookies, method, url, data, total, concurrency):
+        def one_request(_):
+            client = Client()
+            client.cookies = cookies
+            start = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            self._check(response)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(one_request, range(total)))
+        return timings, time.perf_counter() - start
+
+    async def _run_async(self, cookies, method, url, data, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one_request():
+            async with semaphore:
+                client = AsyncClient()
+                client.cookies = cookies
+                start = time.perf_counter()
+                response = await getattr(client, method)(url, data)
+                self._check(response)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(one_request() for _ in range(total)))
+        return timings, time.perf_counter() - start
+
+    def _check(self, response):
+        if response.status_code != 200:
+            raise CommandError(f"Réponse inattendue : HTTP {response.status_code}")
+
+    def _report(self, label, timings, elapsed):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+        self.stdout.write(
+            f"  {label:<16} {len(timings) / elapsed:8.1f} req/s   "
+            f"p50 {statistics.median(timings) * 1000:7.1f} ms   "
+            f"p95 {p95 * 1000:7.1f} ms"
+        )
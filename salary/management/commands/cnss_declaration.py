@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from salary import audit, cnss_declaration
+from salary.models import Employee, PayrollPeriod, User
+from salary.payroll_periods import parse_period
+
+
+class Command(BaseCommand):
+    help = "Génère la déclaration CNSS (lignes par employé et totaux) au format CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Email de l'utilisateur")
+        parser.add_argument('--period', help="Paie AAAA-MM à déclarer (montants actuels des employés si absent)")
+        parser.add_argument('--output', '-o', help="Fichier de sortie (sortie standard si absent)")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        if options['period']:
+            try:
+                annee, mois = parse_period(options['period'])
+                lines = PayrollPeriod.objects.get(user=user, annee=annee, mois=mois).lines.all()
+            except ValueError as error:
+                raise CommandError(str(error))
+            except PayrollPeriod.DoesNotExist:
+                raise CommandError(f"Paie introuvable : {options['period']}")
+        else:
+            lines = Employee.objects.filter(user=user)
+
+        chunks = cnss_declaration.stream_declaration_csv(lines)
+        audit.record(audit.EXPORT, user, details={'commande': 'cnss_declaration', 'fichier': options['output'] or ''})
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Déclaration écrite dans {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,79 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from salary import audit, bank_transfer
+from salary.models import Employee, PayrollPeriod, User
+from salary.payroll_periods import parse_period
+
+
+class Command(BaseCommand):
+    help = "Génère le fichier de virements du salaire net à payer (CSV ou format fixe)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Email de l'utilisateur")
+        parser.add_argument('--period', help="Paie AAAA-MM à virer (montants actuels des employés si absent)")
+        parser.add_argument('--format', choices=sorted(bank_transfer.TRANSFER_FORMATS), default=bank_transfer.FORMAT_CSV)
+        parser.add_argument('--date', help="Date d'exécution AAAA-MM-JJ (aujourd'hui par défaut)")
+        parser.add_argument('--reference', default='', help="Référence de la remise")
+        parser.add_argument('--libelle', default='SALAIRE', help="Libellé des virements")
+        parser.add_argument('--output', '-o', help="Fichier de sortie (sortie standard si absent)")
+        parser.add_argument('--skip-missing', action='store_true',
+                            help="Paie d'une période : générer le fichier sans les lignes sans compte bancaire")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+        try:
+            date_execution = (
+                datetime.date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+            )
+        except ValueError:
+            raise CommandError(f"Date invalide : {options['date']}")
+
+        if options['period']:
+            try:
+                annee, mois = parse_period(options['period'])
+                period = PayrollPeriod.objects.get(user=user, annee=annee, mois=mois)
+            except ValueError as error:
+                raise CommandError(str(error))
+            except PayrollPeriod.DoesNotExist:
+                raise CommandError(f"Paie introuvable : {options['period']}")
+            payments = bank_transfer.period_payments_queryset(period)
+            missing = bank_transfer.period_missing_accounts(period).count()
+            if missing and not options['skip_missing']:
+                raise CommandError(
+                    f"{missing} ligne(s) de la paie {period} sans compte bancaire (employé supprimé ou numéro "
+                    f"de compte non renseigné) ; --skip-missing pour générer le fichier sans elles"
+                )
+            if missing:
+                self.stderr.write(self.style.WARNING(f"{missing} ligne(s) de la paie sans compte bancaire ignorée(s)"))
+        else:
+            employees = Employee.objects.filter(user=user)
+            payments = bank_transfer.payments_queryset(employees)
+            missing = bank_transfer.missing_accounts(employees).count()
+            if missing:
+                self.stderr.write(self.style.WARNING(f"{missing} employé(s) à payer sans numéro de compte ignoré(s)"))
+
+        chunks = bank_transfer.stream_transfer_file(
+            payments,
+            transfer_format=options['format'],
+            date_execution=date_execution,
+            reference=options['reference'],
+            libelle=options['libelle'],
+        )
+        audit.record(audit.EXPORT, user, details={'commande': 'export_bank_transfer', 'fichier': options['output'] or ''})
+        encoding = 'ascii' if options['format'] == bank_transfer.FORMAT_FIXED else 'utf-8'
+        try:
+            if options['output']:
+                with open(options['output'], 'w', encoding=encoding, newline='') as output:
+                    output.writelines(chunks)
+                self.stderr.write(self.style.SUCCESS(f"Fichier de virements écrit dans {options['output']}"))
+            else:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending='')
+        except ValueError as error:
+            raise CommandError(str(error))
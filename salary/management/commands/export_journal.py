@@ -0,0 +1,57 @@
+import calendar
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from salary import audit, journal
+from salary.models import Employee, PayrollPeriod, User
+from salary.payroll_periods import parse_period
+
+
+class Command(BaseCommand):
+    help = "Exporte les écritures comptables de la paie (journal de paie CSV)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Email de l'utilisateur")
+        parser.add_argument('--period', help="Paie AAAA-MM (montants actuels des employés si absent)")
+        parser.add_argument('--per-employee', action='store_true', help="Écritures détaillées par employé")
+        parser.add_argument('--piece', default='', help="Numéro de pièce")
+        parser.add_argument('--journal', help="Code journal (settings.PAYROLL_JOURNAL_CODE par défaut)")
+        parser.add_argument('--output', '-o', help="Fichier de sortie (sortie standard si absent)")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        if options['period']:
+            try:
+                annee, mois = parse_period(options['period'])
+                period = PayrollPeriod.objects.get(user=user, annee=annee, mois=mois)
+            except ValueError as error:
+                raise CommandError(str(error))
+            except PayrollPeriod.DoesNotExist:
+                raise CommandError(f"Paie introuvable : {options['period']}")
+            lines = period.lines.all()
+            date = datetime.date(annee, mois, calendar.monthrange(annee, mois)[1])
+        else:
+            lines = Employee.objects.filter(user=user)
+            date = timezone.localdate()
+
+        chunks = journal.stream_journal_csv(
+            lines,
+            per_employee=options['per_employee'],
+            date=date,
+            piece=options['piece'],
+            journal=options['journal'],
+        )
+        audit.record(audit.EXPORT, user, details={'commande': 'export_journal', 'fichier': options['output'] or ''})
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Journal écrit dans {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
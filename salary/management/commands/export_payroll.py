@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from salary import audit
+from salary.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS
+from salary.models import Employee, User
+
+
+class Command(BaseCommand):
+    help = "Exporte la paie des employés en CSV ou JSON Lines (fichier ou sortie standard)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--user', help="Email de l'utilisateur (tous les employés si absent)")
+        parser.add_argument('--output', '-o', help="Fichier de sortie (sortie standard si absent)")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.order_by('id')
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+                employees = employees.filter(user=user)
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        stream = EXPORT_FORMATS[options['format']][0]
+        chunks = stream(employees, chunk_size=options['chunk_size'])
+
+        audit.record(audit.EXPORT, user, details={'commande': 'export_payroll', 'fichier': options['output'] or ''})
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Export écrit dans {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from salary.engine.pipeline import READERS
+from salary.importers import import_employees
+from salary.models import User
+from salary.recompute import RECOMPUTE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des employés depuis un fichier CSV ou JSON Lines : les lignes avec un id existant "
+        "sont mises à jour (ignorées si rien n'a changé), les autres sont créées"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Fichier à importer ('-' pour l'entrée standard)")
+        parser.add_argument('--user', required=True, help="Email de l'utilisateur propriétaire des employés")
+        parser.add_argument('--format', choices=sorted(READERS), help="Format du fichier (déduit de l'extension si absent)")
+        parser.add_argument('--chunk-size', type=int, default=RECOMPUTE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        input_format = options['format'] or ('csv' if options['file'].endswith('.csv') else 'jsonl')
+
+        def report(line_number, error):
+            self.stderr.write(f"ligne {line_number} ignorée : {error}")
+
+        if options['file'] == '-':
+            stats = import_employees(READERS[input_format](sys.stdin), user, options['chunk_size'], report)
+        else:
+            with open(options['file'], encoding='utf-8', newline='') as stream:
+                stats = import_employees(READERS[input_format](stream), user, options['chunk_size'], report)
+
+        self.stdout.write(
+            f"{stats['created']} créé(s), {stats['updated']} mis à jour, "
+            f"{stats['unchanged']} inchangé(s), {stats['errors']} ligne(s) en erreur"
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from salary.models import PayrollPeriod, User
+from salary.payroll_periods import close_period, parse_period, prepare_period
+
+
+class Command(BaseCommand):
+    help = "Prépare (copie des montants actuels des employés) ou clôture la paie d'un mois"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['prepare', 'close'])
+        parser.add_argument('period', help="Période au format AAAA-MM")
+        parser.add_argument('--user', required=True, help="Email de l'utilisateur")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+        try:
+            annee, mois = parse_period(options['period'])
+            if options['action'] == 'prepare':
+                period, count = prepare_period(user, annee, mois)
+                self.stdout.write(self.style.SUCCESS(f"Paie {period} préparée : {count} employé(s)"))
+            else:
+                period = close_period(PayrollPeriod.objects.get(user=user, annee=annee, mois=mois))
+                self.stdout.write(self.style.SUCCESS(f"Paie {period} clôturée"))
+        except PayrollPeriod.DoesNotExist:
+            raise CommandError(f"Paie introuvable : {options['period']}")
+        except ValueError as error:
+            raise CommandError(str(error))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from salary.annual import rebuild_annual_summaries
+from salary.models import PayrollPeriod, User
+
+
+class Command(BaseCommand):
+    help = "Recalcule les cumuls annuels par employé à partir des périodes de paie clôturées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Email de l'utilisateur (tous les utilisateurs si absent)")
+        parser.add_argument('--year', type=int, help="Année (toutes les années clôturées si absent)")
+
+    def handle(self, *args, **options):
+        periods = PayrollPeriod.objects.filter(statut=PayrollPeriod.STATUT_CLOTUREE)
+        if options['user']:
+            try:
+                periods = periods.filter(user=User.objects.get(email=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur introuvable : {options['user']}")
+        if options['year']:
+            periods = periods.filter(annee=options['year'])
+
+        targets = periods.order_by('user_id', 'annee').values_list('user_id', 'annee').distinct()
+        users = User.objects.in_bulk({user_id for user_id, _ in targets})
+        for user_id, annee in targets:
+            count = rebuild_annual_summaries(users[user_id], annee)
+            self.stdout.write(f"{users[user_id].email} {annee} : {count} cumul(s)")
+        self.stdout.write(self.style.SUCCESS("Cumuls annuels recalculés"))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from salary.models import Employee, User
+from salary.recompute import RECOMPUTE_CHUNK_SIZE, recompute_employees
+
+
+class Command(BaseCommand):
+    help = "Recalcule les employés dont les données saisies ou les règles de calcul ont changé"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Email de l'utilisateur (tous les employés si absent)")
+        parser.add_argument('--force', action='store_true', help="Recalcule toutes les lignes, même inchangées")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche ce qui changerait sans rien enregistrer")
+        parser.add_argument('--chunk-size', type=int, default=RECOMPUTE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        employees = Employee.objects.all()
+        if options['user']:
+            try:
+                employees = employees.filter(user=User.objects.get(email=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        started = time.perf_counter()
+        stats = recompute_employees(
+            employees, force=options['force'], dry_run=options['dry_run'], chunk_size=options['chunk_size']
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{stats['examined']} employé(s) examiné(s), {stats['unchanged']} inchangé(s), "
+            f"{stats['recomputed']} recalculé(s), {stats['updated']} modifié(s) en {elapsed:.2f} s"
+        )
+        for name, count in stats['fields'].most_common():
+            self.stdout.write(f"  {name:<24}{count:>8}")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Simulation : aucune modification enregistrée"))
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from salary import reconciliation
+from salary.engine.pipeline import READERS
+from salary.models import PayrollPeriod, User
+from salary.payroll_periods import parse_period
+
+
+class Command(BaseCommand):
+    help = "Rapproche deux paies (périodes enregistrées ou exports) : ajouts, départs et écarts par employé"
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--periods', nargs=2, metavar=('AVANT', 'APRES'), help="Deux périodes AAAA-MM (avec --user)")
+        source.add_argument('--files', nargs=2, metavar=('AVANT', 'APRES'), help="Deux exports triés par identifiant")
+        parser.add_argument('--user', help="Email de l'utilisateur (obligatoire avec --periods)")
+        parser.add_argument('--format', choices=sorted(READERS), default='csv', help="Format des exports")
+        parser.add_argument('--threshold', action='append', default=[], metavar='COLONNE=GNF',
+                            help="Seuil d'écart absolu d'une colonne (répétable, 1 GNF par défaut)")
+        parser.add_argument('--relative', type=float, help="Écart relatif minimal signalé (ex. 0.1 pour 10%%)")
+        parser.add_argument('--all', action='store_true', help="Inclure les employés identiques dans le fichier")
+        parser.add_argument('--output', '-o', help="Fichier CSV des écarts (sortie standard si absent)")
+
+    def _thresholds(self, values):
+        thresholds = dict(reconciliation.DEFAULT_THRESHOLDS)
+        for value in values:
+            field, _, amount = value.partition('=')
+            if field not in thresholds:
+                raise CommandError(f"Colonne inconnue : {field} (choix : {', '.join(thresholds)})")
+            try:
+                thresholds[field] = float(amount)
+            except ValueError:
+                raise CommandError(f"Seuil invalide : {value}")
+        return thresholds
+
+    def _period(self, user, value):
+        try:
+            annee, mois = parse_period(value)
+            return PayrollPeriod.objects.get(user=user, annee=annee, mois=mois)
+        except ValueError as error:
+            raise CommandError(str(error))
+        except PayrollPeriod.DoesNotExist:
+            raise CommandError(f"Paie introuvable : {value}")
+
+    def handle(self, *args, **options):
+        thresholds = self._thresholds(options['threshold'])
+        files = []
+        if options['periods']:
+            if not options['user']:
+                raise CommandError("--user est obligatoire avec --periods")
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur introuvable : {options['user']}")
+            before, after = (reconciliation.period_rows(self._period(user, value)) for value in options['periods'])
+        else:
+            try:
+                files = [open(path, encoding='utf-8-sig', newline='') for path in options['files']]
+            except OSError as error:
+                raise CommandError(str(error))
+            read = READERS[options['format']]
+            before, after = (reconciliation.snapshot_rows(read(stream)) for stream in files)
+
+        rows = reconciliation.reconcile(before, after, thresholds=thresholds, relative=options['relative'])
+        chunks = reconciliation.stream_reconciliation_csv(self._counting(rows), include_unchanged=options['all'])
+        self.statuses = dict.fromkeys(reconciliation.STATUSES, 0)
+        try:
+            if options['output']:
+                with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                    output.writelines(chunks)
+            else:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending='')
+        except ValueError as error:
+            raise CommandError(str(error))
+        finally:
+            for stream in files:
+                stream.close()
+
+        self.stderr.write(
+            f"{self.statuses['ajoute']} ajouté(s), {self.statuses['supprime']} supprimé(s), "
+            f"{self.statuses['modifie']} modifié(s), {self.statuses['identique']} identique(s)"
+        )
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f"Rapprochement écrit dans {options['output']}"))
+
+    def _counting(self, rows):
+        for row in rows:
+            self.statuses[row['statut']] += 1
+            yield row
@@ -0,0 +1,77 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from salary.engine import sweep
+from salary.engine.vectorized import EXEMPT_PRIMES_COEFFICIENTS
+
+
+class Command(BaseCommand):
+    help = "Simule coût employeur, RTS, CNSS et taux effectif sur une plage de salaires nets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=float, default=sweep.SWEEP_START)
+        parser.add_argument('--stop', type=float, default=sweep.SWEEP_STOP)
+        parser.add_argument('--step', type=float, default=sweep.SWEEP_STEP)
+        parser.add_argument(
+            '--primes', action='append', default=None,
+            help="Configuration de primes exonérées, ex. 'retraite,interim' (répétable, '' pour aucune)",
+        )
+        parser.add_argument('--avantage-nature', type=float, default=0)
+        parser.add_argument('--format', choices=('csv', 'json'), default='csv')
+        parser.add_argument('--breakpoints', action='store_true', help="N'affiche que les points de rupture")
+        parser.add_argument('--output', '-o', help="Fichier de sortie (sortie standard si absent)")
+
+    def handle(self, *args, **options):
+        configurations = []
+        for value in options['primes'] or ['']:
+            primes = [prime.strip() for prime in value.split(',') if prime.strip()]
+            unknown = set(primes) - set(EXEMPT_PRIMES_COEFFICIENTS)
+            if unknown:
+                raise CommandError(f"Primes exonérées inconnues : {', '.join(sorted(unknown))}")
+            configurations.append(primes)
+
+        try:
+            nets = sweep.sweep_nets(options['start'], options['stop'], options['step'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        series = [
+            (primes, sweep.compact(sweep.salary_sweep(nets, primes, options['avantage_nature'])))
+            for primes in configurations
+        ]
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                self._write(output, nets, series, options)
+            self.stderr.write(self.style.SUCCESS(f"Simulation écrite dans {options['output']}"))
+        else:
+            self._write(self.stdout, nets, series, options)
+
+    def _write(self, output, nets, series, options):
+        if options['format'] == 'json':
+            data = {
+                'net': sweep.compact({'net': nets})['net'],
+                'series': [dict(primes=primes, **values) for primes, values in series],
+            }
+            if options['breakpoints']:
+                data = [{'primes': primes, 'breakpoints': values['breakpoints']} for primes, values in series]
+            output.write(json.dumps(data, ensure_ascii=False))
+            output.write('\n')
+            return
+
+        writer = csv.writer(output)
+        if options['breakpoints']:
+            writer.writerow(['primes', 'net', 'kind', 'label'])
+            for primes, values in series:
+                for point in values['breakpoints']:
+                    writer.writerow([','.join(primes), point['net'], point['kind'], point['label']])
+            return
+
+        columns = [key for key in next(iter(series))[1] if key != 'breakpoints']
+        writer.writerow(['primes', 'salaire_net'] + columns)
+        for primes, values in series:
+            label = ','.join(primes)
+            for i, net in enumerate(values['net']):
+                writer.writerow([label, net] + [values[key][i] for key in columns])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from salary.models import PayrollPeriod, User
+from salary.payroll_periods import parse_period
+from salary.snapshots import write_snapshot
+
+
+class Command(BaseCommand):
+    help = "Écrit (ou réécrit) les instantanés en colonnes des périodes de paie clôturées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Email de l'utilisateur (tous les utilisateurs si absent)")
+        parser.add_argument('--period', help="Période AAAA-MM (toutes les périodes clôturées si absent)")
+
+    def handle(self, *args, **options):
+        periods = PayrollPeriod.objects.filter(statut=PayrollPeriod.STATUT_CLOTUREE).select_related('user')
+        if options['user']:
+            try:
+                periods = periods.filter(user=User.objects.get(email=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur introuvable : {options['user']}")
+        if options['period']:
+            try:
+                annee, mois = parse_period(options['period'])
+            except ValueError as error:
+                raise CommandError(str(error))
+            periods = periods.filter(annee=annee, mois=mois)
+
+        for period in periods.order_by('user_id', 'annee', 'mois'):
+            path = write_snapshot(period)
+            self.stdout.write(f"{period.user.email} {period} : {path}")
+        self.stdout.write(self.style.SUCCESS("Instantanés écrits"))
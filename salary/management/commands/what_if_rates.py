@@ -0,0 +1,64 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from salary import what_if
+from salary.engine.rates import RateSchedule
+from salary.models import Employee, User
+
+
+class Command(BaseCommand):
+    help = "Mesure l'impact d'un barème candidat (CNSS, RTS...) sur tous les employés, sans rien enregistrer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('rates', help="Fichier JSON du barème candidat ('-' pour l'entrée standard)")
+        parser.add_argument('--keep', choices=what_if.KEEP_CHOICES, default=what_if.KEEP_GROSS,
+                            help="gross : salaire de base maintenu ; net : net garanti")
+        parser.add_argument('--user', help="Email de l'utilisateur (tous les employés si absent)")
+        parser.add_argument('--output', '-o', help="Fichier CSV du détail par employé")
+        parser.add_argument('--top', type=int, default=10, help="Nombre de plus forts écarts affichés")
+
+    def handle(self, *args, **options):
+        try:
+            if options['rates'] == '-':
+                data = json.load(sys.stdin)
+            else:
+                with open(options['rates'], encoding='utf-8') as rates_file:
+                    data = json.load(rates_file)
+            candidate = RateSchedule.from_dict(data)
+        except (OSError, ValueError, TypeError, KeyError) as error:
+            raise CommandError(f"Barème invalide : {error}")
+
+        employees = Employee.objects.all()
+        if options['user']:
+            try:
+                employees = employees.filter(user=User.objects.get(email=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        workforce = what_if.load_workforce(employees)
+        impact = what_if.compare_rates(workforce, candidate, options['keep'])
+        summary = what_if.summarize(impact)
+
+        self.stdout.write(f"Barème candidat {candidate.version} — {summary['employes']} employé(s)")
+        self.stdout.write(f"{'Montant':<22}{'Actuel':>18}{'Candidat':>18}{'Écart':>16}{'Hausses':>9}{'Baisses':>9}")
+        for name, _ in what_if.IMPACT_METRICS + (('salaire_net_a_payer', None),):
+            metric = summary[name]
+            self.stdout.write(
+                f"{name:<22}{metric['avant']:>18,.0f}{metric['apres']:>18,.0f}{metric['ecart']:>+16,.0f}"
+                f"{metric['hausses']:>9}{metric['baisses']:>9}"
+            )
+
+        if options['top']:
+            self.stdout.write("\nPlus forts écarts de coût employeur :")
+            for row in what_if.iter_impact_rows(workforce, impact, limit=options['top']):
+                self.stdout.write(
+                    f"  #{row['id']:<8} {row['nom_complet'][:30]:<30} net {row['salaire_net_ecart']:>+12,.0f}"
+                    f"  RTS {row['rts_ecart']:>+12,.0f}  coût {row['cout_employeur_ecart']:>+12,.0f}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(what_if.stream_impact_csv(workforce, impact))
+            self.stderr.write(self.style.SUCCESS(f"Détail écrit dans {options['output']}"))
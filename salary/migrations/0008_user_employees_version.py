@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0007_employee_avantage_nature_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='employees_modified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Employés modifiés le'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='employees_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Version des employés'),
+        ),
+    ]
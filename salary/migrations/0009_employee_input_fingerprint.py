@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-19 06:32
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
+
+
+def fill_primes_selectionnees(apps, schema_editor):
+    """Déduit les primes exonérées cochées des montants enregistrés"""
+    Employee = apps.get_model('salary', 'Employee')
+    for prime in ('retraite', 'interim', 'anciennete', 'responsabilite'):
+        Employee.objects.filter(**{f"prime_{prime}__gt": 0}).update(
+            primes_selectionnees=Concat('primes_selectionnees', Value(f",{prime}"))
+        )
+    Employee.objects.filter(primes_selectionnees__startswith=',').update(
+        primes_selectionnees=Substr('primes_selectionnees', 2)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0008_user_employees_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='input_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40, verbose_name='Empreinte des données saisies'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='primes_selectionnees',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Primes exonérées sélectionnées'),
+        ),
+        migrations.RunPython(fill_primes_selectionnees, migrations.RunPython.noop),
+    ]
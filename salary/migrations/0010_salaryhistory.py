@@ -0,0 +1,72 @@
+# Generated by Django 5.1.1 on 2026-10-19 06:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+HISTORY_FIELDS = (
+    'salaire_net', 'primes_selectionnees', 'avantage_nature', 'avance_salaire', 'saisie_opposition',
+    'salaire_base', 'salaire_brut', 'salaire_imposable', 'primes_taxables', 'primes_exonerees',
+    'cnss_employe', 'rts', 'cnss_employeur', 'versement_forfaitaire', 'taxe_apprentissage',
+    'total_cnss_patronal', 'salaire_net_a_payer',
+)
+
+
+def create_initial_history(apps, schema_editor):
+    """Rémunération actuelle de chaque employé, en vigueur depuis sa date de création"""
+    Employee = apps.get_model('salary', 'Employee')
+    SalaryHistory = apps.get_model('salary', 'SalaryHistory')
+    batch = []
+    rows = Employee.objects.order_by('id').values('id', 'date_creation', *HISTORY_FIELDS).iterator(chunk_size=2000)
+    for row in rows:
+        employee_id = row.pop('id')
+        effective_from = timezone.localdate(row.pop('date_creation'))
+        batch.append(SalaryHistory(employee_id=employee_id, effective_from=effective_from, **row))
+        if len(batch) >= 2000:
+            SalaryHistory.objects.bulk_create(batch)
+            batch = []
+    SalaryHistory.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0009_employee_input_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalaryHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('effective_from', models.DateField(verbose_name="Date d'effet")),
+                ('date_creation', models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date d'enregistrement")),
+                ('salaire_net', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire net souhaité')),
+                ('primes_selectionnees', models.CharField(blank=True, default='', max_length=100, verbose_name='Primes exonérées sélectionnées')),
+                ('avantage_nature', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Avantage en nature')),
+                ('avance_salaire', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Avance sur salaire')),
+                ('saisie_opposition', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Saisie et opposition')),
+                ('salaire_base', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire de base calculé')),
+                ('salaire_brut', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire brut calculé')),
+                ('salaire_imposable', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire imposable calculé')),
+                ('primes_taxables', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Primes taxables')),
+                ('primes_exonerees', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Total primes exonérées')),
+                ('cnss_employe', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='CNSS employé (5%)')),
+                ('rts', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='RTS (Retenue à la Source)')),
+                ('cnss_employeur', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='CNSS employeur (18%)')),
+                ('versement_forfaitaire', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Versement forfaitaire (6%)')),
+                ('taxe_apprentissage', models.DecimalField(decimal_places=2, max_digits=12, verbose_name="Taxe d'apprentissage (2%)")),
+                ('total_cnss_patronal', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Total CNSS patronal')),
+                ('salaire_net_a_payer', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Salaire net à payer')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salary_history', to='salary.employee', verbose_name='Employé')),
+            ],
+            options={
+                'verbose_name': 'Historique de salaire',
+                'verbose_name_plural': 'Historique des salaires',
+                'ordering': ['employee', '-effective_from'],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'effective_from'), name='salary_history_employee_effective_from')],
+            },
+        ),
+        migrations.RunPython(create_initial_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.1 on 2026-10-19 06:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0010_salaryhistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('mois', models.PositiveSmallIntegerField(verbose_name='Mois')),
+                ('statut', models.CharField(choices=[('ouverte', 'Ouverte'), ('cloturee', 'Clôturée')], default='ouverte', max_length=10, verbose_name='Statut')),
+                ('date_creation', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date de création')),
+                ('date_cloture', models.DateTimeField(blank=True, null=True, verbose_name='Date de clôture')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payroll_periods', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Période de paie',
+                'verbose_name_plural': 'Périodes de paie',
+                'ordering': ['-annee', '-mois'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PayrollLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom_complet', models.CharField(max_length=200, verbose_name="Nom complet de l'employé")),
+                ('salaire_net', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire net souhaité')),
+                ('primes_selectionnees', models.CharField(blank=True, default='', max_length=100, verbose_name='Primes exonérées sélectionnées')),
+                ('avantage_nature', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Avantage en nature')),
+                ('avance_salaire', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Avance sur salaire')),
+                ('saisie_opposition', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Saisie et opposition')),
+                ('salaire_base', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire de base calculé')),
+                ('salaire_brut', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire brut calculé')),
+                ('salaire_imposable', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Salaire imposable calculé')),
+                ('primes_taxables', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Primes taxables')),
+                ('primes_exonerees', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Total primes exonérées')),
+                ('cnss_employe', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='CNSS employé (5%)')),
+                ('rts', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='RTS (Retenue à la Source)')),
+                ('total_charges_employee', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Total charges employé')),
+                ('cnss_employeur', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='CNSS employeur (18%)')),
+                ('versement_forfaitaire', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Versement forfaitaire (6%)')),
+                ('taxe_apprentissage', models.DecimalField(decimal_places=2, max_digits=12, verbose_name="Taxe d'apprentissage (2%)")),
+                ('total_cnss_patronal', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Total CNSS patronal')),
+                ('salaire_net_a_payer', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Salaire net à payer')),
+                ('employee', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='payroll_lines', to='salary.employee', verbose_name='Employé')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='salary.payrollperiod', verbose_name='Période')),
+            ],
+            options={
+                'verbose_name': 'Ligne de paie',
+                'verbose_name_plural': 'Lignes de paie',
+                'ordering': ['period', 'employee'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='payrollperiod',
+            constraint=models.UniqueConstraint(fields=('user', 'annee', 'mois'), name='payroll_period_user_annee_mois'),
+        ),
+        migrations.AddConstraint(
+            model_name='payrollline',
+            constraint=models.UniqueConstraint(fields=('period', 'employee'), name='payroll_line_period_employee'),
+        ),
+    ]
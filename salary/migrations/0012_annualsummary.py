@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-19 06:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0011_payrollperiod'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnualSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('nom_complet', models.CharField(max_length=200, verbose_name="Nom complet de l'employé")),
+                ('mois', models.PositiveSmallIntegerField(default=0, verbose_name='Mois payés')),
+                ('salaire_brut', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Salaire brut')),
+                ('salaire_imposable', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Salaire imposable')),
+                ('cnss_employe', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='CNSS employé')),
+                ('cnss_employeur', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='CNSS employeur')),
+                ('rts', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='RTS')),
+                ('versement_forfaitaire', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Versement forfaitaire')),
+                ('taxe_apprentissage', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name="Taxe d'apprentissage")),
+                ('total_cnss_patronal', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total CNSS patronal')),
+                ('salaire_net', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Salaire net')),
+                ('salaire_net_a_payer', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Salaire net à payer')),
+                ('employee', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='annual_summaries', to='salary.employee', verbose_name='Employé')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='annual_summaries', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Cumul annuel',
+                'verbose_name_plural': 'Cumuls annuels',
+                'ordering': ['-annee', 'nom_complet'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'annee', 'employee'), name='annual_summary_user_annee_employee')],
+            },
+        ),
+    ]
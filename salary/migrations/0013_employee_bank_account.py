@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-19 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0012_annualsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='cle_rib',
+            field=models.CharField(blank=True, default='', max_length=2, verbose_name='Clé RIB'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='code_banque',
+            field=models.CharField(blank=True, default='', max_length=5, verbose_name='Code banque'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='code_guichet',
+            field=models.CharField(blank=True, default='', max_length=5, verbose_name='Code guichet'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='numero_compte',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='Numéro de compte'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-19 07:05
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0013_employee_bank_account'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date')),
+                ('action', models.CharField(choices=[('calcul', 'Calcul'), ('creation', 'Création'), ('modification', 'Modification'), ('export', 'Export'), ('suppression', 'Suppression')], max_length=20, verbose_name='Action')),
+                ('rules_version', models.CharField(blank=True, default='', max_length=40, verbose_name='Version des règles')),
+                ('details', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Détails')),
+                ('employee', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='audit_events', to='salary.employee', verbose_name='Employé')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='audit_events', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': "Événement d'audit",
+                'verbose_name_plural': "Journal d'audit",
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['user', 'date'], name='audit_event_user_date'), models.Index(fields=['employee', 'date'], name='audit_event_employee_date'), models.Index(fields=['date'], name='audit_event_date')],
+            },
+        ),
+    ]
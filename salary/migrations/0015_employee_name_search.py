@@ -0,0 +1,90 @@
+# Generated by Django 5.1.1 on 2026-10-19 07:20
+
+from django.db import migrations
+
+# SQLite : index FTS5 à contenu externe (le texte reste dans salary_employee), sans
+# diacritiques, avec index de préfixes de 2 et 3 caractères ; les déclencheurs le
+# tiennent à jour pour toute écriture (save, bulk_create, update et delete en masse)
+SQLITE_SEARCH_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS salary_employee_fts USING fts5(
+        nom_complet, content='salary_employee', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS salary_employee_fts_insert AFTER INSERT ON salary_employee BEGIN
+        INSERT INTO salary_employee_fts(rowid, nom_complet) VALUES (new.id, new.nom_complet);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS salary_employee_fts_delete AFTER DELETE ON salary_employee BEGIN
+        INSERT INTO salary_employee_fts(salary_employee_fts, rowid, nom_complet) VALUES ('delete', old.id, old.nom_complet);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS salary_employee_fts_update AFTER UPDATE OF nom_complet ON salary_employee BEGIN
+        INSERT INTO salary_employee_fts(salary_employee_fts, rowid, nom_complet) VALUES ('delete', old.id, old.nom_complet);
+        INSERT INTO salary_employee_fts(rowid, nom_complet) VALUES (new.id, new.nom_complet);
+    END
+    """,
+    "INSERT INTO salary_employee_fts(salary_employee_fts) VALUES ('rebuild')",
+)
+SQLITE_DROP_SQL = (
+    "DROP TRIGGER IF EXISTS salary_employee_fts_insert",
+    "DROP TRIGGER IF EXISTS salary_employee_fts_delete",
+    "DROP TRIGGER IF EXISTS salary_employee_fts_update",
+    "DROP TABLE IF EXISTS salary_employee_fts",
+)
+
+# PostgreSQL : index trigrammes (recherche partielle) sur le nom en minuscules sans accents.
+# unaccent n'étant pas IMMUTABLE, l'index porte sur une fonction enveloppe qui l'est.
+POSTGRESQL_SEARCH_SQL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    CREATE OR REPLACE FUNCTION salary_search_normalize(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, lower($1)) $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS salary_employee_nom_trgm
+        ON salary_employee USING gin (salary_search_normalize(nom_complet) gin_trgm_ops)
+    """,
+)
+POSTGRESQL_DROP_SQL = (
+    "DROP INDEX IF EXISTS salary_employee_nom_trgm",
+    "DROP FUNCTION IF EXISTS salary_search_normalize(text)",
+)
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_SEARCH_SQL)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_SEARCH_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_DROP_SQL)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0014_auditevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
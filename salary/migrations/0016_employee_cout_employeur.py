@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-19 07:09
+
+from importlib import import_module
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+name_search = import_module('salary.migrations.0015_employee_name_search')
+
+
+def restore_search_triggers(apps, schema_editor):
+    """
+    SQLite ajoute une colonne générée stockée en reconstruisant salary_employee :
+    les déclencheurs de la recherche (0015) disparaissent avec l'ancienne table.
+    Ils sont recréés et l'index FTS reconstruit (identifiants inchangés).
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        name_search.create_search_index(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0015_employee_name_search'),
+    ]
+
+    operations = [
+        # En sens inverse, exécuté après la suppression de la colonne (nouvelle reconstruction)
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='employee',
+            name='cout_employeur',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('salaire_brut'), '+', models.F('total_cnss_patronal')), output_field=models.DecimalField(decimal_places=2, max_digits=13), verbose_name='Coût employeur'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['cout_employeur'], name='employee_cout_employeur'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-19 07:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0016_employee_cout_employeur'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='payrollline',
+            options={'ordering': ['period', 'employee_id'], 'verbose_name': 'Ligne de paie', 'verbose_name_plural': 'Lignes de paie'},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-19 07:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salary', '0017_payrollline_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='salaryhistory',
+            name='employee',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='salary_history', to='salary.employee', verbose_name='Employé'),
+        ),
+    ]
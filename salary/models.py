@@ -1,7 +1,9 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from .engine import calculate_rts_detailed
 import secrets
 import string
 import os
@@ -70,6 +72,19 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name="Mot de passe changé le",
         help_text="Date de la dernière modification du mot de passe"
     )
+    
+    # Version de la liste des employés (incrémentée à chaque création, modification ou suppression)
+    employees_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Version des employés"
+    )
+    employees_modified_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Employés modifiés le"
+    )
 
     objects = CustomUserManager()
 
@@ -96,6 +111,39 @@ class User(AbstractBaseUser, PermissionsMixin):
         self.temporary_password = None
         self.save()
 
+def bump_employees_version(user_ids):
+    """Incrémente la version des employés des utilisateurs donnés (invalide les exports en cache)"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        User.objects.filter(pk__in=user_ids).update(
+            employees_version=models.F('employees_version') + 1,
+            employees_modified_at=timezone.now(),
+        )
+
+class EmployeeQuerySet(models.QuerySet):
+    """QuerySet qui maintient la version des employés lors des opérations en masse"""
+    
+    def _affected_user_ids(self):
+        return set(self.values_list('user_id', flat=True).distinct())
+    
+    def update(self, **kwargs):
+        user_ids = self._affected_user_ids()
+        if 'user' in kwargs or 'user_id' in kwargs:
+            new_user = kwargs.get('user', kwargs.get('user_id'))
+            user_ids.add(getattr(new_user, 'pk', new_user))
+        rows = super().update(**kwargs)
+        bump_employees_version(user_ids)
+        return rows
+    update.alters_data = True
+    
+    def delete(self):
+        user_ids = self._affected_user_ids()
+        result = super().delete()
+        bump_employees_version(user_ids)
+        return result
+    delete.alters_data = True
+    delete.queryset_only = True
+
 class Employee(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Utilisateur", related_name="employees", null=True, blank=True)
     nom_complet = models.CharField(max_length=200, verbose_name="Nom complet de l'employé")
@@ -132,25 +180,302 @@ class Employee(models.Model):
     primes_exonerees = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Total primes exonérées", default=0)
     avantage_nature = models.DecimalField(max_digits=12, decimal_places=2,verbose_name="Avantage en nature", default=0)
     ecart_imposable = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Écart imposable")
+    
+    # Primes exonérées cochées ('retraite,interim'...) : donnée saisie, les montants ci-dessus en découlent
+    primes_selectionnees = models.CharField(max_length=100, blank=True, default='', verbose_name="Primes exonérées sélectionnées")
+    # Empreinte des données saisies et de la version des règles (vide : à recalculer)
+    input_fingerprint = models.CharField(max_length=40, blank=True, default='', editable=False, verbose_name="Empreinte des données saisies")
+
+    # Coordonnées bancaires (virement du salaire net à payer)
+    code_banque = models.CharField(max_length=5, blank=True, default='', verbose_name="Code banque")
+    code_guichet = models.CharField(max_length=5, blank=True, default='', verbose_name="Code guichet")
+    numero_compte = models.CharField(max_length=20, blank=True, default='', verbose_name="Numéro de compte")
+    cle_rib = models.CharField(max_length=2, blank=True, default='', verbose_name="Clé RIB")
+
+    # Calculé et stocké par la base : triable, filtrable et agrégeable sans calcul par ligne en Python
+    cout_employeur = models.GeneratedField(
+        expression=models.F('salaire_brut') + models.F('total_cnss_patronal'),
+        output_field=models.DecimalField(max_digits=13, decimal_places=2),
+        db_persist=True,
+        verbose_name="Coût employeur",
+    )
+
+    objects = EmployeeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Employé"
         verbose_name_plural = "Employés"
         ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['cout_employeur'], name='employee_cout_employeur'),
+        ]
     
     def __str__(self):
         return f"{self.nom_complet} - {self.salaire_net:,.0f} GNF"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        bump_employees_version([self.user_id])
+    
+    def delete(self, *args, **kwargs):
+        user_id = self.user_id
+        result = super().delete(*args, **kwargs)
+        bump_employees_version([user_id])
+        return result
+    
+    @property
+    def selected_primes(self):
+        """Liste des primes exonérées sélectionnées"""
+        return [prime for prime in self.primes_selectionnees.split(',') if prime]
+    
     def get_total_cout_employeur(self):
         """Calcule le coût total pour l'employeur"""
         return self.salaire_brut + self.total_cnss_patronal
     
     def get_rts_details(self):
         """Retourne les détails du calcul RTS pour l'export Excel"""
-        from .utils import calculate_rts_detailed
         _, details = calculate_rts_detailed(self.salaire_imposable)
         return details
 
+class SalaryHistory(models.Model):
+    """
+    Rémunération d'un employé à partir d'une date d'effet (une ligne par changement).
+    La rémunération en vigueur à une date est la ligne de date d'effet la plus récente
+    antérieure ou égale : voir salary.history pour les lectures à date.
+    """
+    # Sans contrainte en base, comme PayrollLine : l'historique survit à la suppression de l'employé
+    employee = models.ForeignKey(
+        Employee, on_delete=models.DO_NOTHING, db_constraint=False, related_name="salary_history", verbose_name="Employé"
+    )
+    effective_from = models.DateField(verbose_name="Date d'effet")
+    date_creation = models.DateTimeField(default=timezone.now, verbose_name="Date d'enregistrement")
+
+    # Données saisies
+    salaire_net = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire net souhaité")
+    primes_selectionnees = models.CharField(max_length=100, blank=True, default='', verbose_name="Primes exonérées sélectionnées")
+    avantage_nature = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Avantage en nature", default=0)
+    avance_salaire = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Avance sur salaire", default=0)
+    saisie_opposition = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Saisie et opposition", default=0)
+
+    # Montants calculés à la date d'effet
+    salaire_base = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire de base calculé")
+    salaire_brut = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire brut calculé")
+    salaire_imposable = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire imposable calculé")
+    primes_taxables = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Primes taxables")
+    primes_exonerees = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Total primes exonérées", default=0)
+    cnss_employe = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="CNSS employé (5%)")
+    rts = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="RTS (Retenue à la Source)")
+    cnss_employeur = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="CNSS employeur (18%)")
+    versement_forfaitaire = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Versement forfaitaire (6%)")
+    taxe_apprentissage = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Taxe d'apprentissage (2%)")
+    total_cnss_patronal = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Total CNSS patronal")
+    salaire_net_a_payer = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire net à payer", default=0)
+
+    class Meta:
+        verbose_name = "Historique de salaire"
+        verbose_name_plural = "Historique des salaires"
+        ordering = ['employee', '-effective_from']
+        constraints = [
+            # Une seule rémunération par employé et par date d'effet ; sert aussi d'index (employee, effective_from)
+            models.UniqueConstraint(fields=['employee', 'effective_from'], name='salary_history_employee_effective_from'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.effective_from:%d/%m/%Y} - {self.salaire_net:,.0f} GNF"
+
+    def get_total_cout_employeur(self):
+        return self.salaire_brut + self.total_cnss_patronal
+
+class PayrollPeriod(models.Model):
+    """
+    Paie mensuelle d'un utilisateur : les montants de ses employés sont figés dans
+    des lignes PayrollLine au moment de la préparation (voir salary.payroll_periods).
+    Une période clôturée n'est plus modifiée.
+    """
+    STATUT_OUVERTE = 'ouverte'
+    STATUT_CLOTUREE = 'cloturee'
+    STATUT_CHOICES = [
+        (STATUT_OUVERTE, "Ouverte"),
+        (STATUT_CLOTUREE, "Clôturée"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="payroll_periods", verbose_name="Utilisateur")
+    annee = models.PositiveSmallIntegerField(verbose_name="Année")
+    mois = models.PositiveSmallIntegerField(verbose_name="Mois")
+    statut = models.CharField(max_length=10, choices=STATUT_CHOICES, default=STATUT_OUVERTE, verbose_name="Statut")
+    date_creation = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
+    date_cloture = models.DateTimeField(null=True, blank=True, verbose_name="Date de clôture")
+
+    class Meta:
+        verbose_name = "Période de paie"
+        verbose_name_plural = "Périodes de paie"
+        ordering = ['-annee', '-mois']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'annee', 'mois'], name='payroll_period_user_annee_mois'),
+        ]
+
+    def __str__(self):
+        return f"{self.mois:02d}/{self.annee}"
+
+    @property
+    def is_closed(self):
+        return self.statut == self.STATUT_CLOTUREE
+
+
+class PayrollLine(models.Model):
+    """Montants d'un employé pour une période de paie"""
+    period = models.ForeignKey(PayrollPeriod, on_delete=models.CASCADE, related_name="lines", verbose_name="Période")
+    # Sans contrainte en base : la ligne garde l'identifiant d'un employé supprimé depuis
+    employee = models.ForeignKey(
+        Employee, on_delete=models.DO_NOTHING, db_constraint=False, related_name="payroll_lines", verbose_name="Employé"
+    )
+    nom_complet = models.CharField(max_length=200, verbose_name="Nom complet de l'employé")
+
+    salaire_net = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire net souhaité")
+    primes_selectionnees = models.CharField(max_length=100, blank=True, default='', verbose_name="Primes exonérées sélectionnées")
+    avantage_nature = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Avantage en nature", default=0)
+    avance_salaire = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Avance sur salaire", default=0)
+    saisie_opposition = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Saisie et opposition", default=0)
+    salaire_base = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire de base calculé")
+    salaire_brut = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire brut calculé")
+    salaire_imposable = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire imposable calculé")
+    primes_taxables = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Primes taxables")
+    primes_exonerees = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Total primes exonérées", default=0)
+    cnss_employe = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="CNSS employé (5%)")
+    rts = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="RTS (Retenue à la Source)")
+    total_charges_employee = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Total charges employé")
+    cnss_employeur = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="CNSS employeur (18%)")
+    versement_forfaitaire = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Versement forfaitaire (6%)")
+    taxe_apprentissage = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Taxe d'apprentissage (2%)")
+    total_cnss_patronal = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Total CNSS patronal")
+    salaire_net_a_payer = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Salaire net à payer", default=0)
+
+    class Meta:
+        verbose_name = "Ligne de paie"
+        verbose_name_plural = "Lignes de paie"
+        # employee_id et non employee : trier sur l'employé joindrait salary_employee et écarterait
+        # les lignes des employés supprimés depuis (clé étrangère sans contrainte)
+        ordering = ['period', 'employee_id']
+        constraints = [
+            # Une ligne par employé et par période ; sert aussi d'index pour les rapprochements triés par employé
+            models.UniqueConstraint(fields=['period', 'employee'], name='payroll_line_period_employee'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} - {self.nom_complet}"
+
+    def get_total_cout_employeur(self):
+        return self.salaire_brut + self.total_cnss_patronal
+
+class AnnualSummary(models.Model):
+    """
+    Cumuls annuels d'un employé sur les périodes de paie clôturées de l'année,
+    mis à jour à chaque clôture (voir salary.annual).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="annual_summaries", verbose_name="Utilisateur")
+    annee = models.PositiveSmallIntegerField(verbose_name="Année")
+    # Sans contrainte en base, comme PayrollLine : les cumuls d'un employé supprimé sont conservés
+    employee = models.ForeignKey(
+        Employee, on_delete=models.DO_NOTHING, db_constraint=False, related_name="annual_summaries", verbose_name="Employé"
+    )
+    nom_complet = models.CharField(max_length=200, verbose_name="Nom complet de l'employé")
+    mois = models.PositiveSmallIntegerField(default=0, verbose_name="Mois payés")
+
+    salaire_brut = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Salaire brut")
+    salaire_imposable = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Salaire imposable")
+    cnss_employe = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="CNSS employé")
+    cnss_employeur = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="CNSS employeur")
+    rts = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="RTS")
+    versement_forfaitaire = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Versement forfaitaire")
+    taxe_apprentissage = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Taxe d'apprentissage")
+    total_cnss_patronal = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total CNSS patronal")
+    salaire_net = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Salaire net")
+    salaire_net_a_payer = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Salaire net à payer")
+
+    class Meta:
+        verbose_name = "Cumul annuel"
+        verbose_name_plural = "Cumuls annuels"
+        ordering = ['-annee', 'nom_complet']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'annee', 'employee'], name='annual_summary_user_annee_employee'),
+        ]
+
+    def __str__(self):
+        return f"{self.annee} - {self.nom_complet}"
+
+    def get_total_cout_employeur(self):
+        return self.salaire_brut + self.total_cnss_patronal
+
+class AuditEventQuerySet(models.QuerySet):
+    """Journal en ajout seul : ni modification ni suppression en masse"""
+
+    def update(self, **kwargs):
+        raise ValueError("Le journal d'audit ne peut pas être modifié")
+    update.alters_data = True
+
+    def delete(self):
+        raise ValueError("Le journal d'audit ne peut pas être supprimé")
+    delete.alters_data = True
+    delete.queryset_only = True
+
+class AuditEvent(models.Model):
+    """
+    Événement du journal d'audit : qui a calculé, créé, modifié, exporté ou supprimé
+    quels employés, avec quelles données et quelle version des règles de calcul.
+    Les événements sont écrits par lots (voir salary.audit) et ne sont jamais modifiés.
+    """
+    ACTION_CALCUL = 'calcul'
+    ACTION_CREATION = 'creation'
+    ACTION_MODIFICATION = 'modification'
+    ACTION_EXPORT = 'export'
+    ACTION_SUPPRESSION = 'suppression'
+    ACTION_CHOICES = [
+        (ACTION_CALCUL, "Calcul"),
+        (ACTION_CREATION, "Création"),
+        (ACTION_MODIFICATION, "Modification"),
+        (ACTION_EXPORT, "Export"),
+        (ACTION_SUPPRESSION, "Suppression"),
+    ]
+
+    date = models.DateTimeField(default=timezone.now, verbose_name="Date")
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name="Action")
+    # Sans contrainte en base : l'événement garde l'identifiant d'un utilisateur ou d'un employé supprimé.
+    # Pas d'index propre : les index (user, date) et (employee, date) les couvrent
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, blank=True,
+        related_name="audit_events", verbose_name="Utilisateur",
+    )
+    employee = models.ForeignKey(
+        Employee, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, blank=True,
+        related_name="audit_events", verbose_name="Employé",
+    )
+    rules_version = models.CharField(max_length=40, blank=True, default='', verbose_name="Version des règles")
+    # Données saisies, champs modifiés, format d'export...
+    details = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Détails")
+
+    objects = AuditEventQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Événement d'audit"
+        verbose_name_plural = "Journal d'audit"
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', 'date'], name='audit_event_user_date'),
+            models.Index(fields=['employee', 'date'], name='audit_event_employee_date'),
+            models.Index(fields=['date'], name='audit_event_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y %H:%M} - {self.get_action_display()}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Le journal d'audit ne peut pas être modifié")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Le journal d'audit ne peut pas être supprimé")
+
 def logo_upload_path(instance, filename):
     """Génère le chemin de téléchargement pour le logo"""
     ext = filename.split('.')[-1]
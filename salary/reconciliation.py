@@ -0,0 +1,199 @@
+"""
+Rapprochement de deux paies : deux périodes enregistrées ou deux exports
+(CSV / JSON Lines, voir salary.exports).
+
+Les deux côtés sont lus en flux, triés par identifiant d'employé, et fusionnés
+ligne à ligne (fusion de listes triées) : aucun des deux n'est chargé en
+mémoire, un rapprochement de 50 000 employés tient en quelques secondes.
+Chaque employé est classé ajouté, supprimé, modifié ou identique ; un écart
+n'est signalé que s'il dépasse le seuil de la colonne.
+"""
+import csv
+import heapq
+import io
+import math
+from bisect import bisect_left
+
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .engine import RTS_BRACKETS
+from .exports import EXPORT_COLUMNS, STREAM_BATCH_SIZE
+
+RECONCILIATION_CHUNK_SIZE = 2000
+
+# Colonnes comparées, dans l'ordre de l'export
+RECONCILIATION_FIELDS = (
+    'salaire_net', 'salaire_base', 'salaire_brut', 'salaire_imposable',
+    'cnss_employe', 'rts', 'cnss_employeur', 'total_cnss_patronal', 'salaire_net_a_payer',
+)
+
+# Écart absolu (GNF) au-delà duquel une colonne est signalée
+DEFAULT_THRESHOLDS = {field: 1.0 for field in RECONCILIATION_FIELDS}
+
+STATUS_ADDED = 'ajoute'
+STATUS_REMOVED = 'supprime'
+STATUS_CHANGED = 'modifie'
+STATUS_UNCHANGED = 'identique'
+STATUSES = (STATUS_ADDED, STATUS_REMOVED, STATUS_CHANGED, STATUS_UNCHANGED)
+
+# Bornes supérieures des tranches RTS (même découpage que vectorized.rts_bracket_index)
+_RTS_UPPERS = [high for _, high, _ in RTS_BRACKETS[:-1]]
+
+
+def rts_bracket(imposable):
+    """Indice (0 = première tranche) de la tranche RTS d'un salaire imposable"""
+    return bisect_left(_RTS_UPPERS, imposable)
+
+
+# =============================
+# SOURCES
+# =============================
+
+def period_rows(period, fields=RECONCILIATION_FIELDS, chunk_size=RECONCILIATION_CHUNK_SIZE):
+    """Lignes (id employé, nom, montants) d'une période, triées par employé"""
+    # Montants convertis en float par la base : pas de Decimal intermédiaire par cellule
+    amounts = [Cast(field, FloatField()) for field in fields]
+    rows = period.lines.order_by('employee_id').values_list('employee_id', 'nom_complet', *amounts)
+    for employee_id, nom_complet, *values in rows.iterator(chunk_size=chunk_size):
+        yield employee_id, nom_complet, tuple(values)
+
+
+# En-têtes de l'export CSV → clés (l'export JSON Lines utilise déjà les clés)
+_EXPORT_KEYS = dict((header, key) for key, header in EXPORT_COLUMNS + (('id', "ID"),))
+
+
+def snapshot_rows(records, fields=RECONCILIATION_FIELDS):
+    """
+    Lignes d'un export (dictionnaires lus par salary.engine.pipeline.READERS), qui doit
+    être trié par identifiant comme le sont les exports de l'application.
+    ValueError si une ligne est invalide ou si le fichier n'est pas trié.
+    """
+    previous = None
+    for line_number, record in enumerate(records, 1):
+        if isinstance(record, Exception):
+            raise ValueError(f"Ligne {line_number} : {record}")
+        if not isinstance(record, dict):
+            raise ValueError(f"Ligne {line_number} : ligne non objet")
+        record = {_EXPORT_KEYS.get(key, key): value for key, value in record.items()}
+        try:
+            employee_id = int(record['id'])
+            values = tuple(float(record.get(field) or 0) for field in fields)
+        except KeyError:
+            raise ValueError(f"Ligne {line_number} : colonne 'id' manquante")
+        except (TypeError, ValueError):
+            raise ValueError(f"Ligne {line_number} : valeur invalide")
+        # nan ne dépasse aucun seuil : l'écart passerait inaperçu
+        if not all(math.isfinite(value) for value in values):
+            raise ValueError(f"Ligne {line_number} : valeur invalide")
+        if previous is not None and employee_id <= previous:
+            raise ValueError(f"Ligne {line_number} : l'export doit être trié par identifiant croissant")
+        previous = employee_id
+        yield employee_id, record.get('nom_complet', ''), values
+
+
+# =============================
+# RAPPROCHEMENT
+# =============================
+
+def _alerts(fields, before, after, thresholds, relative):
+    alerts = []
+    for field, old, new in zip(fields, before, after):
+        delta = abs(new - old)
+        if delta > thresholds.get(field, 0) and (not relative or delta >= relative * abs(old)):
+            alerts.append(field)
+    return alerts
+
+
+def reconcile(before_rows, after_rows, fields=RECONCILIATION_FIELDS, thresholds=None, relative=None):
+    """
+    Fusionne deux flux de lignes triés par identifiant et génère une ligne par employé :
+    {'id', 'nom_complet', 'statut', 'alertes', <colonne>_avant, <colonne>_apres, <colonne>_ecart}.
+    Une colonne est en alerte si son écart absolu dépasse son seuil (thresholds, en GNF)
+    et, avec relative (ex. 0.1), au moins cette part du montant précédent ; un changement
+    de tranche RTS est toujours signalé. Un employé sans alerte est 'identique'.
+    """
+    thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+    imposable = fields.index('salaire_imposable') if 'salaire_imposable' in fields else None
+    zeros = (0.0,) * len(fields)
+    before_rows, after_rows = iter(before_rows), iter(after_rows)
+    before = next(before_rows, None)
+    after = next(after_rows, None)
+
+    while before is not None or after is not None:
+        if after is None or (before is not None and before[0] < after[0]):
+            (employee_id, nom_complet, old), new, status = before, zeros, STATUS_REMOVED
+            before = next(before_rows, None)
+        elif before is None or after[0] < before[0]:
+            (employee_id, nom_complet, new), old, status = after, zeros, STATUS_ADDED
+            after = next(after_rows, None)
+        else:
+            employee_id, nom_complet, new = after
+            old = before[2]
+            before = next(before_rows, None)
+            after = next(after_rows, None)
+            status = None
+
+        alerts = []
+        if status is None:
+            alerts = _alerts(fields, old, new, thresholds, relative)
+            if imposable is not None and rts_bracket(old[imposable]) != rts_bracket(new[imposable]):
+                alerts.append(
+                    f"tranche_rts {rts_bracket(old[imposable]) + 1}→{rts_bracket(new[imposable]) + 1}"
+                )
+            status = STATUS_CHANGED if alerts else STATUS_UNCHANGED
+
+        row = {'id': employee_id, 'nom_complet': nom_complet, 'statut': status, 'alertes': ' '.join(alerts)}
+        for field, old_value, new_value in zip(fields, old, new):
+            row[f"{field}_avant"] = round(old_value, 2)
+            row[f"{field}_apres"] = round(new_value, 2)
+            row[f"{field}_ecart"] = round(new_value - old_value, 2)
+        yield row
+
+
+def summarize(rows, fields=RECONCILIATION_FIELDS, top=50, order_by='salaire_net'):
+    """
+    Parcourt le rapprochement : nombre d'employés par statut, totaux avant / après
+    par colonne et les top lignes non identiques de plus fort écart sur order_by.
+    """
+    summary = {
+        'statuts': dict.fromkeys(STATUSES, 0),
+        'totaux': {field: {'avant': 0.0, 'apres': 0.0, 'ecart': 0.0} for field in fields},
+    }
+    heap = []
+    for count, row in enumerate(rows):
+        summary['statuts'][row['statut']] += 1
+        for field in fields:
+            totals = summary['totaux'][field]
+            totals['avant'] += row[f"{field}_avant"]
+            totals['apres'] += row[f"{field}_apres"]
+        if row['statut'] != STATUS_UNCHANGED and top:
+            item = (abs(row[f"{order_by}_ecart"]), -count, row)
+            if len(heap) < top:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heappushpop(heap, item)
+    for totals in summary['totaux'].values():
+        totals['ecart'] = totals['apres'] - totals['avant']
+    summary['lignes'] = [row for *_, row in sorted(heap, reverse=True)]
+    return summary
+
+
+def stream_reconciliation_csv(rows, include_unchanged=False, batch_size=STREAM_BATCH_SIZE):
+    """Génère le rapprochement au format CSV par blocs (lignes identiques exclues par défaut)"""
+    buffer = io.StringIO()
+    writer = None
+    count = 0
+    for row in rows:
+        if row['statut'] == STATUS_UNCHANGED and not include_unchanged:
+            continue
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
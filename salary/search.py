@@ -0,0 +1,68 @@
+"""
+Recherche indexée des employés par nom, avec ou sans accents.
+
+- SQLite : table FTS5 salary_employee_fts (sans diacritiques), tenue à jour par
+  des déclencheurs sur salary_employee ; chaque mot recherché est un préfixe
+  ('dia sek' trouve « Diallo Sékou »).
+- PostgreSQL : index trigrammes sur salary_search_normalize(nom_complet)
+  (minuscules sans accents) ; chaque mot recherché est cherché n'importe où
+  dans le nom ('allo' trouve « Diallo »), à partir de 3 caractères pour
+  profiter de l'index.
+- Autres bases : icontains, sans index.
+
+Index et déclencheurs sont créés par la migration 0015_employee_name_search.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import CharField, F, Func
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'salary_employee_fts'
+NORMALIZE_FUNCTION = 'salary_search_normalize'
+
+_WORD = re.compile(r"\w+")
+
+# Présence de la table FTS5 par alias de base (SQLite compilé sans FTS5 : recherche sans index)
+_fts_tables = {}
+
+
+def normalize(text):
+    """Minuscules sans diacritiques : « Bah Mamadou Saïdou » -> 'bah mamadou saidou'"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def search_terms(query):
+    """Mots de la recherche, normalisés"""
+    return _WORD.findall(normalize(query or ''))
+
+
+def _has_fts_table(connection):
+    if connection.alias not in _fts_tables:
+        _fts_tables[connection.alias] = SEARCH_TABLE in connection.introspection.table_names()
+    return _fts_tables[connection.alias]
+
+
+def search_employees(queryset, query):
+    """Employés du queryset dont le nom contient tous les mots de la recherche"""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    connection = connections[queryset.db]
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (match,))
+        )
+    if connection.vendor == 'postgresql':
+        queryset = queryset.alias(
+            nom_recherche=Func(F('nom_complet'), function=NORMALIZE_FUNCTION, output_field=CharField())
+        )
+        for term in terms:
+            queryset = queryset.filter(nom_recherche__contains=term)
+        return queryset
+    for term in terms:
+        queryset = queryset.filter(nom_complet__icontains=term)
+    return queryset
@@ -0,0 +1,263 @@
+import hashlib
+from decimal import Context, Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import audit
+from .engine import EXEMPT_PRIMES, RULES_VERSION, calculate_payroll
+from .history import record_salary
+from .models import Employee
+
+CENT = Decimal('0.01')
+# Même précision que les DecimalField du modèle Employee (max_digits=12, decimal_places=2)
+DECIMAL_CONTEXT = Context(prec=12)
+
+# Données saisies d'un employé : tout le reste en est calculé
+INPUT_FIELDS = ('salaire_net', 'primes_selectionnees', 'avantage_nature', 'avance_salaire', 'saisie_opposition')
+DEDUCTION_FIELDS = ('avance_salaire', 'saisie_opposition')
+# Coordonnées bancaires (fichier de virements, voir salary.bank_transfer)
+BANK_FIELDS = ('code_banque', 'code_guichet', 'numero_compte', 'cle_rib')
+# Champs modifiables d'un employé enregistré
+EDITABLE_FIELDS = ('nom_complet',) + INPUT_FIELDS + BANK_FIELDS
+# Colonnes dont la modification n'ouvre pas de nouvelle ligne d'historique de salaire
+NON_SALARY_FIELDS = ('nom_complet', 'input_fingerprint') + BANK_FIELDS
+
+
+def get_selected_exempt_primes(cleaned_data):
+    """Retourne la liste des primes exonérées cochées dans le formulaire"""
+    if not cleaned_data.get('has_exempt_primes', False):
+        return []
+
+    selected_primes = []
+    if cleaned_data.get('prime_retraite', False):
+        selected_primes.append('retraite')
+    if cleaned_data.get('prime_interim', False):
+        selected_primes.append('interim')
+    if cleaned_data.get('prime_anciennete', False):
+        selected_primes.append('anciennete')
+    if cleaned_data.get('prime_responsabilite_exoneree', False):
+        selected_primes.append('responsabilite')
+    return selected_primes
+
+
+def build_employee_fields(payroll):
+    """Convertit le résultat de calculate_payroll en champs calculés du modèle Employee"""
+    result = payroll['result']
+    primes_auto = payroll['primes_auto']
+    exempt_primes_amounts = payroll['exempt_primes_amounts']
+    return {
+        'salaire_base': result['basic'],
+        'salaire_brut': result['gross'],
+        'salaire_imposable': result['imposable'],
+        'cnss_employe': result['cnss'],
+        'rts': result['rts'],
+        'total_charges_employee': result['total_charges_employee'],
+        'cnss_employeur': result['cnss_employer'],
+        'versement_forfaitaire': result['versement_forfaitaire'],
+        'taxe_apprentissage': result['taxe_apprentissage'],
+        'total_cnss_patronal': result['total_cnss_patronal'],
+        # Primes taxables détaillées
+        'prime_cherte_vie': primes_auto['prime_cherte_vie'],
+        'indemnite_logement': primes_auto['indemnite_logement'],
+        'indemnite_transport': primes_auto['indemnite_transport'],
+        'indemnite_repas': primes_auto['indemnite_repas'],
+        'primes_taxables': payroll['primes_taxables'],
+        # Primes exonérées
+        'prime_retraite': exempt_primes_amounts.get('prime_retraite', 0),
+        'prime_interim': exempt_primes_amounts.get('prime_interim', 0),
+        'prime_anciennete': exempt_primes_amounts.get('prime_anciennete', 0),
+        'prime_responsabilite': exempt_primes_amounts.get('prime_responsabilite', 0),
+        'primes_exonerees': payroll['primes_exonerees'],
+        'avantage_nature': result['avantage_nature'],
+        'ecart_imposable': result['ecart_imposable'],
+    }
+
+
+# Colonnes calculées (build_employee_fields + salaire net à payer)
+DERIVED_FIELDS = (
+    'salaire_base', 'salaire_brut', 'salaire_imposable', 'cnss_employe', 'rts', 'total_charges_employee',
+    'cnss_employeur', 'versement_forfaitaire', 'taxe_apprentissage', 'total_cnss_patronal',
+    'prime_cherte_vie', 'indemnite_logement', 'indemnite_transport', 'indemnite_repas', 'primes_taxables',
+    'prime_retraite', 'prime_interim', 'prime_anciennete', 'prime_responsabilite', 'primes_exonerees',
+    'avantage_nature', 'ecart_imposable', 'salaire_net_a_payer',
+)
+
+
+def to_stored_decimal(value):
+    """Montant tel qu'il est enregistré dans un DecimalField du modèle Employee"""
+    if isinstance(value, float):
+        value = DECIMAL_CONTEXT.create_decimal_from_float(value)
+    elif not isinstance(value, Decimal):
+        value = Decimal(value or 0)
+    return value.quantize(CENT)
+
+
+def normalize_primes(primes):
+    """Primes exonérées cochées (liste ou 'retraite,interim') sous forme canonique"""
+    if isinstance(primes, str):
+        primes = primes.replace(';', ',').split(',')
+    if not isinstance(primes, (list, tuple, set, type(None))) or not all(isinstance(p, str) for p in primes or ()):
+        raise ValueError(f"Primes exonérées invalides : {primes!r}")
+    primes = {prime.strip() for prime in primes or () if prime and prime.strip()}
+    unknown = primes - set(EXEMPT_PRIMES)
+    if unknown:
+        raise ValueError(f"Primes exonérées inconnues : {', '.join(sorted(unknown))}")
+    return ','.join(prime for prime in EXEMPT_PRIMES if prime in primes)
+
+
+def compute_input_fingerprint(salaire_net, primes_selectionnees, avantage_nature, avance_salaire, saisie_opposition,
+                              rules_version=RULES_VERSION):
+    """Empreinte des données saisies et de la version des règles de calcul"""
+    payload = '|'.join((
+        rules_version,
+        str(to_stored_decimal(salaire_net)),
+        normalize_primes(primes_selectionnees),
+        str(to_stored_decimal(avantage_nature)),
+        str(to_stored_decimal(avance_salaire)),
+        str(to_stored_decimal(saisie_opposition)),
+    ))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def compute_net_a_payer(salaire_net, avance_salaire, saisie_opposition):
+    """Salaire net à payer : net souhaité moins les déductions (aucun appel au solveur)"""
+    return (
+        to_stored_decimal(salaire_net)
+        - to_stored_decimal(avance_salaire)
+        - to_stored_decimal(saisie_opposition)
+    )
+
+
+def compute_employee_fields(salaire_net, primes_selectionnees, avantage_nature, avance_salaire, saisie_opposition):
+    """Colonnes calculées (DERIVED_FIELDS) et empreinte d'un employé, en Decimal arrondis au centime"""
+    payroll = calculate_payroll(
+        float(salaire_net),
+        normalize_primes(primes_selectionnees).split(',') if primes_selectionnees else [],
+        float(avantage_nature or 0),
+    )
+    fields = {name: to_stored_decimal(value) for name, value in build_employee_fields(payroll).items()}
+    fields['salaire_net_a_payer'] = compute_net_a_payer(salaire_net, avance_salaire, saisie_opposition)
+    fields['input_fingerprint'] = compute_input_fingerprint(
+        salaire_net, primes_selectionnees, avantage_nature, avance_salaire, saisie_opposition
+    )
+    return fields
+
+
+def refresh_employee(employee, force=False):
+    """
+    Recalcule les colonnes d'un employé si ses données saisies ou les règles ont changé.
+    Seules les colonnes dont la valeur diffère sont modifiées ; renvoie leurs noms
+    (à passer à save(update_fields=...) ou bulk_update).
+    """
+    inputs = [getattr(employee, name) for name in INPUT_FIELDS]
+    if not force and employee.input_fingerprint == compute_input_fingerprint(*inputs):
+        return []
+    changed = []
+    for name, value in compute_employee_fields(*inputs).items():
+        if getattr(employee, name) != value:
+            setattr(employee, name, value)
+            changed.append(name)
+    return changed
+
+
+def check_effective_from(effective_from):
+    """
+    Refuse une date d'effet future : la modification s'applique immédiatement aux colonnes
+    de l'employé, qui doivent rester la rémunération en vigueur aujourd'hui.
+    """
+    if effective_from and effective_from > timezone.localdate():
+        raise ValueError(f"Date d'effet future non prise en charge : {effective_from:%d/%m/%Y}")
+    return effective_from
+
+
+def update_employee(user, employee_id, changes, effective_from=None):
+    """
+    Applique une modification partielle ({champ de EDITABLE_FIELDS: valeur}) à un employé
+    de l'utilisateur et ne recalcule que ce qui en dépend :
+    - nom ou coordonnées bancaires : aucun recalcul ;
+    - déductions seules : salaire net à payer et empreinte, sans appel au solveur ;
+    - net, primes ou avantage en nature : recalcul complet des colonnes calculées.
+    La ligne est verrouillée (select_for_update) jusqu'à l'enregistrement des seules
+    colonnes modifiées ; une rémunération modifiée est historisée à effective_from
+    (aujourd'hui par défaut, jamais dans le futur). Renvoie (employé, colonnes modifiées) ;
+    Employee.DoesNotExist si l'employé n'appartient pas à l'utilisateur, ValueError si un
+    champ ou la date d'effet est invalide.
+    """
+    check_effective_from(effective_from)
+    unknown = set(changes) - set(EDITABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Champs non modifiables : {', '.join(sorted(unknown))}")
+
+    with transaction.atomic():
+        employee = Employee.objects.select_for_update().get(pk=employee_id, user=user)
+        # Une empreinte périmée (règles modifiées depuis) impose un recalcul complet
+        up_to_date = employee.input_fingerprint == compute_input_fingerprint(
+            *[getattr(employee, name) for name in INPUT_FIELDS]
+        )
+
+        changed = []
+        for name, value in changes.items():
+            if name == 'primes_selectionnees':
+                value = normalize_primes(value)
+            elif name in BANK_FIELDS:
+                value = (value or '').strip().upper()
+            elif name != 'nom_complet':
+                value = to_stored_decimal(value)
+            if getattr(employee, name) != value:
+                setattr(employee, name, value)
+                changed.append(name)
+
+        inputs = [getattr(employee, name) for name in INPUT_FIELDS]
+        salary_changes = set(changed) & set(INPUT_FIELDS)
+        if salary_changes - set(DEDUCTION_FIELDS) or (salary_changes and not up_to_date):
+            changed += refresh_employee(employee)
+        elif salary_changes:
+            employee.salaire_net_a_payer = compute_net_a_payer(
+                employee.salaire_net, employee.avance_salaire, employee.saisie_opposition
+            )
+            employee.input_fingerprint = compute_input_fingerprint(*inputs)
+            changed += ['salaire_net_a_payer', 'input_fingerprint']
+
+        changed = list(dict.fromkeys(changed))
+        if changed:
+            employee.save(update_fields=changed)
+            audit.record(audit.MODIFICATION, user, employee, audit.field_values(employee, changed))
+        if set(changed) - set(NON_SALARY_FIELDS):
+            record_salary(employee, effective_from)
+    return employee, changed
+
+
+def create_employee_from_form(user, cleaned_data, payroll):
+    """Enregistre un employé à partir du formulaire validé et du résultat de calculate_payroll"""
+    primes_selectionnees = normalize_primes(get_selected_exempt_primes(cleaned_data))
+    avantage_nature = cleaned_data.get('avantage_nature') or 0
+    avance_salaire = cleaned_data.get('avance_salaire') or 0
+    saisie_opposition = cleaned_data.get('saisie_opposition') or 0
+    employee = Employee.objects.create(
+        user=user,
+        nom_complet=cleaned_data['nom_complet'],
+        salaire_net=cleaned_data['net_salary'],
+        **build_employee_fields(payroll),
+        # Déductions pour le salaire net à payer
+        avance_salaire=avance_salaire,
+        saisie_opposition=saisie_opposition,
+        salaire_net_a_payer=cleaned_data.get('salaire_net_a_payer', 0),
+        primes_selectionnees=primes_selectionnees,
+        input_fingerprint=compute_input_fingerprint(
+            cleaned_data['net_salary'], primes_selectionnees, avantage_nature, avance_salaire, saisie_opposition
+        ),
+    )
+    record_salary(employee)
+    audit.record(audit.CREATION, user, employee, audit.field_values(employee, INPUT_FIELDS))
+    return employee
+
+
+def get_result_context(cleaned_data, payroll):
+    """Contexte d'affichage du panneau de résultat (page complète ou fragment)"""
+    return {
+        "result": payroll['result'],
+        "avance_salaire": cleaned_data.get('avance_salaire', 0),
+        "saisie_opposition": cleaned_data.get('saisie_opposition', 0),
+        "salaire_net_a_payer": cleaned_data.get('salaire_net_a_payer', 0),
+    }
@@ -1,3 +1,1732 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin import helpers
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.core.signals import request_finished
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import numpy as np
+
+from .engine import core as engine_core, pipeline, rates as engine_rates, sweep
+from .engine.allocation import allocate_budget
+from .engine.rates import RateSchedule
+from .engine.core import (
+    PayrollInput, PayrollResult, build_payroll_input, calculate_net_from_basic, calculate_payroll, evaluate,
+    results_to_columns, solve_employer_cost, solve_gross, solve_net_a_payer, solve_net_batch,
+)
+from . import audit, what_if
+from .annual import ANNUAL_EXPORT_COLUMNS, ANNUAL_FIELDS, annual_totals, rebuild_annual_summaries, stream_annual_csv
+from .async_views import EMPLOYEE_LIST_MAX_LIMIT
+from .bank_transfer import (
+    FORMAT_CSV, FORMAT_FIXED, get_layout, missing_accounts, payments_queryset, period_missing_accounts,
+    period_payments_queryset, stream_transfer_file, transfer_totals,
+)
+from .cnss_declaration import DECLARATION_COLUMNS, declaration_rows, declaration_totals
+from .db_routers import (
+    LAST_WRITE_SESSION_KEY, REPLICA_ALIAS, PrimaryAfterWriteMiddleware, ReplicaRouter, _replica_state, use_replica,
+)
+from .history import record_salaries, salary_as_of, workforce_as_of, workforce_totals_as_of
+from .importers import import_employees
+from .journal import JOURNAL_HEADERS, get_ledger_accounts, journal_entries, journal_totals, stream_journal_csv
+from .models import AnnualSummary, AuditEvent, Employee, PayrollLine, PayrollPeriod, SalaryHistory, User
+from .exports import RTS_TRANCHE_KEYS, get_export_columns, stream_csv, stream_jsonl
+from .forms import EmployeeEditForm
+from .views import build_excel_export
+from .payroll_periods import close_period, prepare_period
+from .reconciliation import (
+    RECONCILIATION_FIELDS, STATUS_ADDED, STATUS_CHANGED, STATUS_REMOVED, STATUS_UNCHANGED, period_rows, reconcile,
+    snapshot_rows, stream_reconciliation_csv, summarize,
+)
+from .recompute import recompute_employees
+from .search import SEARCH_TABLE, search_employees
+from .snapshots import GROUP_COLUMNS, SNAPSHOT_FIELDS, load_snapshot, snapshot_path, write_snapshot
+from .services import (
+    DERIVED_FIELDS, compute_employee_fields, compute_input_fingerprint, refresh_employee, update_employee,
+)
+
+
+def employee_values(salaire_net=3_000_000, primes_selectionnees='', avantage_nature=0, avance_salaire=0,
+                    saisie_opposition=0):
+    """Données saisies d'un employé, avec ses colonnes calculées et son empreinte à jour"""
+    inputs = {
+        'salaire_net': Decimal(salaire_net),
+        'primes_selectionnees': primes_selectionnees,
+        'avantage_nature': Decimal(avantage_nature),
+        'avance_salaire': Decimal(avance_salaire),
+        'saisie_opposition': Decimal(saisie_opposition),
+    }
+    return dict(inputs, **compute_employee_fields(**inputs))
+
+
+def create_employee(user, nom_complet="Diallo Mamadou", salaire_net=3_000_000, primes_selectionnees='',
+                    avantage_nature=0, avance_salaire=0, saisie_opposition=0):
+    """Employé enregistré avec ses colonnes calculées et son empreinte à jour"""
+    values = employee_values(salaire_net, primes_selectionnees, avantage_nature, avance_salaire, saisie_opposition)
+    return Employee.objects.create(user=user, nom_complet=nom_complet, **values)
+
+
+def updated_columns(queries, table):
+    """Colonnes des UPDATE exécutés sur la table"""
+    columns = set()
+    for query in queries:
+        sql = query['sql']
+        if sql.startswith(f'UPDATE "{table}" SET '):
+            assignments = sql[len(f'UPDATE "{table}" SET '):].split(' WHERE ')[0]
+            columns.update(part.split(' = ')[0].strip('"') for part in assignments.split(', '))
+    return columns
+
+
+# =============================
+# RECALCUL INCRÉMENTAL ET HISTORIQUE
+# =============================
+
+class IncrementalRecomputeTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('paie@test.gn', 'motdepasse')
+        self.unchanged = create_employee(self.user, "Bah Aissatou", 2_500_000)
+        self.stale = create_employee(self.user, "Camara Sekou", 4_000_000)
+
+    def test_recompute_skips_unchanged_fingerprint(self):
+        # Donnée saisie modifiée sans recalcul : seule cette ligne est périmée
+        Employee.objects.filter(pk=self.stale.pk).update(salaire_net=Decimal('4500000'))
+        with mock.patch('salary.recompute.refresh_employee', wraps=refresh_employee) as refresh:
+            stats = recompute_employees(Employee.objects.filter(user=self.user))
+
+        self.assertEqual([call.args[0].pk for call in refresh.call_args_list], [self.stale.pk])
+        self.assertEqual((stats['examined'], stats['unchanged'], stats['updated']), (2, 1, 1))
+        before = Employee.objects.values(*DERIVED_FIELDS).get(pk=self.unchanged.pk)
+        self.assertEqual(before, {name: getattr(self.unchanged, name) for name in DERIVED_FIELDS})
+        self.assertEqual(Employee.objects.get(pk=self.stale.pk).salaire_net_a_payer, Decimal('4500000'))
+        self.assertFalse(SalaryHistory.objects.filter(employee=self.unchanged).exists())
+
+    def test_recompute_up_to_date_writes_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            stats = recompute_employees(Employee.objects.filter(user=self.user))
+        self.assertEqual((stats['unchanged'], stats['recomputed']), (2, 0))
+        self.assertFalse(updated_columns(queries, Employee._meta.db_table))
+
+    def test_rule_change_makes_every_fingerprint_stale(self):
+        # Barème modifié tel que le lit core.py (CNSS employé à 6%) et version de règles correspondante
+        rates = engine_rates.DEFAULT_RATES._replace(cnss_employee=(0.06, 27000, 150000))
+        version = engine_rates.rules_version(rates)
+        self.assertNotEqual(version, engine_rates.RULES_VERSION)
+        with mock.patch.object(engine_core, 'DEFAULT_RATES', rates), \
+                mock.patch.object(compute_input_fingerprint, '__defaults__', (version,)):
+            stats = recompute_employees(Employee.objects.filter(user=self.user))
+        self.assertEqual((stats['unchanged'], stats['updated']), (0, 2))
+        self.assertEqual(Employee.objects.get(pk=self.unchanged.pk).cnss_employe, Decimal('150000.00'))
+
+    def test_rules_version_covers_every_rule(self):
+        rates = engine_rates.DEFAULT_RATES
+        changes = {
+            'cnss_employee': (0.05, 27000, 130000),
+            'cnss_employer': (0.19, 97200, 450000),
+            'versement_forfaitaire': 0.07,
+            'taxe_apprentissage': 0.03,
+            'ecart_imposable': 0.30,
+            'rts_brackets': rates.rts_brackets[:-1] + ((20_000_000, None, 0.25),),
+        }
+        for name, value in changes.items():
+            with self.subTest(name):
+                self.assertNotEqual(engine_rates.rules_version(rates._replace(**{name: value})), engine_rates.RULES_VERSION)
+        for name, value in (
+            ('PRIMES_TIERS', engine_rates.PRIMES_TIERS[:-1] + ((None, 0.07, 0.10, 0.06, 0.05),)),
+            ('EXEMPT_PRIMES_RATE', 0.06),
+            ('EXEMPT_PRIMES_COEFFICIENTS', dict(engine_rates.EXEMPT_PRIMES_COEFFICIENTS, retraite=1.3)),
+            ('ENGINE_REVISION', engine_rates.ENGINE_REVISION + 1),
+        ):
+            with self.subTest(name), mock.patch.object(engine_rates, name, value):
+                self.assertNotEqual(engine_rates.rules_version(), engine_rates.RULES_VERSION)
+
+    def test_import_skips_unchanged_fingerprint(self):
+        records = [
+            {'id': self.unchanged.pk, 'salaire_net': '2500000'},
+            {'id': self.stale.pk, 'salaire_net': '4200000'},
+        ]
+        with mock.patch('salary.importers.refresh_employee', wraps=refresh_employee) as refresh:
+            stats = import_employees(records, self.user)
+
+        self.assertEqual([call.args[0].pk for call in refresh.call_args_list], [self.stale.pk])
+        self.assertEqual((stats['unchanged'], stats['updated'], stats['created']), (1, 1, 0))
+        self.assertEqual(Employee.objects.get(pk=self.stale.pk).salaire_net, Decimal('4200000'))
+
+
+class EmployeeEditTests(TestCase):
+    """Modification partielle : seul ce qui dépend des champs modifiés est recalculé"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('edition@test.gn', 'motdepasse')
+        self.employee = create_employee(self.user, "Bah Aissatou", 2_500_000)
+
+    def test_deduction_only_edit_skips_solver(self):
+        with mock.patch('salary.services.calculate_payroll') as solver, CaptureQueriesContext(connection) as queries:
+            employee, changed = update_employee(self.user, self.employee.pk, {'avance_salaire': '300000'})
+
+        solver.assert_not_called()
+        self.assertEqual(changed, ['avance_salaire', 'salaire_net_a_payer', 'input_fingerprint'])
+        self.assertEqual(
+            updated_columns(queries, Employee._meta.db_table),
+            {'avance_salaire', 'salaire_net_a_payer', 'input_fingerprint'},
+        )
+        stored = Employee.objects.get(pk=employee.pk)
+        self.assertEqual(stored.salaire_net_a_payer, Decimal('2200000'))
+        self.assertEqual(stored.salaire_brut, self.employee.salaire_brut)
+        # L'empreinte est à jour : un recalcul ultérieur n'a rien à faire
+        self.assertEqual(recompute_employees(Employee.objects.filter(pk=employee.pk))['recomputed'], 0)
+
+    def test_salary_edit_recomputes_and_records_history(self):
+        with mock.patch('salary.services.calculate_payroll', wraps=calculate_payroll) as solver:
+            employee, changed = update_employee(
+                self.user, self.employee.pk, {'salaire_net': '2700000'}, date(2026, 3, 1),
+            )
+
+        solver.assert_called_once()
+        self.assertIn('salaire_brut', changed)
+        stored = Employee.objects.get(pk=employee.pk)
+        self.assertEqual(stored.salaire_net_a_payer, Decimal('2700000'))
+        self.assertEqual(stored.input_fingerprint, compute_input_fingerprint(
+            stored.salaire_net, stored.primes_selectionnees, stored.avantage_nature,
+            stored.avance_salaire, stored.saisie_opposition,
+        ))
+        history = SalaryHistory.objects.get(employee=employee)
+        self.assertEqual((history.effective_from, history.salaire_brut), (date(2026, 3, 1), stored.salaire_brut))
+
+    def test_name_and_bank_edit_skip_recompute(self):
+        with mock.patch('salary.services.calculate_payroll') as solver:
+            _, changed = update_employee(
+                self.user, self.employee.pk, {'nom_complet': "Bah Aïssatou", 'code_banque': ' gn001 '},
+            )
+
+        solver.assert_not_called()
+        self.assertEqual(changed, ['nom_complet', 'code_banque'])
+        self.assertEqual(Employee.objects.get(pk=self.employee.pk).code_banque, 'GN001')
+        self.assertFalse(SalaryHistory.objects.filter(employee=self.employee).exists())
+
+    def test_unchanged_values_write_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, changed = update_employee(self.user, self.employee.pk, {'salaire_net': '2500000'})
+        self.assertEqual(changed, [])
+        self.assertFalse(updated_columns(queries, Employee._meta.db_table))
+
+    def test_edit_rejects_unknown_fields_and_other_users(self):
+        with self.assertRaises(ValueError):
+            update_employee(self.user, self.employee.pk, {'salaire_brut': '1'})
+        other = User.objects.create_user('autre@test.gn', 'motdepasse')
+        with self.assertRaises(Employee.DoesNotExist):
+            update_employee(other, self.employee.pk, {'avance_salaire': '1000'})
+
+
+class SalaryHistoryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('historique@test.gn', 'motdepasse')
+        self.employee = create_employee(self.user, "Bah Aissatou", 2_500_000)
+        self.other = create_employee(self.user, "Camara Sekou", 4_000_000)
+
+    def test_record_salaries_upserts_same_effective_date(self):
+        effective_from = date(2026, 3, 1)
+        record_salaries([self.employee], effective_from)
+        self.employee.salaire_net = Decimal('2600000')
+        self.employee.salaire_net_a_payer = Decimal('2600000')
+        record_salaries([self.employee], effective_from)
+
+        history = SalaryHistory.objects.filter(employee=self.employee)
+        self.assertEqual(history.count(), 1)
+        self.assertEqual(history.get().salaire_net, Decimal('2600000'))
+        self.assertEqual(history.get().effective_from, effective_from)
+
+        record_salaries([self.employee], date(2026, 4, 1))
+        self.assertEqual(history.count(), 2)
+
+    def test_salary_as_of_reads_rate_in_force(self):
+        record_salaries([self.employee], date(2026, 1, 1))
+        update_employee(self.user, self.employee.pk, {'salaire_net': '2800000'}, date(2026, 4, 1))
+
+        self.assertIsNone(salary_as_of(self.employee, date(2025, 12, 31)))
+        self.assertEqual(salary_as_of(self.employee, date(2026, 3, 31)).salaire_net, Decimal('2500000'))
+        self.assertEqual(salary_as_of(self.employee, date(2026, 4, 1)).salaire_net, Decimal('2800000'))
+
+    def test_workforce_as_of_matches_per_employee_reads(self):
+        record_salaries([self.employee, self.other], date(2026, 1, 1))
+        update_employee(self.user, self.other.pk, {'salaire_net': '4500000'}, date(2026, 2, 1))
+        employees = Employee.objects.filter(user=self.user)
+
+        for as_of in (date(2025, 12, 31), date(2026, 1, 15), date(2026, 2, 1)):
+            with self.subTest(as_of=as_of):
+                expected = [salary_as_of(employee, as_of) for employee in employees.order_by('pk')]
+                expected = [record for record in expected if record]
+                rows = list(workforce_as_of(as_of, employees).order_by('employee_id'))
+                self.assertEqual(rows, expected)
+                totals = workforce_totals_as_of(as_of, employees)
+                self.assertEqual(totals['employes'], len(expected))
+                self.assertEqual(totals['salaire_net'], sum(row.salaire_net for row in expected) or None)
+
+    def test_future_effective_date_is_rejected(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with self.assertRaisesMessage(ValueError, "Date d'effet future"):
+            update_employee(self.user, self.employee.pk, {'salaire_net': '2800000'}, tomorrow)
+        self.assertEqual(Employee.objects.get(pk=self.employee.pk).salaire_net, Decimal('2500000'))
+        self.assertFalse(SalaryHistory.objects.exists())
+
+        form = EmployeeEditForm({'salaire_net': '2800000', 'effective_from': tomorrow.isoformat()}, partial=True)
+        self.assertFalse(form.is_valid())
+        self.assertIn('effective_from', form.errors)
+
+    def test_history_survives_employee_deletion(self):
+        update_employee(self.user, self.employee.pk, {'salaire_net': '2800000'}, date(2026, 4, 1))
+        employee_id = self.employee.pk
+        self.employee.delete()
+
+        self.assertEqual(salary_as_of(employee_id, date(2026, 4, 1)).salaire_net, Decimal('2800000'))
+        # L'effectif à date ne compte que les employés existants
+        self.assertEqual(list(workforce_as_of(date(2026, 4, 1)).values_list('employee_id', flat=True)), [])
+
+
+# =============================
+# SOLVEURS DU MOTEUR
+# =============================
+
+# Salaires de base (sans primes) placés sur les changements de régime :
+# (libellé, base, brut, salaire imposable attendus)
+BOUNDARY_BASICS = (
+    ("plancher CNSS", 540_000, 540_000, 513_000),
+    ("RTS 1 000 000", 1_000_000 / 0.95, 1_000_000 / 0.95, 1_000_000),
+    ("plafond CNSS", 2_500_000, 2_500_000, 2_375_000),
+    ("RTS 3 000 000", 3_125_000, 3_125_000, 3_000_000),
+    ("RTS 5 000 000", 5_125_000, 5_125_000, 5_000_000),
+    ("RTS 10 000 000", 10_125_000, 10_125_000, 10_000_000),
+    ("RTS 20 000 000", 20_125_000, 20_125_000, 20_000_000),
+)
+
+# Entrées du moteur : sans primes, puis primes automatiques et exonérées d'un net de 2 000 000
+PAYROLL_INPUTS = (
+    ("sans primes", PayrollInput()),
+    ("avec primes", build_payroll_input(2_000_000, ['retraite', 'interim'], 150_000)[0]),
+)
+
+
+class SolverRoundTripTests(SimpleTestCase):
+    """Chaque solveur retrouve, à la tolérance près, la paie calculée dans le sens direct"""
+
+    def test_boundaries_are_where_expected(self):
+        for label, basic, gross, imposable in BOUNDARY_BASICS:
+            with self.subTest(label):
+                result = evaluate(basic)
+                self.assertAlmostEqual(result.gross, gross, places=4)
+                self.assertAlmostEqual(result.imposable, imposable, places=4)
+        self.assertEqual(evaluate(540_000).cnss_employee, 27_000)
+        self.assertEqual(evaluate(540_000).cnss_employer, 97_200)
+        self.assertEqual(evaluate(2_500_000).cnss_employee, 125_000)
+        self.assertEqual(evaluate(2_500_000).cnss_employer, 450_000)
+
+    def forward_results(self):
+        for input_label, payroll_input in PAYROLL_INPUTS:
+            for label, basic, _, _ in BOUNDARY_BASICS:
+                yield f"{input_label}, {label}", evaluate(basic, payroll_input), payroll_input
+
+    def test_solve_net_a_payer_round_trip(self):
+        avance_salaire, saisie_opposition = 200_000, 50_000
+        for label, forward, payroll_input in self.forward_results():
+            with self.subTest(label):
+                target = forward.net - avance_salaire - saisie_opposition
+                result = solve_net_a_payer(target, payroll_input, avance_salaire, saisie_opposition)
+                self.assertLessEqual(abs(result.net - avance_salaire - saisie_opposition - target), 1)
+                self.assertAlmostEqual(result.basic, forward.basic, delta=2)
+                self.assertAlmostEqual(result.imposable, forward.imposable, delta=2)
+
+    def test_solve_gross_round_trip(self):
+        for label, forward, payroll_input in self.forward_results():
+            with self.subTest(label):
+                result = solve_gross(forward.gross, payroll_input)
+                self.assertAlmostEqual(result.basic, forward.basic, places=4)
+                self.assertAlmostEqual(result.net, forward.net, places=4)
+
+    def test_solve_employer_cost_round_trip(self):
+        for label, forward, payroll_input in self.forward_results():
+            with self.subTest(label):
+                budget = forward.total_cout_employeur
+                result = solve_employer_cost(budget, payroll_input)
+                # Jamais au-dessus du budget, au plus 1 GNF en dessous
+                self.assertLessEqual(result.total_cout_employeur, budget)
+                self.assertGreaterEqual(result.total_cout_employeur, budget - 1)
+                self.assertAlmostEqual(result.net, forward.net, delta=1)
+
+    def test_solvers_reject_unreachable_targets(self):
+        payroll_input = PAYROLL_INPUTS[1][1]
+        with self.assertRaises(ValueError):
+            solve_gross(1_000, payroll_input)
+        with self.assertRaises(ValueError):
+            solve_employer_cost(1_000, payroll_input)
+
+
+class LeanEvaluationTests(SimpleTestCase):
+    """Évaluation numérique du solveur et détail RTS paresseux"""
+
+    def test_lean_net_matches_full_evaluation(self):
+        for input_label, payroll_input in PAYROLL_INPUTS:
+            fixed_terms = engine_core._fixed_terms(payroll_input)
+            for basic in (0, 540_000, 1_234_567, 2_500_000, 7_000_000, 30_000_000):
+                with self.subTest(input_label, basic=basic):
+                    self.assertAlmostEqual(
+                        engine_core._net_from_basic(basic, *fixed_terms), evaluate(basic, payroll_input).net, places=6,
+                    )
+
+    def test_rts_details_are_built_on_first_read(self):
+        result = evaluate(5_125_000)
+        details = result.rts_details
+        self.assertIn('non évalué', repr(details))
+        self.assertEqual(list(details), engine_core.calculate_rts_detailed(result.imposable)[1])
+        self.assertIn('(évalué)', repr(details))
+        # Seuil, tranches 5% et 8% (le salaire imposable s'arrête à 5 000 000), total
+        self.assertEqual(len(details), 4)
+        self.assertIn("TOTAL RTS", details[-1])
+
+
+class PayrollResultTests(SimpleTestCase):
+    """Entrées et résultats typés du moteur, et leurs versions dictionnaire"""
+
+    def test_input_from_values_normalizes_to_floats(self):
+        payroll_input = PayrollInput.from_values(None, '0', Decimal('150000.50'), 0, '25000')
+        self.assertEqual(payroll_input, PayrollInput(0.0, 0.0, 150_000.5, 0.0, 25_000.0, 0.0))
+        self.assertTrue(all(isinstance(value, float) for value in payroll_input))
+
+    def test_results_are_immutable(self):
+        result = evaluate(3_000_000)
+        with self.assertRaises(AttributeError):
+            result.net = 0
+        self.assertEqual(result.total_cout_employeur, result.gross + result.total_cnss_patronal)
+
+    def test_dict_wrappers_match_results(self):
+        payroll_input = PAYROLL_INPUTS[1][1]
+        result = evaluate(2_000_000, payroll_input)
+        legacy = calculate_net_from_basic(2_000_000, *payroll_input)
+        self.assertEqual({key: value for key, value in legacy.items() if key != 'rts_details'}, result._asdict())
+        self.assertEqual(legacy['rts_details'], result.rts_details)
+
+        rounded = result.to_dict()
+        self.assertEqual((rounded['gross'], rounded['cnss']), (round(result.gross, 2), round(result.cnss_employee, 2)))
+
+    def test_results_to_columns(self):
+        results = solve_net_batch([1_000_000, 4_000_000], [PayrollInput(), PAYROLL_INPUTS[1][1]])
+        columns = results_to_columns(results)
+        self.assertEqual(set(columns), set(PayrollResult._fields))
+        self.assertEqual(columns['net'], [result.net for result in results])
+        self.assertEqual(results_to_columns([])['gross'], [])
+
+
+# =============================
+# SIMULATION SUR UNE PLAGE DE NETS
+# =============================
+
+class SalarySweepTests(SimpleTestCase):
+
+    def test_sweep_nets_bounds(self):
+        self.assertEqual(sweep.sweep_nets(1_000_000, 2_000_000, 250_000).tolist(), [
+            1_000_000, 1_250_000, 1_500_000, 1_750_000, 2_000_000,
+        ])
+        for start, stop, step in ((0, 1, 0), (2, 1, 1), (0, 1e12, 1), (0, float('inf'), 1), (float('nan'), 1, 1)):
+            with self.subTest(start=start, stop=stop, step=step), self.assertRaises(ValueError):
+                sweep.sweep_nets(start, stop, step)
+
+    def test_sweep_matches_scalar_engine(self):
+        nets = sweep.sweep_nets(500_000, 30_000_000, 2_500_000)
+        series = sweep.salary_sweep(nets, ['retraite'], 100_000)
+        for i, net in enumerate(nets):
+            with self.subTest(net=net):
+                expected = calculate_payroll(net, ['retraite'], 100_000)['result']
+                self.assertAlmostEqual(series['gross'][i], expected['gross'], delta=1)
+                self.assertAlmostEqual(series['rts'][i], expected['rts'], delta=1)
+                self.assertAlmostEqual(series['net'][i], net, delta=1)
+        self.assertTrue(((series['taux_effectif'] >= 0) & (series['taux_effectif'] < 1)).all())
+
+    def test_breakpoints_mark_regime_changes(self):
+        nets = sweep.sweep_nets(500_000, 20_000_000, 10_000)
+        breakpoints = sweep.salary_sweep(nets)['breakpoints']
+        kinds = {point['kind'] for point in breakpoints}
+        self.assertTrue({'rts', 'cnss_employe', 'primes'} <= kinds)
+        self.assertEqual(breakpoints, sorted(breakpoints, key=lambda point: (point['index'], point['kind'])))
+        for point in breakpoints:
+            self.assertEqual(point['net'], nets[point['index']])
+
+    def test_simulate_salaries_command(self):
+        output = io.StringIO()
+        call_command('simulate_salaries', start=1_000_000, stop=2_000_000, step=500_000,
+                     primes=['', 'retraite'], stdout=output)
+        header, *rows = read_csv([output.getvalue()])
+        self.assertEqual(header[:2], ['primes', 'salaire_net'])
+        self.assertEqual([row[0] for row in rows], ['', '', '', 'retraite', 'retraite', 'retraite'])
+        with self.assertRaises(CommandError):
+            call_command('simulate_salaries', primes=['inconnue'], stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('simulate_salaries', step=0, stdout=io.StringIO())
+
+
+class SimulationApiTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('simulation@test.gn', 'motdepasse'))
+
+    def test_simulation_api_returns_one_series_per_configuration(self):
+        response = self.client.get('/salaire/api/simulation/', {
+            'start': 1_000_000, 'stop': 2_000_000, 'step': 100_000, 'primes': ['', 'retraite,interim'],
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['net']), 11)
+        self.assertEqual([series['primes'] for series in data['series']], [[], ['retraite', 'interim']])
+        self.assertTrue(all(len(series['total_cout_employeur']) == 11 for series in data['series']))
+
+    def test_simulation_api_rejects_invalid_ranges(self):
+        for params in ({'step': 0}, {'start': 'inf'}, {'avantage_nature': 'nan'}, {'primes': 'inconnue'}):
+            with self.subTest(**params):
+                response = self.client.get('/salaire/api/simulation/', params)
+                self.assertEqual(response.status_code, 400)
+
+
+# =============================
+# API ASYNCHRONES
+# =============================
+
+class AsyncApiTests(TestCase):
+
+    payload = {'nom_complet': "Simulation", 'net_salary': '4500000', 'avantage_nature': '0',
+               'avance_salaire': '0', 'saisie_opposition': '0'}
+
+    def setUp(self):
+        self.user = User.objects.create_user('api@test.gn', 'motdepasse')
+        self.employees = [
+            create_employee(self.user, "Bah Aissatou", 1_000_000),
+            create_employee(self.user, "Camara Sekou", 3_000_000, 'retraite'),
+            create_employee(self.user, "Diallo Mamadou", 5_000_000),
+        ]
+        create_employee(User.objects.create_user('autre@test.gn', 'motdepasse'), "Keita Mariama")
+        self.client.force_login(self.user)
+
+    def test_calculate_matches_engine(self):
+        response = self.client.post('/salaire/api/calculate/', self.payload)
+        self.assertEqual(response.status_code, 200)
+        result = response.json()['result']
+        expected = calculate_payroll(4_500_000)['result']
+        self.assertEqual((result['gross'], result['rts']), (expected['gross'], expected['rts']))
+        self.assertNotIn('rts_details', result)
+
+        response = self.client.post('/salaire/api/calculate/?details=1', self.payload)
+        self.assertEqual(len(response.json()['result']['rts_details']), len(expected['rts_details']))
+
+    def test_calculate_rejects_invalid_form(self):
+        response = self.client.post('/salaire/api/calculate/', dict(self.payload, net_salary='beaucoup'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('net_salary', response.json()['errors'])
+
+    def test_employee_list_is_paginated_and_scoped(self):
+        data = self.client.get('/salaire/api/employees/', {'offset': 1, 'limit': 1}).json()
+        self.assertEqual((data['count'], data['offset'], data['limit']), (3, 1, 1))
+        self.assertEqual(len(data['results']), 1)
+        row = data['results'][0]
+        employee = Employee.objects.get(pk=row['id'])
+        self.assertEqual(Decimal(str(row['total_cout_employeur'])), employee.get_total_cout_employeur())
+
+        data = self.client.get('/salaire/api/employees/', {'limit': 1000}).json()
+        self.assertEqual(data['limit'], EMPLOYEE_LIST_MAX_LIMIT)
+        self.assertEqual({row['id'] for row in data['results']}, {employee.pk for employee in self.employees})
+
+    def test_export_status(self):
+        data = self.client.get('/salaire/api/export-status/').json()
+        self.user.refresh_from_db()
+        self.assertEqual((data['count'], data['version']), (3, self.user.employees_version))
+
+    def test_anonymous_requests_are_redirected(self):
+        self.client.logout()
+        for url in ('/salaire/api/employees/', '/salaire/api/export-status/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 302)
+
+
+# =============================
+# FRAGMENTS DE LA PAGE D'ACCUEIL
+# =============================
+
+class FragmentViewTests(TestCase):
+
+    payload = AsyncApiTests.payload
+
+    def setUp(self):
+        self.user = User.objects.create_user('fragments@test.gn', 'motdepasse')
+        self.client.force_login(self.user)
+
+    def test_result_fragment_saves_and_renders_panel_only(self):
+        response = self.client.post('/salaire/fragments/result/', self.payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'salary/partials/result_panel.html')
+        self.assertTemplateNotUsed(response, 'salary/index.html')
+        self.assertNotIn('<form', response.content.decode())
+        employee = Employee.objects.get(user=self.user)
+        self.assertEqual(employee.salaire_net, Decimal('4500000'))
+
+    def test_result_fragment_rejects_invalid_form(self):
+        response = self.client.post('/salaire/fragments/result/', dict(self.payload, net_salary=''))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('net_salary', response.json()['errors'])
+        self.assertFalse(Employee.objects.exists())
+
+    def test_employee_rows_fragment(self):
+        create_employee(self.user, "Bah Aissatou")
+        create_employee(self.user, "Camara Sekou")
+        create_employee(User.objects.create_user('autre@test.gn', 'motdepasse'), "Keita Mariama")
+
+        response = self.client.get('/salaire/fragments/employees/')
+        self.assertTemplateUsed(response, 'salary/partials/employee_rows.html')
+        content = response.content.decode()
+        self.assertEqual(content.count('<tr>'), 2)
+        self.assertNotIn("Keita Mariama", content)
+
+        content = self.client.get('/salaire/fragments/employees/', {'q': 'sekou'}).content.decode()
+        self.assertEqual((content.count('<tr>'), "Camara Sekou" in content), (1, True))
+
+
+# =============================
+# EXPORT EXCEL EN CACHE
+# =============================
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'exports': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'exports-tests'},
+})
+class ExcelExportTests(TestCase):
+
+    url = '/salaire/export-excel/'
+
+    def setUp(self):
+        self.user = User.objects.create_user('excel@test.gn', 'motdepasse')
+        self.employee = create_employee(self.user, "Bah Aissatou")
+        self.client.force_login(self.user)
+        # Identifiants réutilisés d'un test à l'autre : pas de fichier d'un test précédent
+        caches['exports'].clear()
+
+    def test_unchanged_export_is_cached_and_revalidated(self):
+        with mock.patch('salary.views.build_excel_export', wraps=build_excel_export) as build:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+        build.assert_called_once()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertTrue(first.content.startswith(b'PK'))
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_modification_changes_etag_and_rebuilds(self):
+        first = self.client.get(self.url)
+        update_employee(self.user, self.employee.pk, {'salaire_net': '2800000'})
+        with mock.patch('salary.views.build_excel_export', wraps=build_excel_export) as build:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        build.assert_called_once()
+
+
+# =============================
+# EXPORTS CSV ET JSON LINES
+# =============================
+
+class StreamingExportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('flux@test.gn', 'motdepasse')
+        self.employees = [
+            create_employee(self.user, f"Employé {index}", 1_000_000 * index, 'retraite' if index % 2 else '')
+            for index in range(1, 6)
+        ]
+        create_employee(User.objects.create_user('autre@test.gn', 'motdepasse'), "Keita Mariama")
+        self.queryset = Employee.objects.filter(user=self.user).order_by('id')
+
+    def test_csv_and_jsonl_carry_the_same_rows(self):
+        chunks = list(stream_csv(self.queryset, batch_size=2))
+        self.assertEqual(len(chunks), 3)
+        header, *rows = read_csv(chunks)
+        self.assertEqual(header, [header for _, header in get_export_columns(include_id=True)])
+        rows = [dict(zip(header, row)) for row in rows]
+        records = [json.loads(line) for line in ''.join(stream_jsonl(self.queryset, batch_size=2)).splitlines()]
+
+        self.assertEqual([int(row["ID"]) for row in rows], [employee.pk for employee in self.employees])
+        self.assertEqual([record['id'] for record in records], [employee.pk for employee in self.employees])
+        for row, record in zip(rows, records):
+            with self.subTest(employee=record['nom_complet']):
+                self.assertEqual(float(row["Salaire Brut"]), record['salaire_brut'])
+                # Tranches recalculées depuis le salaire imposable, arrondies au franc : leur somme est la RTS
+                self.assertAlmostEqual(sum(record[key] for key in RTS_TRANCHE_KEYS), record['rts'], delta=3)
+
+    def test_export_views_stream_user_rows(self):
+        self.client.force_login(self.user)
+        for url, extension in (('/salaire/export-csv/', 'csv'), ('/salaire/export-jsonl/', 'jsonl')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertIn(f'liste_employes.{extension}', response['Content-Disposition'])
+                content = b''.join(response.streaming_content).decode()
+                self.assertNotIn("Keita Mariama", content)
+                self.assertEqual(content.count("Employé "), len(self.employees))
+
+    def test_export_payroll_command(self):
+        output = io.StringIO()
+        call_command('export_payroll', format='jsonl', user='flux@test.gn', stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), len(self.employees))
+        with self.assertRaises(CommandError):
+            call_command('export_payroll', user='inconnu@test.gn', stdout=io.StringIO())
+
+
+# =============================
+# IMPACT D'UN BARÈME CANDIDAT
+# =============================
+
+class WhatIfTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('bareme@test.gn', 'motdepasse')
+        self.employees = [
+            create_employee(self.user, "Bah Aissatou", 400_000),
+            create_employee(self.user, "Camara Sekou", 1_800_000, avance_salaire=150_000),
+            create_employee(self.user, "Diallo Mamadou", 3_000_000, 'retraite,interim', 200_000),
+            create_employee(self.user, "Touré Ibrahima", 25_000_000),
+        ]
+        self.workforce = what_if.load_workforce(Employee.objects.filter(user=self.user))
+        # CNSS employé à 6 % et plafond relevé
+        self.candidate = RateSchedule.from_dict({'cnss_employee': {'rate': 0.06, 'ceiling': 150_000}})
+
+    def test_current_rates_change_nothing(self):
+        for keep in what_if.KEEP_CHOICES:
+            with self.subTest(keep=keep):
+                impact = what_if.compare_rates(self.workforce, engine_rates.DEFAULT_RATES, keep)
+                for name, (before, _, delta) in impact.items():
+                    self.assertFalse(np.abs(delta).max() > 1e-6, name)
+                stored = [float(employee.salaire_net) for employee in self.employees]
+                np.testing.assert_allclose(impact['salaire_net'][0], stored, atol=0.01)
+
+    def test_keep_gross_matches_scalar_engine_with_candidate(self):
+        impact = what_if.compare_rates(self.workforce, self.candidate, what_if.KEEP_GROSS)
+        np.testing.assert_allclose(impact['salaire_base'][2], 0)
+        with mock.patch.object(engine_core, 'DEFAULT_RATES', self.candidate):
+            for i, employee in enumerate(self.employees):
+                with self.subTest(employee.nom_complet):
+                    result = evaluate(float(employee.salaire_base), PayrollInput(
+                        primes_taxables=float(employee.primes_taxables),
+                        primes_exonerees=float(employee.primes_exonerees),
+                        avantage_nature=float(employee.avantage_nature),
+                    ))
+                    self.assertAlmostEqual(impact['cnss_employe'][1][i], result.cnss_employee, places=4)
+                    self.assertAlmostEqual(impact['salaire_net'][1][i], result.net, places=4)
+        # Cotisation salariale en hausse (sauf au plancher) : net en baisse, coût employeur inchangé
+        summary = what_if.summarize(impact)
+        self.assertEqual((summary['salaire_net']['baisses'], summary['salaire_net']['hausses']), (3, 0))
+        self.assertAlmostEqual(summary['cout_employeur']['ecart'], 0, places=4)
+        self.assertAlmostEqual(summary['salaire_net_a_payer']['ecart'], summary['salaire_net']['ecart'], places=4)
+
+    def test_keep_net_raises_employer_cost(self):
+        impact = what_if.compare_rates(self.workforce, self.candidate, what_if.KEEP_NET)
+        np.testing.assert_allclose(impact['salaire_net'][2], 0, atol=0.01)
+        # Au plancher CNSS (premier employé), rien ne change
+        self.assertEqual(impact['cout_employeur'][2][0], 0)
+        self.assertTrue((impact['cout_employeur'][2][1:] > 0).all())
+        self.assertTrue((impact['salaire_base'][2][1:] > 0).all())
+        with self.assertRaises(ValueError):
+            what_if.compare_rates(self.workforce, self.candidate, 'brut')
+
+    def test_rows_sorted_by_largest_delta(self):
+        impact = what_if.compare_rates(self.workforce, self.candidate)
+        rows = list(what_if.iter_impact_rows(self.workforce, impact, order_by='salaire_net', limit=3))
+        deltas = [abs(row['salaire_net_ecart']) for row in rows]
+        self.assertEqual((len(rows), deltas), (3, sorted(deltas, reverse=True)))
+        self.assertEqual(len(read_csv(what_if.stream_impact_csv(self.workforce, impact, batch_size=2))), 5)
+
+    def test_empty_workforce(self):
+        workforce = what_if.load_workforce(Employee.objects.none())
+        summary = what_if.summarize(what_if.compare_rates(workforce, self.candidate))
+        self.assertEqual((summary['employes'], summary['cout_employeur']['ecart']), (0, 0))
+
+    def test_what_if_view_writes_nothing(self):
+        self.client.force_login(self.user)
+        before = list(Employee.objects.values_list('salaire_net', 'cnss_employe'))
+        response = self.client.post('/salaire/what-if/', {
+            'rates': json.dumps(self.candidate.to_dict()), 'keep': what_if.KEEP_GROSS,
+        })
+        self.assertEqual(response.context['summary']['employes'], len(self.employees))
+        self.assertEqual(response.context['candidate_version'], self.candidate.version)
+        self.assertEqual(list(Employee.objects.values_list('salaire_net', 'cnss_employe')), before)
+        response = self.client.post('/salaire/what-if/', {'rates': '{"inconnu": 1}', 'keep': what_if.KEEP_GROSS})
+        self.assertTrue(response.context['form'].errors['rates'])
+
+
+# =============================
+# CHAÎNE DE TRAITEMENT EN FLUX
+# =============================
+
+class PipelineTests(SimpleTestCase):
+
+    def run_pipeline(self, text, input_format='jsonl', direction='net-to-gross'):
+        errors = []
+        output = io.StringIO()
+        pipeline.run(input_format, 'jsonl', direction, stdin=io.StringIO(text), stdout=output,
+                     on_error=lambda line_number, error: errors.append((line_number, str(error))))
+        return [json.loads(line) for line in output.getvalue().splitlines()], errors
+
+    def test_invalid_lines_are_reported_and_skipped(self):
+        lines = (
+            '{"id": 1, "net_salary": 2000000, "primes": ["retraite"]}',
+            '{"id": 2, "net_salary": ',
+            '[1, 2]',
+            '{"id": 4}',
+            '{"id": 5, "net_salary": "deux millions"}',
+            '{"id": 6, "net_salary": NaN}',
+            '{"id": 7, "net_salary": 1e400}',
+            '{"id": 8, "net_salary": "inf"}',
+            '{"id": 9, "net_salary": 1000000, "avance_salaire": "-Infinity"}',
+            '{"id": 10, "net_salary": 1000000, "primes": ["inconnue"]}',
+            '{"id": 11, "net_salary": 1000000, "primes": 12}',
+            '{"id": 12, "salaire_net": "1500000", "avance_salaire": 100000}',
+        )
+        rows, errors = self.run_pipeline('\n'.join(lines) + '\n')
+
+        self.assertEqual([row['id'] for row in rows], [1, 12])
+        self.assertEqual([line_number for line_number, _ in errors], list(range(2, 12)))
+        for line_number in (6, 7, 8, 9):
+            self.assertIn("valeur numérique invalide", dict(errors)[line_number])
+        self.assertEqual(rows[1]['salaire_net_a_payer'], 1_400_000)
+        expected = calculate_payroll(2_000_000, ['retraite'])['result']
+        self.assertEqual(rows[0]['gross'], round(expected['gross'], 2))
+
+    def test_strict_mode_raises_on_first_invalid_line(self):
+        records = pipeline.read_jsonl(io.StringIO('{"net_salary": 1000000}\n{"net_salary": NaN}\n'))
+        rows = pipeline.compute(records, pipeline.net_to_gross)
+        self.assertEqual(len([next(rows)]), 1)
+        with self.assertRaises(pipeline.RecordError):
+            next(rows)
+
+    def test_directions_agree(self):
+        rows, errors = self.run_pipeline('id,net_salary,primes\n1,2500000,retraite;interim\n', input_format='csv')
+        self.assertEqual(errors, [])
+        forward = rows[0]
+        for direction, record in (
+            ('gross-to-net', {'basic': forward['basic'], 'primes_taxables': forward['primes_taxables'],
+                              'primes_exonerees': forward['primes_exonerees']}),
+            ('cost-to-net', {'budget': forward['gross'] + forward['total_cnss_patronal'],
+                             'primes_taxables': forward['primes_taxables'],
+                             'primes_exonerees': forward['primes_exonerees']}),
+        ):
+            with self.subTest(direction):
+                rows, errors = self.run_pipeline(json.dumps(record) + '\n', direction=direction)
+                self.assertEqual(errors, [])
+                self.assertAlmostEqual(rows[0]['net'], forward['net'], delta=1)
+
+    def test_unreachable_budget_is_a_line_error(self):
+        rows, errors = self.run_pipeline('{"budget": 1000}\n{"budget": "1e400"}\n', direction='cost-to-net')
+        self.assertEqual((rows, [line_number for line_number, _ in errors]), ([], [1, 2]))
+
+
+# =============================
+# RÉPARTITION D'UNE ENVELOPPE
+# =============================
+
+class AllocationTests(SimpleTestCase):
+
+    def test_allocation_hits_budget(self):
+        weights = [1, 2, 3.5]
+        budget = 50_000_000
+        allocation = allocate_budget(weights, budget)
+
+        self.assertLessEqual(abs(allocation.ecart), 1)
+        self.assertAlmostEqual(float(allocation.columns['total_cout_employeur'].sum()), allocation.total_cost, places=4)
+        # Nets proportionnels aux poids
+        for net, weight in zip(allocation.columns['net'], weights):
+            self.assertAlmostEqual(net / weight, allocation.scale, places=4)
+        # Même coût que le moteur scalaire, employé par employé
+        for net, cost in zip(allocation.columns['net'], allocation.columns['total_cout_employeur']):
+            result = calculate_payroll(float(net))['result']
+            self.assertAlmostEqual(result['gross'] + result['total_cnss_patronal'], cost, delta=1)
+
+    def test_allocation_rejects_budget_below_minimum(self):
+        with self.assertRaises(ValueError):
+            allocate_budget([1, 1], 100_000)
+
+    def test_allocation_per_employee_primes_and_benefits(self):
+        weights = [1, 1, 2]
+        exempt_rate = np.array([0.0, 0.12, 0.05])
+        avantage_nature = np.array([0.0, 150_000.0, 0.0])
+        allocation = allocate_budget(weights, 30_000_000, exempt_rate=exempt_rate, avantage_nature=avantage_nature)
+
+        self.assertLessEqual(abs(allocation.ecart), 1)
+        # Employés 1 et 2 : même poids, donc même net, mais une partie du net de l'employé 2
+        # est versée en primes exonérées et avantage en nature : salaire de base plus faible
+        self.assertAlmostEqual(allocation.columns['net'][0], allocation.columns['net'][1], places=6)
+        self.assertLess(allocation.columns['basic'][1], allocation.columns['basic'][0])
+        self.assertEqual(allocation.columns['avantage_nature'][1], 150_000)
+
+    def test_allocation_rejects_invalid_weights(self):
+        for weights in ([], [0, 0], [1, -1], [1, float('nan')], [1, float('inf')]):
+            with self.subTest(weights=weights), self.assertRaises(ValueError):
+                allocate_budget(weights, 10_000_000)
+
+    def test_allocation_rejects_non_finite_budget(self):
+        for budget in (float('nan'), float('inf'), '1e400'):
+            with self.subTest(budget=budget), self.assertRaises(ValueError):
+                allocate_budget([1, 2], budget)
+
+
+class AllocationApiTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('enveloppe@test.gn', 'motdepasse')
+        self.employees = [
+            create_employee(self.user, "Bah Aissatou", 1_000_000),
+            create_employee(self.user, "Camara Sekou", 3_000_000, 'retraite', 100_000),
+        ]
+        self.client.force_login(self.user)
+
+    def post(self, payload):
+        return self.client.post('/salaire/api/allocation/', json.dumps(payload), content_type='application/json')
+
+    def test_allocation_api_weights_by_current_net(self):
+        response = self.post({'budget': 20_000_000})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertLessEqual(abs(data['ecart']), 1)
+        nets = {row['id']: row['salaire_net'] for row in data['employees']}
+        self.assertAlmostEqual(nets[self.employees[1].pk] / nets[self.employees[0].pk], 3, places=4)
+        # Rien n'est enregistré
+        self.assertEqual(Employee.objects.get(pk=self.employees[0].pk).salaire_net, Decimal('1000000'))
+
+    def test_allocation_api_rejects_invalid_payloads(self):
+        other = create_employee(User.objects.create_user('autre@test.gn', 'motdepasse'))
+        for payload in (
+            {},
+            {'budget': 'beaucoup'},
+            {'budget': 100_000},
+            {'budget': 10_000_000, 'employees': [{'id': other.pk}]},
+            {'budget': 'NaN'},
+            {'budget': 'Infinity'},
+            {'budget': 1e308 * 10},
+            {'budget': 10_000_000, 'employees': [{'id': self.employees[0].pk, 'weight': 'nan'}]},
+            {'budget': 10_000_000, 'employees': [{'nom_complet': "Keita", 'weight': 1, 'avantage_nature': 'inf'}]},
+        ):
+            with self.subTest(payload=payload):
+                response = self.post(payload)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('__all__', response.json()['errors'])
+
+
+# =============================
+# JOURNAL, CUMULS ANNUELS, DÉCLARATION CNSS ET VIREMENTS
+# =============================
+
+# Écart d'arrondi toléré par écriture équilibrée (montants arrondis au centime)
+ROUNDING = Decimal('0.05')
+
+
+def read_csv(chunks, delimiter=','):
+    return list(csv.reader(io.StringIO(''.join(chunks)), delimiter=delimiter))
+
+
+def amount(value):
+    return Decimal(value) if value else Decimal('0.00')
+
+
+class PayrollPeriodTestCase(TestCase):
+    """Période de janvier 2026 préparée pour cinq employés (le dernier sans coordonnées bancaires)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('rapports@test.gn', 'motdepasse')
+        # Plancher CNSS, tranches RTS intermédiaires, plafond CNSS, primes exonérées et déductions
+        self.employees = [
+            create_employee(self.user, "Bah Aissatou", 400_000),
+            create_employee(self.user, "Camara Sekou", 1_800_000, avance_salaire=150_000),
+            create_employee(self.user, "Diallo Mamadou", 3_000_000, 'retraite,interim', 200_000),
+            create_employee(self.user, "Sylla Fatoumata", 12_000_000, 'anciennete', saisie_opposition=500_000),
+            create_employee(self.user, "Touré Ibrahima", 25_000_000),
+        ]
+        Employee.objects.filter(user=self.user).exclude(nom_complet="Touré Ibrahima").update(
+            code_banque='GN001', code_guichet='00001', numero_compte='12345678901', cle_rib='12',
+        )
+        self.period, _ = prepare_period(self.user, 2026, 1)
+
+
+class PayrollPeriodTests(PayrollPeriodTestCase):
+
+    def test_lines_of_deleted_employees_are_kept(self):
+        Employee.objects.filter(pk=self.employees[0].pk).delete()
+        lines = self.period.lines.all()
+        self.assertEqual([line.employee_id for line in lines], sorted(employee.pk for employee in self.employees))
+        self.assertEqual(len(list(declaration_rows(lines))), len(self.employees))
+        rows = read_csv(stream_journal_csv(lines, per_employee=True), delimiter=';')[1:]
+        self.assertEqual(len({row[7] for row in rows}), len(self.employees))
+
+
+# Lignes (id, nom, montants) pour reconcile() : salaire imposable en 4e colonne
+def reconciliation_row(employee_id, net, imposable=1_000_000):
+    values = [float(net)] * len(RECONCILIATION_FIELDS)
+    values[RECONCILIATION_FIELDS.index('salaire_imposable')] = float(imposable)
+    return employee_id, f"Employé {employee_id}", tuple(values)
+
+
+class ReconciliationTests(PayrollPeriodTestCase):
+
+    def test_merge_classifies_each_employee(self):
+        before = [reconciliation_row(1, 1_000_000), reconciliation_row(2, 2_000_000), reconciliation_row(4, 500_000)]
+        after = [
+            reconciliation_row(2, 2_000_000.5), reconciliation_row(3, 800_000), reconciliation_row(4, 600_000),
+            reconciliation_row(5, 700_000),
+        ]
+        rows = {row['id']: row for row in reconcile(before, after)}
+
+        self.assertEqual({employee_id: row['statut'] for employee_id, row in rows.items()}, {
+            1: STATUS_REMOVED, 2: STATUS_UNCHANGED, 3: STATUS_ADDED, 4: STATUS_CHANGED, 5: STATUS_ADDED,
+        })
+        self.assertEqual(rows[4]['salaire_net_ecart'], 100_000)
+        self.assertEqual(rows[1]['salaire_net_apres'], 0)
+        self.assertIn('salaire_net', rows[4]['alertes'].split())
+
+    def test_thresholds_relative_and_rts_bracket(self):
+        before = [reconciliation_row(1, 1_000_000), reconciliation_row(2, 1_000_000, imposable=2_900_000)]
+        after = [reconciliation_row(1, 1_050_000), reconciliation_row(2, 1_000_000, imposable=3_100_000)]
+        thresholds = dict.fromkeys(RECONCILIATION_FIELDS, 100_000)
+        self.assertEqual([row['statut'] for row in reconcile(before, after, thresholds=thresholds)],
+                         [STATUS_UNCHANGED, STATUS_CHANGED])
+        # Écart relatif : 5 % < 10 %, mais le changement de tranche RTS est toujours signalé
+        rows = list(reconcile(before, after, relative=0.10))
+        self.assertEqual(rows[0]['statut'], STATUS_UNCHANGED)
+        self.assertIn('tranche_rts 2→3', rows[1]['alertes'])
+
+    def test_periods_reconcile_and_summarize(self):
+        period = close_period(self.period)
+        update_employee(self.user, self.employees[1].pk, {'salaire_net': '2000000'})
+        Employee.objects.filter(pk=self.employees[0].pk).delete()
+        create_employee(self.user, "Keita Mariama", 900_000)
+        february, _ = prepare_period(self.user, 2026, 2)
+
+        summary = summarize(reconcile(period_rows(period), period_rows(february)))
+        self.assertEqual(summary['statuts'], {
+            STATUS_ADDED: 1, STATUS_REMOVED: 1, STATUS_CHANGED: 1, STATUS_UNCHANGED: len(self.employees) - 2,
+        })
+        for name, lines in (('avant', period.lines), ('apres', february.lines)):
+            with self.subTest(name):
+                self.assertAlmostEqual(summary['totaux']['salaire_brut'][name],
+                                       float(lines.aggregate(total=Sum('salaire_brut'))['total']), places=2)
+        # Lignes non identiques, de la plus forte à la plus faible variation du net
+        ecarts = [abs(row['salaire_net_ecart']) for row in summary['lignes']]
+        self.assertEqual((len(ecarts), ecarts), (3, sorted(ecarts, reverse=True)))
+        self.assertEqual(summary['lignes'][0]['nom_complet'], "Keita Mariama")
+
+    def test_exports_reconcile_with_application_export(self):
+        employees = Employee.objects.filter(user=self.user).order_by('id')
+        before = ''.join(stream_csv(employees))
+        update_employee(self.user, self.employees[2].pk, {'avance_salaire': '100000'})
+        after = ''.join(stream_jsonl(employees))
+
+        rows = list(reconcile(
+            snapshot_rows(pipeline.read_csv(io.StringIO(before))), snapshot_rows(pipeline.read_jsonl(io.StringIO(after))),
+        ))
+        changed = [row for row in rows if row['statut'] != STATUS_UNCHANGED]
+        self.assertEqual([(row['id'], row['alertes']) for row in changed], [(self.employees[2].pk, 'salaire_net_a_payer')])
+        csv_rows = read_csv(stream_reconciliation_csv(iter(rows)))
+        self.assertEqual(len(csv_rows), 2)
+
+    def test_invalid_exports_are_rejected(self):
+        for label, records in (
+            ("non trié", [{'id': 2, 'salaire_net': 1}, {'id': 1, 'salaire_net': 1}]),
+            ("sans id", [{'salaire_net': 1}]),
+            ("valeur invalide", [{'id': 1, 'salaire_net': 'abc'}]),
+            ("nan", [{'id': 1, 'salaire_net': 'nan'}]),
+            ("infini", [{'id': 1, 'salaire_brut': float('inf')}]),
+        ):
+            with self.subTest(label), self.assertRaises(ValueError):
+                list(snapshot_rows(records))
+
+    def test_reconciliation_view(self):
+        period = close_period(self.period)
+        february, _ = prepare_period(self.user, 2026, 2)
+        self.client.force_login(self.user)
+        response = self.client.get('/salaire/reconciliation/')
+        self.assertEqual(response.context['form'].initial, {'apres': february, 'avant': period})
+
+        data = {'avant': period.pk, 'apres': february.pk, 'seuil': '1'}
+        response = self.client.post('/salaire/reconciliation/', data)
+        self.assertEqual(response.context['summary']['statuts'][STATUS_UNCHANGED], len(self.employees))
+        response = self.client.post('/salaire/reconciliation/', dict(data, download='csv'))
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+
+class JournalExportTests(PayrollPeriodTestCase):
+
+    def test_aggregated_journal_balances(self):
+        entries = journal_entries(journal_totals(self.period.lines.all()))
+        debits = sum(debit for _, _, debit, _ in entries)
+        credits = sum(credit for _, _, _, credit in entries)
+        self.assertEqual(debits, credits)
+        ecart = [entry for entry in entries if entry[0] == get_ledger_accounts()['ecart']]
+        for _, _, debit, credit in ecart:
+            self.assertLessEqual(debit + credit, ROUNDING * len(self.employees))
+
+        rows = read_csv(stream_journal_csv(self.period.lines.all()), delimiter=';')[1:]
+        self.assertEqual(sum(amount(row[5]) for row in rows), debits)
+        self.assertEqual(sum(amount(row[6]) for row in rows), credits)
+
+    def test_per_employee_journal_balances(self):
+        rows = read_csv(stream_journal_csv(self.period.lines.all(), per_employee=True), delimiter=';')[1:]
+        balances = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00')])
+        ecart_account = get_ledger_accounts()['ecart']
+        for _, _, _, account, _, debit, credit, employee_id in rows:
+            balances[employee_id][0] += amount(debit)
+            balances[employee_id][1] += amount(credit)
+            if account == ecart_account:
+                self.assertLessEqual(amount(debit) + amount(credit), ROUNDING)
+        self.assertEqual(len(balances), len(self.employees))
+        for employee_id, (debits, credits) in balances.items():
+            with self.subTest(employee_id=employee_id):
+                self.assertEqual(debits, credits)
+                self.assertGreater(debits, 0)
+
+    def test_journal_download_uses_period_date_and_piece(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/salaire/journal/', {'period': self.period.pk, 'detail': 'comptes', 'download': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('journal_paie_2026_01.csv', response['Content-Disposition'])
+        rows = read_csv((chunk.decode() for chunk in response.streaming_content), delimiter=';')
+        self.assertEqual(tuple(rows[0]), JOURNAL_HEADERS)
+        self.assertEqual({(row[1], row[2]) for row in rows[1:]}, {('31/01/2026', 'JOURNAL-PAIE-2026-01')})
+
+
+class CnssDeclarationTests(PayrollPeriodTestCase):
+
+    def test_cnss_declaration_totals_match_rows(self):
+        queryset = self.period.lines.all()
+        rows = list(declaration_rows(queryset))
+        totals = declaration_totals(queryset)
+        columns = [key for key, _ in DECLARATION_COLUMNS]
+
+        self.assertEqual(totals['employes'], len(rows))
+        for name in ('salaire_brut', 'cnss_employe', 'cnss_employeur', 'total_cnss'):
+            with self.subTest(name):
+                self.assertEqual(totals[name], sum(row[columns.index(name)] for row in rows))
+        limits = [(row[columns.index('limite_employe')], row[columns.index('limite_employeur')]) for row in rows]
+        self.assertEqual(totals['employes_plancher'], sum('plancher' in limit for limit in limits))
+        self.assertEqual(totals['employes_plafond'], sum('plafond' in limit for limit in limits))
+        self.assertGreater(totals['employes_plancher'], 0)
+        self.assertGreater(totals['employes_plafond'], 0)
+
+    def test_period_declaration_reads_frozen_lines(self):
+        before = declaration_totals(self.period.lines.all())
+        update_employee(self.user, self.employees[1].pk, {'salaire_net': '2500000'})
+        self.assertEqual(declaration_totals(self.period.lines.all()), before)
+        self.assertNotEqual(declaration_totals(Employee.objects.filter(user=self.user)), before)
+
+    def test_declaration_download_ends_with_totals(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/salaire/cnss-declaration/', {'period': self.period.pk, 'download': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        rows = read_csv(chunk.decode() for chunk in response.streaming_content)
+        totals = declaration_totals(self.period.lines.all())
+        self.assertEqual(len(rows), len(self.employees) + 2)
+        self.assertEqual(rows[-1][:3], ["TOTAL", f"{len(self.employees)} employé(s)", str(totals['salaire_brut'])])
+
+
+class AnnualSummaryTests(PayrollPeriodTestCase):
+
+    def test_incremental_annual_summaries_match_rebuild(self):
+        close_period(self.period)
+        # Février : une augmentation, un changement de nom et un nouvel employé
+        update_employee(self.user, self.employees[1].pk, {'salaire_net': '2100000', 'nom_complet': "Camara Sékou"})
+        create_employee(self.user, "Keita Mariama", 900_000)
+        close_period(prepare_period(self.user, 2026, 2)[0])
+
+        fields = ('employee_id', 'nom_complet', 'mois') + ANNUAL_FIELDS
+        summaries = AnnualSummary.objects.filter(user=self.user, annee=2026).order_by('employee_id')
+        incremental = list(summaries.values_list(*fields))
+        self.assertEqual(len(incremental), len(self.employees) + 1)
+        self.assertEqual(rebuild_annual_summaries(self.user, 2026), len(incremental))
+        self.assertEqual(list(summaries.values_list(*fields)), incremental)
+
+    def test_annual_totals_match_closed_lines(self):
+        close_period(self.period)
+        close_period(prepare_period(self.user, 2026, 2)[0])
+        # Période préparée mais non clôturée : hors cumuls
+        prepare_period(self.user, 2026, 3)
+
+        totals = annual_totals(self.user, 2026)
+        lines = PayrollLine.objects.filter(period__user=self.user, period__statut=PayrollPeriod.STATUT_CLOTUREE)
+        self.assertEqual(totals['employes'], len(self.employees))
+        for name in ANNUAL_FIELDS:
+            with self.subTest(name):
+                self.assertEqual(totals[name], lines.aggregate(total=Sum(name))['total'])
+        self.assertEqual(set(AnnualSummary.objects.filter(user=self.user).values_list('mois', flat=True)), {2})
+
+    def test_closed_period_is_added_once(self):
+        close_period(self.period)
+        with self.assertRaises(ValueError):
+            close_period(self.period)
+        self.assertEqual(set(AnnualSummary.objects.filter(user=self.user).values_list('mois', flat=True)), {1})
+
+    def test_annual_csv_has_one_row_per_summary(self):
+        close_period(self.period)
+        summaries = AnnualSummary.objects.filter(user=self.user, annee=2026)
+        rows = read_csv(stream_annual_csv(summaries, batch_size=2))
+        self.assertEqual(rows[0], [header for _, header in ANNUAL_EXPORT_COLUMNS])
+        self.assertEqual(len(rows) - 1, summaries.count())
+
+
+class BankTransferTests(PayrollPeriodTestCase):
+
+    def test_bank_trailer_matches_details(self):
+        layout = get_layout()
+        widths = {record: [field.width for field in layout[record]] for record in ('detail', 'trailer')}
+        detail_amount = sum(widths['detail'][:7])
+        for label, queryset in (
+            ("employés", payments_queryset(Employee.objects.filter(user=self.user))),
+            ("période", period_payments_queryset(self.period)),
+        ):
+            with self.subTest(label, transfer_format=FORMAT_FIXED):
+                lines = ''.join(stream_transfer_file(queryset, FORMAT_FIXED, date(2026, 1, 31))).split('\r\n')[:-1]
+                details = [line for line in lines if line.startswith('D')]
+                trailer = lines[-1]
+                self.assertEqual(len(details), len(self.employees) - 1)
+                self.assertTrue(trailer.startswith('T'))
+                self.assertEqual(int(trailer[1:1 + widths['trailer'][1]]), len(details))
+                self.assertEqual(
+                    int(trailer[1 + widths['trailer'][1]:]),
+                    sum(int(line[detail_amount:detail_amount + widths['detail'][7]]) for line in details),
+                )
+            with self.subTest(label, transfer_format=FORMAT_CSV):
+                rows = read_csv(stream_transfer_file(queryset, FORMAT_CSV), delimiter=';')
+                details, trailer = rows[1:-1], rows[-1]
+                self.assertEqual(trailer[0], 'T')
+                self.assertEqual(int(trailer[1]), len(details))
+                self.assertEqual(int(trailer[2]), sum(int(row[7]) for row in details))
+
+    def test_transfers_skip_missing_accounts_and_nothing_to_pay(self):
+        employees = Employee.objects.filter(user=self.user)
+        Employee.objects.filter(pk=self.employees[0].pk).update(salaire_net_a_payer=0)
+
+        payments = payments_queryset(employees)
+        self.assertEqual(payments.count(), len(self.employees) - 2)
+        self.assertEqual(list(missing_accounts(employees)), [self.employees[-1]])
+        totals = transfer_totals(payments)
+        self.assertEqual(totals['nombre'], payments.count())
+        self.assertEqual(totals['total'], sum(employee.salaire_net_a_payer for employee in payments))
+
+    def test_period_lines_without_account_are_counted(self):
+        # Touré Ibrahima : compte non renseigné ; Bah Aissatou supprimée, Camara Sekou compte effacé depuis
+        Employee.objects.filter(pk=self.employees[0].pk).delete()
+        Employee.objects.filter(pk=self.employees[1].pk).update(numero_compte='')
+
+        payments = period_payments_queryset(self.period)
+        missing = period_missing_accounts(self.period)
+        self.assertEqual(
+            set(missing.values_list('nom_complet', flat=True)), {"Bah Aissatou", "Camara Sekou", "Touré Ibrahima"},
+        )
+        self.assertEqual(payments.count() + missing.count(), self.period.lines.filter(salaire_net_a_payer__gt=0).count())
+        rows = read_csv(stream_transfer_file(payments, FORMAT_CSV), delimiter=';')[1:-1]
+        self.assertEqual(len(rows), 2)
+        self.assertNotIn('', [row[4] for row in rows])
+
+    def test_period_transfer_refused_while_lines_lack_account(self):
+        self.client.force_login(self.user)
+        data = {'period': self.period.pk, 'transfer_format': FORMAT_CSV, 'date_execution': '2026-01-31'}
+        response = self.client.post('/salaire/bank-transfer/', data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("1 ligne(s) de la paie", response.context['form'].non_field_errors()[0])
+        self.assertEqual(response.context['period_missing'], 1)
+
+        response = self.client.post('/salaire/bank-transfer/', dict(data, ignorer_sans_compte='on'))
+        rows = read_csv((chunk.decode() for chunk in response.streaming_content), delimiter=';')
+        self.assertEqual(int(rows[-1][1]), len(self.employees) - 1)
+
+        with self.assertRaises(CommandError):
+            call_command('export_bank_transfer', user=self.user.email, period='2026-01', stdout=io.StringIO())
+        output = io.StringIO()
+        call_command('export_bank_transfer', user=self.user.email, period='2026-01', skip_missing=True,
+                     stdout=output, stderr=io.StringIO())
+        self.assertEqual(int(read_csv([output.getvalue()], delimiter=';')[-1][1]), len(self.employees) - 1)
+
+    def test_fixed_layout_truncates_names_and_rejects_long_accounts(self):
+        employees = Employee.objects.filter(user=self.user)
+        Employee.objects.filter(pk=self.employees[0].pk).update(nom_complet='Bah ' + 'A' * 60)
+        lines = ''.join(stream_transfer_file(payments_queryset(employees), FORMAT_FIXED)).split('\r\n')[:-1]
+        width = sum(field.width for field in get_layout()['detail'])
+        self.assertEqual({len(line) for line in lines if line.startswith('D')}, {width})
+
+        Employee.objects.filter(pk=self.employees[0].pk).update(numero_compte='1' * 21)
+        with self.assertRaises(ValueError):
+            ''.join(stream_transfer_file(payments_queryset(employees), FORMAT_FIXED))
+
+
+# =============================
+# INSTANTANÉS EN COLONNES
+# =============================
+
+class PayrollSnapshotTests(PayrollPeriodTestCase):
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.enterContext(override_settings(PAYROLL_SNAPSHOT_ROOT=root.name))
+        self.root = Path(root.name)
+
+    def close(self, period):
+        with self.captureOnCommitCallbacks(execute=True):
+            return close_period(period)
+
+    def leftovers(self):
+        return [path.name for path in self.root.rglob('.*')]
+
+    def test_close_writes_snapshot_matching_lines(self):
+        self.close(self.period)
+        snapshot = load_snapshot(self.period)
+        self.assertEqual(len(snapshot), len(self.employees))
+        lines = self.period.lines.all()
+        totals = snapshot.totals()
+        for name in SNAPSHOT_FIELDS:
+            with self.subTest(name):
+                self.assertAlmostEqual(totals[name], float(lines.aggregate(total=Sum(name))['total']), places=2)
+        self.assertAlmostEqual(totals['cout_employeur'], totals['salaire_brut'] + totals['total_cnss_patronal'], places=2)
+        self.assertEqual(list(snapshot.column('employee_id')), sorted(employee.pk for employee in self.employees))
+
+    def test_group_totals_and_percentiles(self):
+        self.close(self.period)
+        snapshot = load_snapshot(self.period)
+        lines = self.period.lines.all()
+        for by in GROUP_COLUMNS:
+            with self.subTest(by):
+                groups = snapshot.group_totals(by, ('cout_employeur', 'salaire_net'))
+                self.assertEqual(sum(group['employes'] for group in groups), len(self.employees))
+                self.assertAlmostEqual(sum(group['salaire_net'] for group in groups),
+                                       float(lines.aggregate(total=Sum('salaire_net'))['total']), places=2)
+        primes = {group['groupe']: group['employes'] for group in snapshot.group_totals('primes')}
+        self.assertEqual(primes, {"Aucune": 3, 'retraite,interim': 1, 'anciennete': 1})
+
+        nets = [float(net) for net in lines.values_list('salaire_net', flat=True)]
+        self.assertEqual(snapshot.percentiles('salaire_net', (0, 50, 100)), {
+            0: min(nets), 50: round(float(np.median(nets)), 2), 100: max(nets),
+        })
+        self.assertEqual(sum(snapshot.histogram('salaire_net', bins=4)['counts']), len(self.employees))
+        with self.assertRaises(KeyError):
+            snapshot.group_totals('salaire_net')
+
+    def test_rewrite_replaces_snapshot_in_one_step(self):
+        period = self.close(self.period)
+        path = snapshot_path(period)
+        period.lines.filter(employee=self.employees[0]).update(salaire_net=Decimal('500000'))
+        self.assertEqual(write_snapshot(period), path)
+        self.assertEqual(load_snapshot(period).column('salaire_net')[0], 500_000)
+        self.assertEqual(self.leftovers(), [])
+
+        # Échec en cours d'écriture : l'instantané précédent reste en place, sans fichiers temporaires
+        with mock.patch('salary.snapshots._fill', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            write_snapshot(period)
+        self.assertEqual(load_snapshot(period).column('salaire_net')[0], 500_000)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_empty_period(self):
+        user = User.objects.create_user('vide@test.gn', 'motdepasse')
+        period = self.close(prepare_period(user, 2026, 1)[0])
+        snapshot = load_snapshot(period)
+        self.assertEqual(len(snapshot), 0)
+        self.assertEqual(snapshot.totals()['cout_employeur'], 0)
+        self.assertEqual(snapshot.histogram('salaire_net'), {'edges': [], 'counts': []})
+        self.assertEqual(snapshot.percentiles('salaire_net'), {})
+        self.assertEqual(snapshot.group_totals('tranche_rts'), [])
+
+    def test_open_period_is_not_written(self):
+        with self.assertRaises(ValueError):
+            write_snapshot(self.period)
+        self.assertIsNone(load_snapshot(self.period))
+
+    def test_snapshot_api(self):
+        self.client.force_login(self.user)
+        url = f'/salaire/api/snapshots/{self.period.pk}/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.close(self.period)
+        data = self.client.get(url, {'group_by': 'primes'}).json()
+        self.assertEqual(data['employes'], len(self.employees))
+        self.assertEqual(sum(group['employes'] for group in data['groups']), len(self.employees))
+        self.assertEqual(self.client.get(url, {'column': 'inconnue'}).status_code, 400)
+
+
+# =============================
+# RECHERCHE PAR NOM
+# =============================
+
+@skipUnless(connection.vendor == 'sqlite', "Index FTS5 propre à SQLite")
+class EmployeeSearchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('recherche@test.gn', 'motdepasse')
+        self.employees = Employee.objects.filter(user=self.user)
+        self.sekou = create_employee(self.user, "Diallo Sékou")
+        self.saidou = create_employee(self.user, "Bah Mamadou Saïdou")
+
+    def found(self, query):
+        return set(search_employees(self.employees, query).values_list('nom_complet', flat=True))
+
+    def test_triggers_survive_table_rebuild(self):
+        # 0016 reconstruit salary_employee (colonne générée) puis recrée les déclencheurs de 0015
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [Employee._meta.db_table],
+            )
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertEqual(triggers, {f'{SEARCH_TABLE}_insert', f'{SEARCH_TABLE}_delete', f'{SEARCH_TABLE}_update'})
+
+    def test_accented_and_unaccented_prefixes(self):
+        for query, expected in (
+            ('dia sek', {"Diallo Sékou"}),
+            ('DIALLO SÉKOU', {"Diallo Sékou"}),
+            ('sékou diallo', {"Diallo Sékou"}),
+            ('said', {"Bah Mamadou Saïdou"}),
+            ('saï', {"Bah Mamadou Saïdou"}),
+            ('ba', {"Bah Mamadou Saïdou"}),
+            # Préfixes seulement, tous les mots requis
+            ('allo', set()),
+            ('diallo said', set()),
+            ('', {"Diallo Sékou", "Bah Mamadou Saïdou"}),
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), expected)
+
+    def test_index_follows_save_and_bulk_create(self):
+        self.sekou.nom_complet = "Camara Sékou"
+        self.sekou.save(update_fields=['nom_complet'])
+        Employee.objects.bulk_create([
+            Employee(user=self.user, nom_complet=name, **employee_values()) for name in ("Keita Mariama", "Kéita Fanta")
+        ])
+        self.assertEqual(self.found('diallo'), set())
+        self.assertEqual(self.found('cam sek'), {"Camara Sékou"})
+        self.assertEqual(self.found('keita'), {"Keita Mariama", "Kéita Fanta"})
+
+    def test_index_follows_queryset_update_and_delete(self):
+        self.employees.filter(pk=self.saidou.pk).update(nom_complet="Sow Oumou")
+        self.assertEqual(self.found('bah'), set())
+        self.assertEqual(self.found('sow'), {"Sow Oumou"})
+        # Colonnes autres que le nom : index inchangé
+        self.employees.update(avance_salaire=Decimal('1000'))
+        self.assertEqual(self.found('sek'), {"Diallo Sékou"})
+
+        self.employees.filter(pk=self.sekou.pk).delete()
+        self.assertEqual(self.found('diallo'), set())
+        Employee.objects.filter(pk=self.saidou.pk).delete()
+        self.assertEqual(self.found('sow'), set())
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_api_search(self):
+        self.client.force_login(self.user)
+        data = self.client.get('/salaire/api/employees/', {'q': 'Sekou'}).json()
+        self.assertEqual((data['count'], data['results'][0]['id']), (1, self.sekou.pk))
+
+
+# =============================
+# ADMINISTRATION DES EMPLOYÉS
+# =============================
+
+class EmployeeAdminTests(TestCase):
+
+    changelist_url = '/admin/salary/employee/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin@test.gn', 'motdepasse')
+        self.user = User.objects.create_user('paie@test.gn', 'motdepasse')
+        self.employees = [
+            create_employee(self.user, "Bah Aissatou", 400_000),
+            create_employee(self.user, "Camara Sekou", 1_500_000),
+            create_employee(self.user, "Diallo Mamadou", 1_800_000, 'retraite,interim', 200_000),
+            create_employee(self.user, "Touré Ibrahima", 25_000_000),
+        ]
+        self.client.force_login(self.admin)
+        audit._buffer.clear()
+        self.addCleanup(audit._buffer.clear)
+
+    def changelist(self, **params):
+        response = self.client.get(self.changelist_url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_cout_employeur_is_computed_by_database(self):
+        for employee in Employee.objects.all():
+            with self.subTest(employee.nom_complet):
+                self.assertEqual(employee.cout_employeur, employee.salaire_brut + employee.total_cnss_patronal)
+        # Colonne générée : suit les colonnes sources sans passer par save()
+        Employee.objects.filter(pk=self.employees[0].pk).update(total_cnss_patronal=0)
+        employee = Employee.objects.get(pk=self.employees[0].pk)
+        self.assertEqual(employee.cout_employeur, employee.salaire_brut)
+
+    def test_footer_totals_follow_filtered_list(self):
+        for params, expected in (
+            ({}, self.employees),
+            ({'tranche_net': '1000000-2000000'}, self.employees[1:3]),
+            ({'tranche_net': '10000000-'}, self.employees[3:]),
+            ({'tranche_cout': '-1000000'}, self.employees[:1]),
+            ({'q': 'sek'}, self.employees[1:2]),
+        ):
+            with self.subTest(**params):
+                response = self.changelist(**params)
+                self.assertEqual(response.context_data['changelist_count'], len(expected))
+                totals = dict(response.context_data['changelist_totals'])
+                self.assertEqual(totals["Salaire net"], sum(employee.salaire_net for employee in expected))
+                self.assertEqual(totals["Coût employeur"], sum(
+                    employee.salaire_brut + employee.total_cnss_patronal for employee in expected
+                ))
+                self.assertEqual(
+                    {employee.pk for employee in response.context_data['cl'].result_list},
+                    {employee.pk for employee in expected},
+                )
+
+    def test_band_filter_choices(self):
+        response = self.changelist()
+        filters = {spec.parameter_name: spec for spec in response.context_data['cl'].filter_specs
+                   if hasattr(spec, 'parameter_name')}
+        choices = [label for _, label in filters['tranche_net'].lookup_choices]
+        self.assertEqual(choices[0], "Moins de 500 000")
+        self.assertEqual(choices[-1], "10 000 000 et plus")
+        self.assertEqual(len(choices), len(filters['tranche_net'].bands) + 1)
+
+    def test_empty_list_totals(self):
+        response = self.changelist(q='inconnu')
+        self.assertEqual(response.context_data['changelist_count'], 0)
+        self.assertEqual(dict(response.context_data['changelist_totals'])["Salaire net"], Decimal('0.00'))
+
+    def run_action(self, action, employees, **data):
+        return self.client.post(self.changelist_url, {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [employee.pk for employee in employees],
+            **data,
+        })
+
+    def test_reassign_shows_confirmation_first(self):
+        target = User.objects.create_user('reprise@test.gn', 'motdepasse')
+        response = self.run_action('reassign_selected', self.employees[:2])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context_data['count'], 2)
+        self.assertFalse(Employee.objects.filter(user=target).exists())
+
+    def test_reassign_updates_owner_and_audits_previous_one(self):
+        target = User.objects.create_user('reprise@test.gn', 'motdepasse')
+        moved = self.employees[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.run_action('reassign_selected', moved, apply='1', user=target.pk)
+        audit.flush()
+        self.assertRedirects(response, self.changelist_url, fetch_redirect_response=False)
+        self.assertEqual(
+            set(Employee.objects.filter(user=target).values_list('pk', flat=True)),
+            {employee.pk for employee in moved},
+        )
+        self.assertEqual(Employee.objects.filter(user=self.user).count(), 2)
+        events = AuditEvent.objects.filter(action=AuditEvent.ACTION_MODIFICATION, user=self.admin)
+        self.assertEqual(
+            {event.employee_id: event.details for event in events},
+            {employee.pk: {'user': target.pk, 'ancien_user': self.user.pk} for employee in moved},
+        )
+
+    def test_recompute_rewrites_stale_columns(self):
+        employee = self.employees[2]
+        expected = Employee.objects.get(pk=employee.pk)
+        Employee.objects.filter(pk=employee.pk).update(salaire_base=1, rts=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.run_action('recompute_selected', self.employees)
+        audit.flush()
+        self.assertRedirects(response, self.changelist_url, fetch_redirect_response=False)
+        employee = Employee.objects.get(pk=employee.pk)
+        self.assertEqual((employee.salaire_base, employee.rts), (expected.salaire_base, expected.rts))
+        events = AuditEvent.objects.filter(action=AuditEvent.ACTION_CALCUL)
+        self.assertEqual(list(events.values_list('employee_id', flat=True)), [employee.pk])
+        self.assertEqual(set(events.get().details), {'salaire_base', 'rts'})
+
+
+# =============================
+# RÉPLIQUE EN LECTURE
+# =============================
+
+# Seule la présence de l'alias est lue par le routeur : aucune connexion à la réplique n'est ouverte
+REPLICA_DATABASES = dict(settings.DATABASES, **{
+    REPLICA_ALIAS: dict(settings.DATABASES['default'], TEST={'MIRROR': 'default'}),
+})
+PRIMARY_ONLY_DATABASES = {'default': settings.DATABASES['default']}
+
+
+def replica_read_view(request):
+    """Vue de test : base choisie par le routeur pour une lecture"""
+    return HttpResponse(ReplicaRouter().db_for_read(Employee))
+
+
+def write_view(model):
+    def view(request):
+        ReplicaRouter().db_for_write(model)
+        return HttpResponse()
+    return view
+
+
+@override_settings(PAYROLL_REPLICA_MAX_LAG=30)
+class ReplicaRouterTests(SimpleTestCase):
+    """Hors transaction (SimpleTestCase) : le routeur n'écarte pas la réplique pour un bloc atomic ouvert"""
+
+    def setUp(self):
+        self.override_databases(REPLICA_DATABASES)
+        _replica_state.update(checked_at=None, available=False)
+        self.request = RequestFactory().get('/')
+        self.request.session = SessionStore()
+
+    def override_databases(self, databases):
+        # Avertissement attendu de Django pour DATABASES, vérifié ici plutôt que masqué pour tout le module
+        with self.assertWarnsMessage(UserWarning, "Overriding setting DATABASES"):
+            self.enterContext(override_settings(DATABASES=databases))
+
+    def read(self):
+        return use_replica(replica_read_view)(self.request).content.decode()
+
+    def test_reads_outside_use_replica_go_to_primary(self):
+        with mock.patch('salary.db_routers.replica_lag', return_value=0.0):
+            self.assertEqual(ReplicaRouter().db_for_read(Employee), 'default')
+            self.assertEqual(self.read(), REPLICA_ALIAS)
+
+    def test_writes_always_go_to_primary(self):
+        with mock.patch('salary.db_routers.replica_lag', return_value=0.0):
+            self.assertEqual(use_replica(write_view(Employee))(self.request).status_code, 200)
+            self.assertEqual(ReplicaRouter().db_for_write(Employee), 'default')
+
+    def test_unconfigured_replica_falls_back_to_primary(self):
+        self.override_databases(PRIMARY_ONLY_DATABASES)
+        with mock.patch('salary.db_routers.replica_lag') as replica_lag:
+            self.assertEqual(self.read(), 'default')
+        replica_lag.assert_not_called()
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch('salary.db_routers.replica_lag', return_value=120.0), self.assertLogs('salary.db_routers', 'WARNING'):
+            self.assertEqual(self.read(), 'default')
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        with mock.patch('salary.db_routers.replica_lag', side_effect=DatabaseError), self.assertLogs('salary.db_routers', 'WARNING'):
+            self.assertEqual(self.read(), 'default')
+
+    @override_settings(PAYROLL_REPLICA_CHECK_INTERVAL=5)
+    def test_replica_state_is_cached(self):
+        with mock.patch('salary.db_routers.replica_lag', return_value=0.0) as replica_lag:
+            self.assertEqual(self.read(), REPLICA_ALIAS)
+            self.assertEqual(self.read(), REPLICA_ALIAS)
+        replica_lag.assert_called_once()
+        # Mesure périmée : nouvelle mesure, la réplique a pris du retard
+        _replica_state['checked_at'] -= 5
+        with mock.patch('salary.db_routers.replica_lag', return_value=120.0), self.assertLogs('salary.db_routers', 'WARNING'):
+            self.assertEqual(self.read(), 'default')
+
+    def test_session_reads_primary_after_write(self):
+        middleware = PrimaryAfterWriteMiddleware(write_view(Employee))
+        middleware(self.request)
+        self.assertIn(LAST_WRITE_SESSION_KEY, self.request.session)
+        with mock.patch('salary.db_routers.replica_lag', return_value=0.0):
+            self.assertEqual(self.read(), 'default')
+            # Au-delà du retard toléré, la réplique a rejoué l'écriture
+            self.request.session[LAST_WRITE_SESSION_KEY] -= 31
+            self.assertEqual(self.read(), REPLICA_ALIAS)
+
+    def test_audit_writes_do_not_pin_session(self):
+        PrimaryAfterWriteMiddleware(write_view(AuditEvent))(self.request)
+        self.assertNotIn(LAST_WRITE_SESSION_KEY, self.request.session)
+
+    async def test_async_middleware_pins_session(self):
+        async def view(request):
+            await sync_to_async(ReplicaRouter().db_for_write)(Employee)
+            return HttpResponse()
+
+        middleware = PrimaryAfterWriteMiddleware(view)
+        self.assertTrue(middleware.is_async)
+        await middleware(self.request)
+        self.assertIn(LAST_WRITE_SESSION_KEY, self.request.session)
+
+
+# =============================
+# JOURNAL D'AUDIT
+# =============================
+
+@override_settings(PAYROLL_AUDIT_BATCH_SIZE=3, PAYROLL_AUDIT_FLUSH_INTERVAL=10)
+class AuditLogTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('audit@test.gn', 'motdepasse')
+        self.employee = create_employee(self.user)
+        audit._buffer.clear()
+        audit._state['flushed_at'] = time.monotonic()
+
+    def tearDown(self):
+        # Rien ne doit rester en file pour l'envoi à l'arrêt du processus
+        audit._buffer.clear()
+
+    def test_events_wait_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            audit.record(audit.CALCUL, self.user, self.employee)
+            self.assertEqual(audit.pending(), 0)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_flush_on_batch_size(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record_many(audit.EXPORT, self.user, [self.employee, self.employee])
+        self.assertEqual(audit.pending(), 2)
+        self.assertFalse(AuditEvent.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record(audit.CALCUL, self.user, self.employee, {'salaire_net': Decimal('3000000')})
+        self.assertEqual(audit.pending(), 0)
+        self.assertEqual(AuditEvent.objects.filter(user=self.user, employee=self.employee).count(), 3)
+        self.assertEqual(audit.events(action=audit.CALCUL).get().details, {'salaire_net': '3000000'})
+
+    def test_flush_on_interval(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record(audit.CALCUL, self.user, self.employee)
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(audit.pending(), 1)
+
+        audit._state['flushed_at'] -= 10
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(audit.pending(), 0)
+        self.assertEqual(AuditEvent.objects.count(), 1)
+
+    def test_rolled_back_events_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    update_employee(self.user, self.employee.pk, {'avance_salaire': '100000'})
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            audit.record(audit.EXPORT, self.user, self.employee)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(audit.pending(), 1)
+        self.assertEqual(audit.flush(), 1)
+        self.assertEqual(list(AuditEvent.objects.values_list('action', flat=True)), [audit.EXPORT])
+
+    def test_events_are_append_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record(audit.CALCUL, self.user, self.employee)
+        audit.flush()
+        event = AuditEvent.objects.get()
+        with self.assertRaises(ValueError):
+            AuditEvent.objects.update(action=audit.EXPORT)
+        with self.assertRaises(ValueError):
+            AuditEvent.objects.all().delete()
+        with self.assertRaises(ValueError):
+            event.save()
@@ -1,9 +1,42 @@
 from django.urls import path
-from .views import net_to_gross_view, export_excel_view, delete_all_employees_view, delete_selected_employees_view
+from .views import (
+    net_to_gross_view, export_excel_view, delete_all_employees_view, delete_selected_employees_view,
+    result_fragment_view, employee_rows_fragment_view, export_stream_view, what_if_view, employee_edit_view,
+    payroll_periods_view, close_payroll_period_view, reconciliation_view, annual_report_view, annual_export_view,
+    bank_transfer_view, cnss_declaration_view, journal_export_view,
+)
+from .async_views import (
+    calculate_api_view, employee_list_api_view, employee_update_api_view, export_status_api_view, simulation_api_view,
+    allocation_api_view, salary_history_api_view, snapshot_stats_api_view,
+)
 
 urlpatterns = [
     path('', net_to_gross_view, name='index'),
     path('export-excel/', export_excel_view, name='export_excel'),
+    path('export-csv/', export_stream_view, {'export_format': 'csv'}, name='export_csv'),
+    path('export-jsonl/', export_stream_view, {'export_format': 'jsonl'}, name='export_jsonl'),
+    path('what-if/', what_if_view, name='what_if'),
+    path('employees/<int:employee_id>/edit/', employee_edit_view, name='employee_edit'),
+    path('periods/', payroll_periods_view, name='payroll_periods'),
+    path('periods/<int:period_id>/close/', close_payroll_period_view, name='close_payroll_period'),
+    path('reconciliation/', reconciliation_view, name='reconciliation'),
+    path('annual-report/', annual_report_view, name='annual_report'),
+    path('annual-report/export/', annual_export_view, name='annual_export'),
+    path('bank-transfer/', bank_transfer_view, name='bank_transfer'),
+    path('cnss-declaration/', cnss_declaration_view, name='cnss_declaration'),
+    path('journal/', journal_export_view, name='journal_export'),
     path('delete-all/', delete_all_employees_view, name='delete_all'),
     path('delete-selected/', delete_selected_employees_view, name='delete_selected'),
+    # Fragments HTML (recalcul sans rendu de la page complète)
+    path('fragments/result/', result_fragment_view, name='fragment_result'),
+    path('fragments/employees/', employee_rows_fragment_view, name='fragment_employees'),
+    # API asynchrone (ASGI)
+    path('api/calculate/', calculate_api_view, name='api_calculate'),
+    path('api/employees/', employee_list_api_view, name='api_employees'),
+    path('api/employees/<int:employee_id>/', employee_update_api_view, name='api_employee_update'),
+    path('api/salary-history/', salary_history_api_view, name='api_salary_history'),
+    path('api/snapshots/<int:period_id>/', snapshot_stats_api_view, name='api_snapshot_stats'),
+    path('api/export-status/', export_status_api_view, name='api_export_status'),
+    path('api/simulation/', simulation_api_view, name='api_simulation'),
+    path('api/allocation/', allocation_api_view, name='api_allocation'),
 ]
@@ -1,14 +1,34 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.utils.cache import patch_cache_control
+from django.core.cache import caches
+from django.conf import settings
+from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.db import transaction
-from .forms import NetToGrossForm
-from .utils import calculate_basic_from_net, calculate_primes_automatiques, calculate_exempt_primes_amounts
-from .models import Employee
+from django.db.models import Count
+from .forms import BankTransferForm, CnssDeclarationForm, EmployeeEditForm, JournalExportForm, NetToGrossForm, PayrollPeriodForm, ReconciliationForm, WhatIfForm
+from .services import (
+    calculate_payroll, get_selected_exempt_primes, create_employee_from_form, get_result_context, update_employee,
+)
+from .models import AnnualSummary, Employee, PayrollPeriod
+from .exports import EXPORT_COLUMNS, EXPORT_FORMATS, iter_export_rows
+from .engine.pipeline import READERS
+from .engine.rates import rules_version
+from .payroll_periods import close_period, prepare_period, previous_period
+from .db_routers import use_replica
+from .search import search_employees
+from . import annual, audit, bank_transfer, cnss_declaration, journal, reconciliation, what_if
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
+import calendar
+import datetime
 import io
 
 @login_required
@@ -22,89 +42,22 @@ def net_to_gross_view(request):
         if form.is_valid():
             nom_complet = form.cleaned_data['nom_complet']
             net_salary = form.cleaned_data['net_salary']
-            has_exempt_primes = form.cleaned_data.get('has_exempt_primes', False)
-            prime_retraite = form.cleaned_data.get('prime_retraite', False)
-            prime_interim = form.cleaned_data.get('prime_interim', False)
-            prime_anciennete = form.cleaned_data.get('prime_anciennete', False)
-            prime_responsabilite_exoneree = form.cleaned_data.get('prime_responsabilite_exoneree', False)
             avantage_nature = form.cleaned_data.get('avantage_nature', 0) or 0
             
-            # Calculer automatiquement les primes taxables
-            primes_auto = calculate_primes_automatiques(net_salary)
-            
-            # Calculer le total des primes taxables (sans prime de responsabilité qui est traitée comme exonérée)
-            primes_taxables_base = (
-                primes_auto['prime_cherte_vie'] +
-                primes_auto['indemnite_logement'] +
-                primes_auto['indemnite_transport'] +
-                primes_auto['indemnite_repas']
-            )
-            primes_taxables = float(primes_taxables_base)
-            
-            # Calculer les primes exonérées si sélectionnées
-            primes_exonerees = 0
-            exempt_primes_amounts = {}
-            if has_exempt_primes:
-                selected_primes = []
-                if prime_retraite:
-                    selected_primes.append('retraite')
-                if prime_interim:
-                    selected_primes.append('interim')
-                if prime_anciennete:
-                    selected_primes.append('anciennete')
-                if prime_responsabilite_exoneree:
-                    selected_primes.append('responsabilite')
-                
-                exempt_primes_amounts = calculate_exempt_primes_amounts(net_salary, selected_primes)
-                primes_exonerees = sum(exempt_primes_amounts.values())
-            
             # Calculer avec la nouvelle formule (incluant avantage en nature et primes sélectionnées)
-            result = calculate_basic_from_net(
+            payroll = calculate_payroll(
                 net_salary,
-                0,  # Pas d'avantages généraux
-                0,  # Pas de déductions générales
-                primes_taxables,
-                primes_exonerees,
+                get_selected_exempt_primes(form.cleaned_data),
                 avantage_nature,
-                0  # Prime de responsabilité traitée comme exonérée (pas dans primes taxables)
             )
+            result = payroll['result']
+            primes_auto = payroll['primes_auto']
+            exempt_primes_amounts = payroll['exempt_primes_amounts']
             
             # Sauvegarder automatiquement l'employé
             try:
                 with transaction.atomic():
-                    employee = Employee.objects.create(
-                        user=request.user,
-                        nom_complet=nom_complet,
-                        salaire_net=net_salary,
-                        salaire_base=result['basic'],
-                        salaire_brut=result['gross'],
-                        salaire_imposable=result['imposable'],
-                        cnss_employe=result['cnss'],
-                        rts=result['rts'],
-                        total_charges_employee=result['total_charges_employee'],
-                        cnss_employeur=result['cnss_employer'],
-                        versement_forfaitaire=result['versement_forfaitaire'],
-                        taxe_apprentissage=result['taxe_apprentissage'],
-                        total_cnss_patronal=result['total_cnss_patronal'],
-                        # Primes taxables détaillées
-                        prime_cherte_vie=primes_auto['prime_cherte_vie'],
-                        indemnite_logement=primes_auto['indemnite_logement'],
-                        indemnite_transport=primes_auto['indemnite_transport'],
-                        indemnite_repas=primes_auto['indemnite_repas'],
-                        primes_taxables=primes_taxables,
-                        # Primes exonérées
-                        prime_retraite=exempt_primes_amounts.get('prime_retraite', 0),
-                        prime_interim=exempt_primes_amounts.get('prime_interim', 0),
-                        prime_anciennete=exempt_primes_amounts.get('prime_anciennete', 0),
-                        prime_responsabilite=exempt_primes_amounts.get('prime_responsabilite', 0),
-                        primes_exonerees=primes_exonerees,
-                        avantage_nature=avantage_nature,
-                        ecart_imposable=result['ecart_imposable'],
-                        # Déductions pour le salaire net à payer
-                        avance_salaire=form.cleaned_data.get('avance_salaire', 0),
-                        saisie_opposition=form.cleaned_data.get('saisie_opposition', 0),
-                        salaire_net_a_payer=form.cleaned_data.get('salaire_net_a_payer', 0)
-                    )
+                    create_employee_from_form(request.user, form.cleaned_data, payroll)
                     
                     messages.success(request, f"✅ Employé '{nom_complet}' ajouté avec succès !")
                     # Recharger la liste des employés
@@ -144,212 +97,511 @@ def net_to_gross_view(request):
     
     return render(request, "salary/index.html", context)
 
+@require_POST
 @login_required
-def export_excel_view(request):
-    """Exporter la liste des employés en Excel"""
-    employees = Employee.objects.filter(user=request.user)
-    
-    # Créer un nouveau classeur Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Liste des Employés"
+def result_fragment_view(request):
+    """
+    Calcule et enregistre un employé puis renvoie uniquement le panneau de résultat.
+    Rendu sans RequestContext : ni la page complète ni les context processors ne sont évalués.
+    """
+    form = NetToGrossForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+    payroll = calculate_payroll(
+        form.cleaned_data['net_salary'],
+        get_selected_exempt_primes(form.cleaned_data),
+        form.cleaned_data.get('avantage_nature', 0) or 0,
+    )
+    try:
+        with transaction.atomic():
+            create_employee_from_form(request.user, form.cleaned_data, payroll)
+    except Exception as e:
+        return JsonResponse({'errors': {'__all__': [{'message': str(e)}]}}, status=500)
+
+    html = render_to_string("salary/partials/result_panel.html", get_result_context(form.cleaned_data, payroll))
+    return HttpResponse(html)
+
+@require_GET
+@login_required
+def employee_rows_fragment_view(request):
+    """Renvoie uniquement les lignes du tableau des derniers employés (?q= : recherche sur le nom)"""
+    employees = search_employees(Employee.objects.filter(user=request.user), request.GET.get('q'))[:10]
+    html = render_to_string("salary/partials/employee_rows.html", {"employees": employees})
+    return HttpResponse(html)
+
+def build_excel_export(employees):
+    """Construit le classeur Excel de la liste des employés et retourne son contenu binaire"""
+    # Créer un nouveau classeur Excel (mode write-only : les lignes sont écrites au fil de l'eau)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Liste des Employés")
     
     # Styles
     header_font = Font(bold=True, color="FFFFFF")
     header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
     center_alignment = Alignment(horizontal="center", vertical="center")
     
-    # En-têtes selon l'ordre demandé
-    headers = [
-        # 1. Nom
-        "Nom Complet",
-        # 2. Salaire de base
-        "Salaire Base",
-        # 3. Toutes les primes (exonérées et non exonérées)
-        "Prime Cherté de Vie", "Indemnité Logement", 
-        "Indemnité Transport", "Indemnité Repas",
-        "Prime Retraite", "Prime Intérim", "Prime Ancienneté", "Prime de responsabilité",
-        "Avantage en nature",
-        # 4. Salaire brut
-        "Salaire Brut",
-        # 5. CNSS employé et employeur
-        "CNSS Employé", "CNSS Employeur",
-        # 6. Écart imposable
-        "Écart Imposable",
-        # 7. Salaire imposable
-        "Salaire Imposable",
-        # 8. Détails RTS
-        "RTS Tranche 1 (0%)", "RTS Tranche 2 (5%)", "RTS Tranche 3 (8%)", 
-        "RTS Tranche 4 (10%)", "RTS Tranche 5 (15%)", "RTS Tranche 6 (20%)",
-        # 9. RTS total
-        "RTS Total",
-        # 10. Total cotisations employé et employeur
-        "Total Charges Employé", "Total CNSS Patronal",
-        # 11. Versement forfaitaire et taxe d'apprentissage
-        "Versement Forfaitaire", "Taxe Apprentissage",
-        # 12. Salaire net
-        "Salaire Net",
-        # 13. Déductions
-        "Avance sur Salaire", "Saisie et Opposition",
-        # 14. Salaire net à payer (dernière colonne)
-        "Salaire Net à Payer"
-    ]
+    # Ajuster la largeur des colonnes
+    headers = [header for _, header in EXPORT_COLUMNS]
+    for col in range(1, len(headers) + 1):
+        column_letter = get_column_letter(col)
+        ws.column_dimensions[column_letter].width = 20
     
     # Écrire les en-têtes
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
         cell.font = header_font
         cell.fill = header_fill
         cell.alignment = center_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
     
-    # Écrire les données selon le nouvel ordre
-    for row, employee in enumerate(employees, 2):
-        col = 1
-        
-        # 1. Nom Complet
-        ws.cell(row=row, column=col, value=employee.nom_complet)
-        col += 1
-        
-        # 2. Salaire Base
-        ws.cell(row=row, column=col, value=float(employee.salaire_base))
-        col += 1
-        
-        # 3. Toutes les primes (non exonérées d'abord)
-        ws.cell(row=row, column=col, value=float(employee.prime_cherte_vie))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.indemnite_logement))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.indemnite_transport))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.indemnite_repas))
-        col += 1
-        
-        # Primes exonérées
-        ws.cell(row=row, column=col, value=float(employee.prime_retraite))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.prime_interim))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.prime_anciennete))
-        col += 1
-        # Prime de responsabilité (exonérée)
-        ws.cell(row=row, column=col, value=float(getattr(employee, 'prime_responsabilite', 0)))
-        col += 1
-        # Avantage en nature
-        ws.cell(row=row, column=col, value=float(getattr(employee, 'avantage_nature', 0)))
-        col += 1
-        
-        # 4. Salaire Brut
-        ws.cell(row=row, column=col, value=float(employee.salaire_brut))
-        col += 1
-        
-        # 5. CNSS Employé et Employeur
-        ws.cell(row=row, column=col, value=float(employee.cnss_employe))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.cnss_employeur))
-        col += 1
-        
-        # 6. Écart Imposable
-        ws.cell(row=row, column=col, value=float(employee.ecart_imposable))
-        col += 1
-        
-        # 7. Salaire Imposable
-        ws.cell(row=row, column=col, value=float(employee.salaire_imposable))
-        col += 1
-        
-        # 8. Détails RTS par tranche
-        from .utils import calculate_rts_detailed
-        _, rts_details = calculate_rts_detailed(employee.salaire_imposable)
-        
-        # Initialiser toutes les tranches à 0
-        tranche_amounts = [0, 0, 0, 0, 0, 0]  # 6 tranches
-        
-        # Extraire les montants des détails
-        import re
-        for detail in rts_details:
-            if "=" in detail and "TOTAL" not in detail:
-                try:
-                    # Extraire le montant de la chaîne
-                    amount_str = detail.split("=")[-1].strip().replace(" GNF", "").replace(" ", "").replace(",", "")
-                    amount = float(amount_str) if amount_str else 0
-                    
-                    # Déterminer quelle tranche basée sur le pourcentage avec regex
-                    if re.search(r'^0%', detail):
-                        tranche_amounts[0] = amount
-                    elif re.search(r'^5%', detail):
-                        tranche_amounts[1] = amount
-                    elif re.search(r'^8%', detail):
-                        tranche_amounts[2] = amount
-                    elif re.search(r'^10%', detail):
-                        tranche_amounts[3] = amount
-                    elif re.search(r'^15%', detail):
-                        tranche_amounts[4] = amount
-                    elif re.search(r'^20%', detail):
-                        tranche_amounts[5] = amount
-                except (ValueError, IndexError):
-                    continue
-        
-        # Écrire les 6 tranches RTS
-        for i, amount in enumerate(tranche_amounts):
-            ws.cell(row=row, column=col, value=amount)
-            col += 1
-        
-        # 9. RTS Total
-        ws.cell(row=row, column=col, value=float(employee.rts))
-        col += 1
-        
-        # 10. Total cotisations employé et employeur
-        ws.cell(row=row, column=col, value=float(employee.total_charges_employee))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.total_cnss_patronal))
-        col += 1
-        
-        # 11. Versement forfaitaire et taxe d'apprentissage
-        ws.cell(row=row, column=col, value=float(employee.versement_forfaitaire))
-        col += 1
-        ws.cell(row=row, column=col, value=float(employee.taxe_apprentissage))
-        col += 1
-        
-        # 12. Salaire Net
-        ws.cell(row=row, column=col, value=float(employee.salaire_net))
-        col += 1
-        
-        # 13. Avance sur salaire
-        ws.cell(row=row, column=col, value=float(employee.avance_salaire))
-        col += 1
-        
-        # 14. Saisie et opposition
-        ws.cell(row=row, column=col, value=float(employee.saisie_opposition))
-        col += 1
-        
-        # 15. Salaire Net à Payer (dernière colonne)
-        ws.cell(row=row, column=col, value=float(employee.salaire_net_a_payer))
-    
-    # Ajuster la largeur des colonnes
-    for col in range(1, len(headers) + 1):
-        column_letter = get_column_letter(col)
-        ws.column_dimensions[column_letter].width = 20
+    # Écrire les données dans l'ordre des colonnes de l'export
+    for row in iter_export_rows(employees):
+        ws.append(row)
     
     # Sauvegarder dans un buffer
     buffer = io.BytesIO()
     wb.save(buffer)
-    buffer.seek(0)
+    return buffer.getvalue()
+
+def _export_etag(request):
+    """ETag de l'export : identifiant de l'utilisateur et version de ses employés"""
+    return f"employees-{request.user.pk}-{request.user.employees_version}"
+
+def _export_last_modified(request):
+    return request.user.employees_modified_at or request.user.date_joined
+
+@login_required
+@condition(etag_func=_export_etag, last_modified_func=_export_last_modified)
+def export_excel_view(request):
+    """
+    Exporter la liste des employés en Excel.
+    Le fichier généré est conservé en cache pour la version courante des employés :
+    il n'est reconstruit qu'après une création, une modification ou une suppression.
+    """
+    cache_key = f"export_excel:{request.user.pk}:{request.user.employees_version}"
+    export_cache = caches[settings.PAYROLL_EXPORT_CACHE]
+    content = export_cache.get(cache_key)
+    if content is None:
+        content = build_excel_export(Employee.objects.filter(user=request.user))
+        export_cache.set(cache_key, content, settings.PAYROLL_EXPORT_CACHE_TIMEOUT)
     
     # Créer la réponse HTTP
     response = HttpResponse(
-        buffer.getvalue(),
+        content,
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
     response['Content-Disposition'] = 'attachment; filename="liste_employes.xlsx"'
+    audit.record(audit.EXPORT, request.user, details={'fichier': "liste_employes.xlsx"})
+    # Toujours revalider auprès du serveur (réponse 304 si rien n'a changé)
+    patch_cache_control(response, private=True, no_cache=True)
     
     return response
 
+@login_required
+@use_replica
+def export_stream_view(request, export_format):
+    """Export CSV ou JSON Lines diffusé en continu (mêmes colonnes que l'export Excel)"""
+    stream, content_type, extension = EXPORT_FORMATS[export_format]
+    employees = Employee.objects.filter(user=request.user).order_by('id')
+    response = StreamingHttpResponse(stream(employees), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="liste_employes.{extension}"'
+    audit.record(audit.EXPORT, request.user, details={'fichier': f"liste_employes.{extension}"})
+    return response
+
+# Lignes du tableau récapitulatif de l'analyse d'impact : (libellé, clé de what_if.summarize)
+WHAT_IF_SUMMARY_ROWS = (
+    ("Salaire de base", 'salaire_base'),
+    ("Salaire net", 'salaire_net'),
+    ("Salaire net à payer", 'salaire_net_a_payer'),
+    ("RTS", 'rts'),
+    ("CNSS employé", 'cnss_employe'),
+    ("Charges patronales", 'charges_patronales'),
+    ("Coût employeur", 'cout_employeur'),
+)
+WHAT_IF_TOP_ROWS = 50
+
+# Totaux affichés par le rapprochement : (libellé, colonne de reconciliation.RECONCILIATION_FIELDS)
+RECONCILIATION_TOTAL_ROWS = (
+    ("Salaire net", 'salaire_net'),
+    ("Salaire brut", 'salaire_brut'),
+    ("RTS", 'rts'),
+    ("CNSS employé", 'cnss_employe'),
+    ("CNSS employeur", 'cnss_employeur'),
+    ("Charges patronales", 'total_cnss_patronal'),
+    ("Salaire net à payer", 'salaire_net_a_payer'),
+)
+RECONCILIATION_TOP_ROWS = 50
+
+@login_required
+@use_replica
+def what_if_view(request):
+    """Compare la paie de tous les employés de l'utilisateur avec un barème candidat (aucune écriture)"""
+    context = {}
+    if request.method == "POST":
+        form = WhatIfForm(request.POST)
+        if form.is_valid():
+            workforce = what_if.load_workforce(Employee.objects.filter(user=request.user))
+            impact = what_if.compare_rates(workforce, form.cleaned_data['rates'], form.cleaned_data['keep'])
+            audit.record(
+                audit.CALCUL, request.user, details={'simulation': "impact_bareme", 'employes': len(workforce)},
+                rules_version=rules_version(form.cleaned_data['rates']),
+            )
+
+            if request.POST.get('download') == 'csv':
+                response = StreamingHttpResponse(
+                    what_if.stream_impact_csv(workforce, impact), content_type='text/csv; charset=utf-8'
+                )
+                response['Content-Disposition'] = 'attachment; filename="impact_bareme.csv"'
+                return response
+
+            summary = what_if.summarize(impact)
+            context.update({
+                "summary": summary,
+                "summary_rows": [(label, summary[key]) for label, key in WHAT_IF_SUMMARY_ROWS],
+                "rows": list(what_if.iter_impact_rows(workforce, impact, limit=WHAT_IF_TOP_ROWS)),
+                "candidate_version": form.cleaned_data['rates'].version,
+            })
+    else:
+        form = WhatIfForm()
+
+    context["form"] = form
+    return render(request, "salary/what_if.html", context)
+
+@login_required
+def payroll_periods_view(request):
+    """Périodes de paie de l'utilisateur : préparation (copie des montants actuels) et liste"""
+    if request.method == "POST":
+        form = PayrollPeriodForm(request.POST)
+        if form.is_valid():
+            annee, mois = form.cleaned_data['periode']
+            try:
+                period, count = prepare_period(request.user, annee, mois)
+                messages.success(request, f"✅ Paie {period} préparée : {count} employé(s)")
+            except ValueError as e:
+                messages.error(request, f"❌ {str(e)}")
+            return redirect('payroll_periods')
+    else:
+        form = PayrollPeriodForm()
+
+    periods = PayrollPeriod.objects.filter(user=request.user).annotate(employes=Count('lines'))
+    return render(request, "salary/payroll_periods.html", {"form": form, "periods": periods})
+
+@require_POST
+@login_required
+def close_payroll_period_view(request, period_id):
+    """Clôture une période de paie"""
+    period = get_object_or_404(PayrollPeriod, pk=period_id, user=request.user)
+    try:
+        close_period(period)
+        messages.success(request, f"✅ Paie {period} clôturée")
+    except ValueError as e:
+        messages.error(request, f"❌ {str(e)}")
+    return redirect('payroll_periods')
+
+def _uploaded_rows(uploaded_file, stream=None):
+    """Lignes d'un export téléversé (JSON Lines si l'extension est .jsonl, CSV sinon)"""
+    export_format = 'jsonl' if uploaded_file.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+    stream = stream or io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+    return reconciliation.snapshot_rows(READERS[export_format](stream))
+
+def _check_uploaded_rows(uploaded_file):
+    """
+    Lit tout l'export téléversé (ValueError à la première ligne invalide) puis le rembobine :
+    une fois la réponse en flux commencée, l'erreur ne pourrait plus être affichée.
+    """
+    stream = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+    try:
+        for _ in _uploaded_rows(uploaded_file, stream):
+            pass
+    except ValueError as e:
+        raise ValueError(f"{uploaded_file.name} : {e}")
+    finally:
+        # Sans detach(), la fermeture du TextIOWrapper fermerait le fichier téléversé
+        stream.detach()
+        uploaded_file.seek(0)
+
+@login_required
+@use_replica
+def reconciliation_view(request):
+    """Rapproche deux paies (périodes ou exports) : ajouts, départs et écarts au-delà des seuils"""
+    context = {}
+    if request.method == "POST":
+        form = ReconciliationForm(request.POST, request.FILES, user=request.user)
+        if form.is_valid():
+            data = form.cleaned_data
+            uploaded = not (data.get('avant') and data.get('apres'))
+            if uploaded:
+                before = _uploaded_rows(data['fichier_avant'])
+                after = _uploaded_rows(data['fichier_apres'])
+                label = f"{data['fichier_avant'].name} → {data['fichier_apres'].name}"
+            else:
+                before = reconciliation.period_rows(data['avant'])
+                after = reconciliation.period_rows(data['apres'])
+                label = f"{data['avant']} → {data['apres']}"
+            thresholds = dict.fromkeys(reconciliation.RECONCILIATION_FIELDS, float(data['seuil']))
+            relative = float(data['seuil_relatif']) / 100 if data.get('seuil_relatif') else None
+            rows = reconciliation.reconcile(before, after, thresholds=thresholds, relative=relative)
+
+            if request.POST.get('download') == 'csv':
+                try:
+                    if uploaded:
+                        _check_uploaded_rows(data['fichier_avant'])
+                        _check_uploaded_rows(data['fichier_apres'])
+                except ValueError as e:
+                    form.add_error(None, str(e))
+                else:
+                    response = StreamingHttpResponse(
+                        reconciliation.stream_reconciliation_csv(rows), content_type='text/csv; charset=utf-8'
+                    )
+                    response['Content-Disposition'] = 'attachment; filename="rapprochement_paie.csv"'
+                    return response
+            else:
+                try:
+                    summary = reconciliation.summarize(rows, top=RECONCILIATION_TOP_ROWS)
+                except ValueError as e:
+                    form.add_error(None, str(e))
+                else:
+                    context.update({
+                        "summary": summary,
+                        "totals_rows": [(name, summary['totaux'][key]) for name, key in RECONCILIATION_TOTAL_ROWS],
+                        "label": label,
+                    })
+    else:
+        initial = {}
+        latest = PayrollPeriod.objects.filter(user=request.user).first()
+        if latest is not None:
+            initial = {'apres': latest, 'avant': previous_period(latest)}
+        form = ReconciliationForm(initial=initial, user=request.user)
+
+    context["form"] = form
+    return render(request, "salary/reconciliation.html", context)
+
+# Totaux affichés par le rapport annuel : (libellé, colonne de annual.ANNUAL_FIELDS)
+ANNUAL_TOTAL_ROWS = (
+    ("Salaire brut", 'salaire_brut'),
+    ("Salaire imposable", 'salaire_imposable'),
+    ("CNSS employé", 'cnss_employe'),
+    ("CNSS employeur", 'cnss_employeur'),
+    ("RTS", 'rts'),
+    ("Versement forfaitaire", 'versement_forfaitaire'),
+    ("Taxe d'apprentissage", 'taxe_apprentissage'),
+    ("Salaire net", 'salaire_net'),
+    ("Salaire net à payer", 'salaire_net_a_payer'),
+)
+ANNUAL_PAGE_SIZE = 50
+
+def _annual_year(request):
+    years = list(
+        AnnualSummary.objects.filter(user=request.user).order_by('-annee').values_list('annee', flat=True).distinct()
+    )
+    try:
+        annee = int(request.GET.get('annee'))
+    except (TypeError, ValueError):
+        annee = years[0] if years else None
+    return annee, years
+
+@login_required
+@use_replica
+def annual_report_view(request):
+    """Cumuls annuels par employé et totaux de l'entreprise (lus dans les cumuls précalculés)"""
+    annee, years = _annual_year(request)
+    summaries = AnnualSummary.objects.filter(user=request.user, annee=annee).order_by('nom_complet', 'employee_id')
+    totals = annual.annual_totals(request.user, annee)
+    page = Paginator(summaries, ANNUAL_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, "salary/annual_report.html", {
+        "annee": annee,
+        "years": years,
+        "totals": totals,
+        "totals_rows": [(name, totals[key]) for name, key in ANNUAL_TOTAL_ROWS],
+        "page": page,
+    })
+
+@login_required
+@use_replica
+def annual_export_view(request):
+    """Export CSV des cumuls annuels par employé (certificats de salaire, déclaration annuelle)"""
+    annee, _ = _annual_year(request)
+    summaries = AnnualSummary.objects.filter(user=request.user, annee=annee)
+    response = StreamingHttpResponse(annual.stream_annual_csv(summaries), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="cumuls_annuels_{annee}.csv"'
+    audit.record(audit.EXPORT, request.user, details={'fichier': f"cumuls_annuels_{annee}.csv"})
+    return response
+
+@login_required
+@use_replica
+def bank_transfer_view(request):
+    """Fichier de virements du salaire net à payer (montants actuels ou paie d'une période)"""
+    employees = Employee.objects.filter(user=request.user)
+    if request.method == "POST":
+        form = BankTransferForm(request.POST, user=request.user)
+        if form.is_valid():
+            data = form.cleaned_data
+            period = data.get('period')
+            details = {'reference': data['reference']}
+            if period is not None:
+                payments = bank_transfer.period_payments_queryset(period)
+                name = f"virements_{period.annee}_{period.mois:02d}"
+                # Génération confirmée malgré des lignes sans compte (voir BankTransferForm.clean)
+                details['lignes_sans_compte'] = bank_transfer.period_missing_accounts(period).count()
+            else:
+                payments = bank_transfer.payments_queryset(employees)
+                name = f"virements_{data['date_execution']:%Y%m%d}"
+            content_type, extension = bank_transfer.TRANSFER_FORMATS[data['transfer_format']]
+            response = StreamingHttpResponse(
+                bank_transfer.stream_transfer_file(
+                    payments,
+                    transfer_format=data['transfer_format'],
+                    date_execution=data['date_execution'],
+                    reference=data['reference'],
+                    libelle=data['libelle'],
+                ),
+                content_type=content_type,
+            )
+            response['Content-Disposition'] = f'attachment; filename="{name}.{extension}"'
+            audit.record(audit.EXPORT, request.user, details=dict(details, fichier=f"{name}.{extension}"))
+            return response
+    else:
+        form = BankTransferForm(user=request.user)
+
+    # Aperçu de la paie choisie (formulaire refusé) en plus des montants actuels
+    period = getattr(form, 'cleaned_data', {}).get('period')
+    return render(request, "salary/bank_transfer.html", {
+        "form": form,
+        "totals": bank_transfer.transfer_totals(bank_transfer.payments_queryset(employees)),
+        "missing": bank_transfer.missing_accounts(employees).count(),
+        "period": period,
+        "period_totals": bank_transfer.transfer_totals(bank_transfer.period_payments_queryset(period)) if period else None,
+        "period_missing": bank_transfer.period_missing_accounts(period).count() if period else 0,
+    })
+
+# Totaux affichés par la déclaration CNSS : (libellé, colonne de cnss_declaration.DECLARATION_TOTAL_FIELDS)
+CNSS_TOTAL_ROWS = (
+    ("Salaire brut", 'salaire_brut'),
+    ("CNSS employé", 'cnss_employe'),
+    ("CNSS employeur", 'cnss_employeur'),
+    ("Total des cotisations", 'total_cnss'),
+)
+
+@login_required
+@use_replica
+def cnss_declaration_view(request):
+    """Déclaration CNSS du mois : totaux calculés en base et fichier par employé"""
+    period_id = request.GET.get('period')
+    if period_id is None:
+        # Première visite : dernière paie préparée
+        latest = PayrollPeriod.objects.filter(user=request.user).first()
+        period_id = latest.pk if latest is not None else ''
+    form = CnssDeclarationForm({'period': period_id}, user=request.user)
+    period = form.cleaned_data['period'] if form.is_valid() else None
+    if period is not None:
+        lines = period.lines.all()
+        name = f"declaration_cnss_{period.annee}_{period.mois:02d}"
+    else:
+        lines = Employee.objects.filter(user=request.user)
+        name = "declaration_cnss"
+
+    if request.GET.get('download') == 'csv':
+        response = StreamingHttpResponse(
+            cnss_declaration.stream_declaration_csv(lines), content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{name}.csv"'
+        audit.record(audit.EXPORT, request.user, details={'fichier': f"{name}.csv"})
+        return response
+
+    totals = cnss_declaration.declaration_totals(lines)
+    return render(request, "salary/cnss_declaration.html", {
+        "form": form,
+        "period": period,
+        "totals": totals,
+        "totals_rows": [(label, totals[key]) for label, key in CNSS_TOTAL_ROWS],
+        "employee_limits": cnss_declaration.CNSS_EMPLOYEE_LIMITS,
+        "employer_limits": cnss_declaration.CNSS_EMPLOYER_LIMITS,
+    })
+
+@login_required
+@use_replica
+def journal_export_view(request):
+    """Écritures comptables de la paie : aperçu des écritures par compte et export CSV"""
+    if request.GET:
+        form = JournalExportForm(request.GET, user=request.user)
+    else:
+        latest = PayrollPeriod.objects.filter(user=request.user).first()
+        form = JournalExportForm({'period': latest.pk if latest else '', 'detail': 'comptes'}, user=request.user)
+    period = form.cleaned_data['period'] if form.is_valid() else None
+    if period is not None:
+        lines = period.lines.all()
+        date = datetime.date(period.annee, period.mois, calendar.monthrange(period.annee, period.mois)[1])
+        name = f"journal_paie_{period.annee}_{period.mois:02d}"
+    else:
+        lines = Employee.objects.filter(user=request.user)
+        date = timezone.localdate()
+        name = "journal_paie"
+    piece = (form.cleaned_data.get('piece') if form.is_valid() else '') or name.upper().replace('_', '-')
+
+    if form.is_valid() and request.GET.get('download') == 'csv':
+        response = StreamingHttpResponse(
+            journal.stream_journal_csv(
+                lines, per_employee=form.cleaned_data['detail'] == 'employes', date=date, piece=piece,
+            ),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{name}.csv"'
+        audit.record(audit.EXPORT, request.user, details={'fichier': f"{name}.csv"})
+        return response
+
+    entries = journal.journal_entries(journal.journal_totals(lines))
+    return render(request, "salary/journal_export.html", {
+        "form": form,
+        "period": period,
+        "date": date,
+        "piece": piece,
+        "entries": entries,
+        "total_debit": sum(debit for _, _, debit, _ in entries),
+        "total_credit": sum(credit for _, _, _, credit in entries),
+    })
+
+@login_required
+def employee_edit_view(request, employee_id):
+    """Modifie un employé : seules les colonnes qui dépendent des champs modifiés sont recalculées"""
+    employee = get_object_or_404(Employee, pk=employee_id, user=request.user)
+    if request.method == "POST":
+        form = EmployeeEditForm(request.POST)
+        if form.is_valid():
+            try:
+                employee, changed = update_employee(
+                    request.user, employee_id, form.get_changes(), form.cleaned_data.get('effective_from'),
+                )
+            except (Employee.DoesNotExist, ValueError) as e:
+                messages.error(request, f"❌ Erreur lors de la modification : {str(e)}")
+            else:
+                if changed:
+                    messages.success(request, f"✅ Employé '{employee.nom_complet}' modifié avec succès !")
+                else:
+                    messages.info(request, "ℹ️ Aucune modification à enregistrer.")
+                return redirect('index')
+    else:
+        form = EmployeeEditForm(initial=EmployeeEditForm.initial_from(employee))
+
+    return render(request, "salary/employee_edit.html", {"form": form, "employee": employee})
+
+def _record_deletions(user, deleted):
+    """Journal d'audit : un événement par employé supprimé ((id, nom) lus avant la suppression)"""
+    names = dict(deleted)
+    audit.record_many(audit.SUPPRESSION, user, list(names), lambda employee_id: {'nom_complet': names[employee_id]})
+
 @login_required
 def delete_all_employees_view(request):
     """Supprimer tous les employés de l'utilisateur connecté"""
     if request.method == "POST":
         try:
-            count = Employee.objects.filter(user=request.user).count()
-            Employee.objects.filter(user=request.user).delete()
+            deleted = list(Employee.objects.filter(user=request.user).values_list('id', 'nom_complet'))
+            count = len(deleted)
+            with transaction.atomic():
+                Employee.objects.filter(user=request.user).delete()
+                _record_deletions(request.user, deleted)
             messages.success(request, f"✅ {count} employé(s) supprimé(s) avec succès !")
         except Exception as e:
             messages.error(request, f"❌ Erreur lors de la suppression : {str(e)}")
@@ -368,8 +620,11 @@ def delete_selected_employees_view(request):
             
             # Convertir les IDs en entiers et supprimer seulement les employés de l'utilisateur connecté
             employee_ids = [int(id) for id in employee_ids if id.isdigit()]
-            count = Employee.objects.filter(id__in=employee_ids, user=request.user).count()
-            Employee.objects.filter(id__in=employee_ids, user=request.user).delete()
+            deleted = list(Employee.objects.filter(id__in=employee_ids, user=request.user).values_list('id', 'nom_complet'))
+            count = len(deleted)
+            with transaction.atomic():
+                Employee.objects.filter(id__in=employee_ids, user=request.user).delete()
+                _record_deletions(request.user, deleted)
             
             messages.success(request, f"✅ {count} employé(s) sélectionné(s) supprimé(s) avec succès !")
         except Exception as e:
@@ -0,0 +1,132 @@
+"""
+Analyse d'impact d'un barème candidat (plafonds CNSS, tranches RTS...) sur
+l'ensemble des employés enregistrés.
+
+Les employés sont chargés en colonnes (values_list) puis recalculés en mémoire
+avec le moteur vectorisé, avec le barème actuel et le barème candidat.
+Rien n'est écrit en base.
+"""
+import csv
+import io
+
+import numpy as np
+
+from .engine import vectorized
+from .engine.rates import DEFAULT_RATES
+
+WHAT_IF_CHUNK_SIZE = 5000
+WHAT_IF_STREAM_BATCH_SIZE = 500
+
+# Colonnes lues en base, converties en tableaux de float (sauf id et nom)
+WORKFORCE_FIELDS = (
+    'salaire_net', 'salaire_base', 'primes_taxables', 'primes_exonerees',
+    'avantage_nature', 'avance_salaire', 'saisie_opposition',
+)
+
+# Montants comparés entre les deux barèmes : (clé du résultat, colonne du moteur)
+IMPACT_METRICS = (
+    ('salaire_base', 'basic'),
+    ('salaire_net', 'net'),
+    ('rts', 'rts'),
+    ('cnss_employe', 'cnss_employee'),
+    ('charges_patronales', 'total_cnss_patronal'),
+    ('cout_employeur', 'total_cout_employeur'),
+)
+
+# Ce qui reste fixe quand le barème change
+KEEP_GROSS = 'gross'  # Le salaire de base est maintenu : le net varie
+KEEP_NET = 'net'  # Le net est garanti : le salaire de base est recalculé
+KEEP_CHOICES = (KEEP_GROSS, KEEP_NET)
+
+
+def load_workforce(queryset, chunk_size=WHAT_IF_CHUNK_SIZE):
+    """Charge les employés en colonnes : {'id': ndarray, 'nom_complet': list, <champ>: ndarray}"""
+    rows = list(queryset.order_by('id').values_list('id', 'nom_complet', *WORKFORCE_FIELDS).iterator(chunk_size=chunk_size))
+    columns = list(zip(*rows)) or [()] * (len(WORKFORCE_FIELDS) + 2)
+    workforce = {
+        'id': np.array(columns[0], dtype=np.int64),
+        'nom_complet': list(columns[1]),
+    }
+    for field, values in zip(WORKFORCE_FIELDS, columns[2:]):
+        workforce[field] = np.array(values, dtype=float)
+    return workforce
+
+
+def recompute(workforce, rates, keep=KEEP_GROSS):
+    """Recalcule la paie de tous les employés avec un barème (colonnes du moteur vectorisé)"""
+    payroll_input = {
+        'primes_taxables': workforce['primes_taxables'],
+        'primes_exonerees': workforce['primes_exonerees'],
+        'avantage_nature': workforce['avantage_nature'],
+    }
+    if keep == KEEP_NET:
+        return vectorized.solve_net(workforce['salaire_net'], rates=rates, **payroll_input)
+    return vectorized.evaluate(workforce['salaire_base'], rates=rates, **payroll_input)
+
+
+def compare_rates(workforce, candidate, keep=KEEP_GROSS, current=DEFAULT_RATES):
+    """
+    Compare la paie de chaque employé entre le barème actuel et le barème candidat.
+    Renvoie {métrique: (avant, après, écart)} en tableaux alignés sur workforce['id'].
+    Les deux côtés sont recalculés : l'écart ne reflète que le changement de barème.
+    """
+    if keep not in KEEP_CHOICES:
+        raise ValueError(f"Mode inconnu : {keep} (choix : {', '.join(KEEP_CHOICES)})")
+    before = recompute(workforce, current, keep)
+    after = recompute(workforce, candidate, keep)
+    impact = {}
+    for name, column in IMPACT_METRICS:
+        impact[name] = (before[column], after[column], after[column] - before[column])
+    deductions = workforce['avance_salaire'] + workforce['saisie_opposition']
+    net_before, net_after, net_delta = impact['salaire_net']
+    impact['salaire_net_a_payer'] = (net_before - deductions, net_after - deductions, net_delta)
+    return impact
+
+
+def summarize(impact):
+    """Totaux avant / après / écart par métrique et nombre d'employés concernés"""
+    summary = {'employes': int(len(impact['salaire_net'][0]))}
+    for name, (before, after, delta) in impact.items():
+        summary[name] = {
+            'avant': float(before.sum()),
+            'apres': float(after.sum()),
+            'ecart': float(delta.sum()),
+            'hausses': int((delta > 0.5).sum()),
+            'baisses': int((delta < -0.5).sum()),
+        }
+    return summary
+
+
+def iter_impact_rows(workforce, impact, order_by='cout_employeur', limit=None):
+    """
+    Lignes par employé (dictionnaires) triées par écart décroissant en valeur absolue
+    sur la métrique order_by ; limit restreint aux plus forts écarts.
+    """
+    order = np.argsort(-np.abs(impact[order_by][2]), kind='stable')
+    if limit is not None:
+        order = order[:limit]
+    names = [name for name, _ in IMPACT_METRICS] + ['salaire_net_a_payer']
+    for i in order:
+        row = {'id': int(workforce['id'][i]), 'nom_complet': workforce['nom_complet'][i]}
+        for name in names:
+            before, after, delta = impact[name]
+            row[f"{name}_avant"] = round(float(before[i]), 2)
+            row[f"{name}_apres"] = round(float(after[i]), 2)
+            row[f"{name}_ecart"] = round(float(delta[i]), 2)
+        yield row
+
+
+def stream_impact_csv(workforce, impact, batch_size=WHAT_IF_STREAM_BATCH_SIZE):
+    """Génère le détail par employé au format CSV par blocs de lignes"""
+    buffer = io.StringIO()
+    writer = None
+    for count, row in enumerate(iter_impact_rows(workforce, impact), 1):
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()